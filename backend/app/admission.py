@@ -0,0 +1,293 @@
+"""
+Admission control dan antrian berprioritas per endpoint.
+
+Satu request detect-youtube / detect-video bisa memegang thread worker beberapa menit;
+tanpa batas, thread gthread habis dan detect-text yang murah ikut antre lalu timeout.
+Setiap endpoint deteksi dipetakan ke pool:
+
+    heavy   detect_youtube, detect_video (+ versi /stream)
+    light   detect_text, detect_image, detect_url
+
+Pool punya batas konkurensi dan antrian terbatas. Request yang datang saat pool penuh
+menunggu di antrian (urut prioritas, lalu FIFO); jika antrian penuh atau waktu tunggu
+melewati batas, langsung dijawab 429 dengan header Retry-After (estimasi dari rata-rata
+durasi layanan pool). Jika antrian penuh tapi ada yang menunggu dengan prioritas lebih
+rendah, yang terbaru di antara prioritas terendah dikeluarkan (429, reason evicted) dan
+request baru mengambil tempatnya. Selain batas pool, endpoint bisa punya batas sendiri
+(ADMISSION_ENDPOINT_LIMITS, mis. "detect_url=2,detect_image=2").
+
+Request yang menunggu tetap memegang satu thread gthread, jadi heavy (aktif + antre)
+dibatasi supaya selalu tersisa thread untuk pool light:
+    ADMISSION_HEAVY_CONCURRENCY + ADMISSION_HEAVY_QUEUE <= GUNICORN_THREADS - 1
+Dengan default (4 thread, heavy 1 + antre 1) minimal 2 thread selalu tersedia untuk
+detect-text, berapa pun traffic video yang masuk.
+
+Prioritas lewat header X-Priority: high (butuh X-Admin-Token), normal (default), low
+(mis. klien batch/bulk). Dalam satu pool, antrian high dilayani lebih dulu.
+
+Metrik di /metrics:
+    risetjudi_admission_active{pool}               slot yang sedang dipakai
+    risetjudi_admission_queue_depth{pool}          request yang menunggu
+    risetjudi_admission_wait_seconds{pool}         histogram waktu tunggu di antrian
+    risetjudi_admission_rejected_total{pool,endpoint,reason}   429 (queue_full / timeout / evicted)
+
+ADMISSION=0 mematikan seluruh mekanisme.
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+
+from metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+
+ADMISSION = os.environ.get('ADMISSION', '1') != '0'
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', '4'))
+ADMISSION_HEAVY_CONCURRENCY = int(os.environ.get('ADMISSION_HEAVY_CONCURRENCY', '1'))
+ADMISSION_HEAVY_QUEUE = int(os.environ.get('ADMISSION_HEAVY_QUEUE', '1'))
+ADMISSION_HEAVY_TIMEOUT = float(os.environ.get('ADMISSION_HEAVY_TIMEOUT', '30'))
+ADMISSION_LIGHT_CONCURRENCY = int(os.environ.get('ADMISSION_LIGHT_CONCURRENCY', '0'))  # 0 = sisa thread
+ADMISSION_LIGHT_QUEUE = int(os.environ.get('ADMISSION_LIGHT_QUEUE', '64'))
+ADMISSION_LIGHT_TIMEOUT = float(os.environ.get('ADMISSION_LIGHT_TIMEOUT', '10'))
+ADMISSION_ENDPOINT_LIMITS = os.environ.get('ADMISSION_ENDPOINT_LIMITS', '')
+
+ENDPOINT_POOLS = {
+    'detect_youtube': 'heavy',
+    'detect_youtube_stream': 'heavy',
+    'detect_video': 'heavy',
+    'detect_video_stream': 'heavy',
+    'detect_text': 'light',
+    'detect_image': 'light',
+    'detect_url': 'light',
+}
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+# Bobot rata-rata bergerak durasi layanan (untuk Retry-After)
+_EWMA_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    """Request ditolak admission control (dijawab 429)."""
+
+    def __init__(self, pool, reason, retry_after):
+        super().__init__(f'{pool}: {reason}')
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Pool:
+    """Semaphore dengan antrian berprioritas terbatas dan batas waktu tunggu."""
+
+    def __init__(self, name, concurrency, max_queue, timeout, metric_name=None):
+        self.name = name
+        self.metric_name = metric_name or name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.active = 0
+        self.service_seconds = None
+        self._waiters = []
+        self._evicted = set()
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def retry_after(self):
+        """Estimasi detik sampai ada slot: (antrian + 1) / konkurensi x rata-rata durasi layanan."""
+        average = self.service_seconds or 1.0
+        return max(1, math.ceil((len(self._waiters) + 1) / self.concurrency * average))
+
+    def _update_gauges(self):
+        ADMISSION_ACTIVE.set(self.active, pool=self.metric_name)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), pool=self.metric_name)
+
+    def acquire(self, priority=PRIORITIES['normal']):
+        """Ambil satu slot; return detik menunggu. Raise Rejected jika antrian penuh / timeout."""
+        with self._cond:
+            if self.active < self.concurrency and not self._waiters:
+                self.active += 1
+                self._update_gauges()
+                return 0.0
+            if len(self._waiters) >= self.max_queue:
+                # Yang terbaru di antara prioritas terendah; hanya dikeluarkan untuk prioritas lebih tinggi
+                victim = max(self._waiters, default=None)
+                if victim is None or victim[0] <= priority:
+                    raise Rejected(self.name, 'queue_full', self.retry_after())
+                self._waiters.remove(victim)
+                heapq.heapify(self._waiters)
+                self._evicted.add(victim)
+                self._cond.notify_all()
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            self._update_gauges()
+            started = time.monotonic()
+            deadline = started + self.timeout
+            try:
+                while True:
+                    if entry in self._evicted:
+                        self._evicted.discard(entry)
+                        raise Rejected(self.name, 'evicted', self.retry_after())
+                    if self._waiters[0] == entry and self.active < self.concurrency:
+                        heapq.heappop(self._waiters)
+                        self.active += 1
+                        return time.monotonic() - started
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        raise Rejected(self.name, 'timeout', self.retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self._update_gauges()
+                # Kepala antrian bisa berganti (dapat slot / keluar karena timeout)
+                self._cond.notify_all()
+
+    def release(self, service_seconds=None):
+        with self._cond:
+            self.active -= 1
+            if service_seconds is not None:
+                self.service_seconds = service_seconds if self.service_seconds is None else (
+                    self.service_seconds + _EWMA_ALPHA * (service_seconds - self.service_seconds))
+            self._update_gauges()
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'concurrency': self.concurrency,
+                'active': self.active,
+                'queued': len(self._waiters),
+                'max_queue': self.max_queue,
+                'timeout_seconds': self.timeout,
+                'avg_service_seconds': round(self.service_seconds, 3) if self.service_seconds else None,
+            }
+
+
+def _parse_limits(spec):
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        endpoint, _, value = part.partition('=')
+        limits[endpoint.strip()] = int(value)
+    return limits
+
+
+class Scheduler:
+    """Pool heavy/light + batas per endpoint untuk satu proses worker."""
+
+    def __init__(self, threads=GUNICORN_THREADS):
+        heavy_concurrency = ADMISSION_HEAVY_CONCURRENCY
+        heavy_queue = ADMISSION_HEAVY_QUEUE
+        # Heavy (aktif + antre) tidak boleh menghabiskan semua thread request
+        if heavy_concurrency + heavy_queue > threads - 1:
+            heavy_concurrency = max(1, min(heavy_concurrency, threads - 1))
+            heavy_queue = max(0, threads - 1 - heavy_concurrency)
+            print(f"⚠️ Admission: heavy dibatasi ke {heavy_concurrency} aktif + {heavy_queue} antre "
+                  f"supaya tersisa thread untuk pool light (GUNICORN_THREADS={threads}).")
+        light_concurrency = ADMISSION_LIGHT_CONCURRENCY or max(1, threads - heavy_concurrency)
+        self.pools = {
+            'heavy': Pool('heavy', heavy_concurrency, heavy_queue, ADMISSION_HEAVY_TIMEOUT),
+            'light': Pool('light', light_concurrency, ADMISSION_LIGHT_QUEUE, ADMISSION_LIGHT_TIMEOUT),
+        }
+        self.endpoint_pools = {}
+        for endpoint, limit in _parse_limits(ADMISSION_ENDPOINT_LIMITS).items():
+            pool = self.pools[ENDPOINT_POOLS.get(endpoint, 'light')]
+            self.endpoint_pools[endpoint] = Pool(endpoint, limit, pool.max_queue, pool.timeout,
+                                                 metric_name=f'endpoint:{endpoint}')
+
+    def admit(self, endpoint, priority):
+        """
+        Ambil slot endpoint (jika dibatasi) lalu slot pool; return (list pool yang dipegang,
+        total detik menunggu). None jika endpoint tidak dikelola.
+        """
+        pool_name = ENDPOINT_POOLS.get(endpoint)
+        if pool_name is None:
+            return None
+        held = []
+        waited = 0.0
+        try:
+            for pool in filter(None, (self.endpoint_pools.get(endpoint), self.pools[pool_name])):
+                waited += pool.acquire(priority)
+                held.append(pool)
+        except Rejected as e:
+            for pool in reversed(held):
+                pool.release()
+            ADMISSION_REJECTED.inc(pool=pool_name, endpoint=endpoint, reason=e.reason)
+            raise
+        ADMISSION_WAIT_SECONDS.observe(waited, pool=pool_name)
+        return held, waited
+
+    def stats(self):
+        result = {name: pool.stats() for name, pool in self.pools.items()}
+        result['endpoints'] = {name: pool.stats() for name, pool in self.endpoint_pools.items()}
+        return result
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
+
+
+def init_app(app):
+    """Pasang admission control ke endpoint deteksi app Flask, plus GET /admin/admission."""
+    from flask import g, jsonify, request
+
+    from profiling import admin_token_ok
+
+    if not ADMISSION:
+        return
+    scheduler = get_scheduler()
+
+    def _release(held, started):
+        elapsed = time.perf_counter() - started
+        for pool in reversed(held):
+            pool.release(elapsed)
+
+    @app.before_request
+    def _admission_acquire():
+        requested = (request.headers.get('X-Priority') or 'normal').lower()
+        if requested == 'high' and not admin_token_ok(request.headers.get('X-Admin-Token')):
+            requested = 'normal'
+        try:
+            admitted = scheduler.admit(request.endpoint, PRIORITIES.get(requested, PRIORITIES['normal']))
+        except Rejected as e:
+            response = jsonify({'success': False, 'error': 'Server sedang sibuk, silakan coba lagi.',
+                                'pool': e.pool, 'reason': e.reason, 'retry_after': e.retry_after})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        if admitted is not None:
+            g._admission = (admitted[0], time.perf_counter())
+            g._admission_wait = admitted[1]
+
+    @app.after_request
+    def _admission_handoff(response):
+        from streaming import defer_release
+
+        admission = g.pop('_admission', None)
+        if admission is not None:
+            # SSE: slot dilepas saat thread pipeline selesai (bisa setelah koneksi ditutup),
+            # respons biasa saat respons ditutup
+            release = lambda: _release(*admission)
+            if not defer_release(response, release):
+                response.call_on_close(release)
+            response.headers['X-Queue-Wait-Ms'] = f"{g.pop('_admission_wait', 0.0) * 1000:.0f}"
+        return response
+
+    @app.teardown_request
+    def _admission_cleanup(exc=None):
+        # after_request tidak jalan (exception): lepas slot di sini
+        admission = g.pop('_admission', None)
+        if admission is not None:
+            _release(*admission)
+
+    @app.route('/admin/admission', methods=['GET'])
+    def admission_status():
+        if not admin_token_ok(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return jsonify(scheduler.stats())
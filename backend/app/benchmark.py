@@ -0,0 +1,352 @@
+"""
+Microbenchmark untuk jalur panas deteksi judi (tanpa server Flask).
+
+Semua input dibuat sintetis dengan seed tetap, jadi hasilnya bisa dibandingkan
+antar commit. Jika model .h5 tidak ada, dipakai StubModel (RNN kecil NumPy)
+dan hal ini dicatat di bagian "meta" output.
+
+Pemakaian:
+    python benchmark.py --docs 200 --words 150 --output bench.json
+    python benchmark.py --only keywords,normalize --repeat 10
+    python benchmark.py --compare bench_lama.json --output bench_baru.json
+    python benchmark.py --only video_decode_opencv,video_decode_pyav,video_decode_pyav_rate
+    python benchmark.py --ocr --only tesseract_subprocess,tesseract_persistent
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import detector
+
+# ====== Korpus Sintetis ======
+COMMON_WORDS = [
+    'saya', 'kamu', 'kita', 'yang', 'dan', 'di', 'ke', 'dari', 'ini', 'itu', 'ada', 'tidak',
+    'bisa', 'akan', 'sudah', 'hari', 'orang', 'baru', 'mau', 'lagi', 'juga', 'untuk', 'dengan',
+    'video', 'konten', 'terima', 'kasih', 'teman', 'makan', 'jalan', 'kerja', 'rumah', 'kota',
+    'belajar', 'sekolah', 'main', 'game', 'musik', 'film', 'berita', 'harga', 'promo', 'diskon',
+    'gratis', 'daftar', 'link', 'info', 'update', 'tutorial', 'review', 'resep', 'liburan',
+]
+GAMBLING_PHRASES = [
+    'slot gacor', 'bonus new member', 'deposit', 'maxwin', 'rtp live', 'situs judi',
+    'jackpot', 'scatter hitam', 'wd cepat', 'bandar togel', 'demo slot pg', 'mahjong ways',
+    'slot88', '1xbet', 'parlay bola', 'spin gratis',
+]
+OCR_NOISE = str.maketrans({'o': '0', 'i': '1', 'e': '3', 'a': '4', 's': '5', 'b': '8', 'g': '9'})
+
+
+def make_corpus(docs, words, gambling_ratio, seed):
+    """List teks sintetis; sebagian dokumen diselipi frasa judi."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(docs):
+        tokens = [rng.choice(COMMON_WORDS) for _ in range(words)]
+        if rng.random() < gambling_ratio:
+            for _ in range(rng.randint(1, 5)):
+                tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(GAMBLING_PHRASES))
+        corpus.append(' '.join(tokens))
+    return corpus
+
+
+def make_ocr_corpus(corpus, seed):
+    """Versi teks yang 'rusak' seperti hasil OCR (digit menggantikan huruf, simbol nyasar)."""
+    rng = random.Random(seed)
+    noisy = []
+    for text in corpus:
+        chars = list(text.upper() if rng.random() < 0.5 else text)
+        for i in range(len(chars)):
+            if rng.random() < 0.05:
+                chars[i] = chars[i].translate(OCR_NOISE)
+            elif rng.random() < 0.01:
+                chars[i] = rng.choice('|!@#~')
+        noisy.append(''.join(chars))
+    return noisy
+
+
+def make_html_pages(corpus):
+    pages = []
+    for i, text in enumerate(corpus):
+        paragraphs = ''.join(f'<p class="c{j}">{chunk}</p>' for j, chunk in enumerate(text.split(' dan ')))
+        pages.append(
+            f'<html><head><title>Halaman {i}</title><style>p{{color:red}}</style>'
+            f'<script>var x = {i};</script></head><body><nav><a href="/">Home</a></nav>'
+            f'<div id="main">{paragraphs}</div><footer>&copy; 2025</footer></body></html>'
+        )
+    return pages
+
+
+def make_frames(count, seed, width=1280, height=720):
+    """Frame BGR sintetis dengan banner teks judi di atas latar noise."""
+    import cv2
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(0, 80, size=(height, width, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (40, 40), (width - 40, 200), (0, 200, 255), -1)
+        cv2.putText(frame, GAMBLING_PHRASES[i % len(GAMBLING_PHRASES)].upper(), (60, 150),
+                    cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 0), 6)
+        cv2.putText(frame, COMMON_WORDS[i % len(COMMON_WORDS)], (60, height - 80),
+                    cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
+        frames.append(frame)
+    return frames
+
+
+def make_video(path, seconds, fps=30, width=1280, height=720, seed=0):
+    """Tulis video MP4 sintetis (banner berganti tiap detik + counter frame), return jumlah frame."""
+    import cv2
+    frames = make_frames(4, seed, width=width, height=height)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    total = seconds * fps
+    for t in range(total):
+        frame = frames[(t // fps) % len(frames)].copy()
+        cv2.putText(frame, str(t), (width // 2, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+    return total
+
+
+# ====== Stub Model ======
+class StubModel:
+    """Pengganti model RNN saat file .h5 tidak ada: embedding + SimpleRNN + sigmoid di NumPy."""
+
+    def __init__(self, vocab_size=20000, embed_dim=64, units=64, seed=0):
+        rng = np.random.default_rng(seed)
+        self.embedding = rng.standard_normal((vocab_size + 1, embed_dim), dtype=np.float32) * 0.1
+        self.w_in = rng.standard_normal((embed_dim, units), dtype=np.float32) * 0.1
+        self.w_rec = rng.standard_normal((units, units), dtype=np.float32) * 0.1
+        self.w_out = rng.standard_normal((units, 1), dtype=np.float32) * 0.1
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.int64)
+        x = np.clip(x, 0, len(self.embedding) - 1)
+        inputs = self.embedding[x] @ self.w_in
+        h = np.zeros((x.shape[0], self.w_rec.shape[0]), dtype=np.float32)
+        for t in range(x.shape[1]):
+            h = np.tanh(inputs[:, t] + h @ self.w_rec)
+        return 1.0 / (1.0 + np.exp(-(h @ self.w_out)))
+
+
+# ====== Timer ======
+def run_bench(fn, inputs, repeat, warmup=1):
+    """Jalankan fn untuk setiap input sebanyak `repeat` putaran, catat latensi per panggilan."""
+    for item in inputs[:warmup]:
+        fn(item)
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter_ns()
+            fn(item)
+            samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    total_s = sum(samples) / 1e9
+    return {
+        'calls': len(samples),
+        'mean_ms': statistics.fmean(samples) / 1e6,
+        'median_ms': samples[len(samples) // 2] / 1e6,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] / 1e6,
+        'min_ms': samples[0] / 1e6,
+        'ops_per_s': len(samples) / total_s if total_s else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def tesseract_benchmarks(frames):
+    """Latensi Tesseract per frame: subprocess per frame (lama) vs instance yang tetap ter-load."""
+    import tesseract_ocr
+    benches = {}
+    if tesseract_ocr._available('pytesseract'):
+        import pytesseract
+        benches['tesseract_subprocess'] = (lambda f: pytesseract.image_to_string(f, config='--psm 6'), frames)
+    else:
+        benches['tesseract_subprocess'] = 'skipped: pytesseract/binary tesseract tidak ada'
+    persistent = next((name for name in ('tesserocr', 'capi') if tesseract_ocr._available(name)), None)
+    if persistent:
+        tesseract_ocr._backend = persistent
+        benches['tesseract_persistent'] = (tesseract_ocr.image_to_string, frames)
+    else:
+        benches['tesseract_persistent'] = 'skipped: tesserocr/libtesseract tidak ada'
+    return benches
+
+
+# ====== Daftar Benchmark ======
+def build_benchmarks(args):
+    """Return dict nama -> (fungsi, input) atau nama -> string alasan di-skip."""
+    corpus = make_corpus(args.docs, args.words, args.gambling_ratio, args.seed)
+    benches = {}
+
+    benches['keywords'] = (detector.find_gambling_keywords_in_text, corpus)
+    benches['proximity_rules'] = (detector.find_proximity_matches, corpus)
+    benches['normalize'] = (detector.normalize_ocr_text, make_ocr_corpus(corpus, args.seed))
+
+    try:
+        import cleansing
+        def cleansing_pipeline(text):
+            return cleansing.stemming(cleansing.token(cleansing.casefolding(text)))
+        benches['cleansing'] = (cleansing_pipeline, corpus[:max(1, args.docs // 10)])
+        import batch_cleansing
+        benches['cleansing_batch'] = (batch_cleansing.clean_text, corpus)
+    except ImportError as e:
+        benches['cleansing'] = f'skipped: {e}'
+
+    tokenizer = detector.get_tokenizer()
+    if tokenizer is None:
+        benches['preprocess_text'] = 'skipped: tokenizer tidak ditemukan'
+    else:
+        benches['preprocess_text'] = (detector.preprocess_text, corpus)
+
+    try:
+        import bs4  # noqa: F401
+        benches['html_extract'] = (detector.extract_text_from_html, make_html_pages(corpus))
+    except ImportError as e:
+        benches['html_extract'] = f'skipped: {e}'
+
+    try:
+        frames = make_frames(args.frames, args.seed)
+        benches['frame_preprocess'] = (detector.preprocess_frame, frames)
+        if args.ocr:
+            processed = [detector.preprocess_frame(f) for f in frames]
+            benches['frame_ocr'] = (detector.ocr_frame, processed)
+            benches.update(tesseract_benchmarks(processed))
+        else:
+            benches['frame_ocr'] = 'skipped: jalankan dengan --ocr'
+    except ImportError as e:
+        benches['frame_preprocess'] = f'skipped: {e}'
+        benches['frame_ocr'] = f'skipped: {e}'
+
+    # Decode video: seluruh video dilewati sampler, hasilnya dilaporkan sebagai decode_fps (frame sumber/detik)
+    try:
+        import frame_sampler
+        video_path = os.path.join(tempfile.gettempdir(), f'bench_video_{os.getpid()}.mp4')
+        total = make_video(video_path, args.video_seconds, seed=args.seed)
+        atexit.register(os.remove, video_path)
+        decode = lambda path, **kw: sum(1 for _ in frame_sampler.sample_frames(path, total, 1, **kw))
+        benches['video_decode_opencv'] = (lambda p: decode(p, decoder='opencv'), [video_path], total)
+        if frame_sampler.pyav_available():
+            benches['video_decode_pyav'] = (lambda p: decode(p, decoder='pyav', mode='keyframes'),
+                                            [video_path], total)
+            benches['video_decode_pyav_rate'] = (lambda p: decode(p, decoder='pyav', mode='rate', sample_fps=1),
+                                                 [video_path], total)
+        else:
+            benches['video_decode_pyav'] = benches['video_decode_pyav_rate'] = 'skipped: PyAV tidak ter-install'
+    except ImportError as e:
+        benches['video_decode_opencv'] = f'skipped: {e}'
+
+    model = detector.get_model() if os.path.exists(detector.MODEL_PATH) else None
+    if model is None:
+        model = StubModel(vocab_size=len(tokenizer) if tokenizer is not None else 20000)
+    batch = np.stack([detector.preprocess_text(t)[0] for t in corpus[:max(1, args.docs // 10)]])
+    benches['model_inference'] = (lambda x: model.predict(x[None, :], verbose=0), list(batch))
+    benches['model_inference_batch'] = (lambda x: model.predict(x, verbose=0), [batch])
+
+    # Tier-0 di depan RNN: pakai model terlatih jika ada, selain itu latih cepat di korpus sintetis
+    import tier0
+    linear = tier0.get_model()
+    if linear is None:
+        labels = [int(any(phrase in text for phrase in GAMBLING_PHRASES)) for text in corpus]
+        linear = tier0.train(corpus, labels, epochs=2)
+    benches['tier0'] = (linear.predict_proba, corpus)
+
+    return benches, isinstance(model, StubModel)
+
+
+def compare(old, new, threshold):
+    """Cetak rasio median baru/lama; return True jika ada yang lebih lambat dari threshold."""
+    regressed = False
+    print(f"{'benchmark':24} {'lama ms':>10} {'baru ms':>10} {'rasio':>7}")
+    for name, res in new['results'].items():
+        prev = old.get('results', {}).get(name)
+        if not isinstance(res, dict) or not isinstance(prev, dict):
+            continue
+        ratio = res['median_ms'] / prev['median_ms'] if prev['median_ms'] else float('inf')
+        flag = '  <-- REGRESI' if ratio > threshold else ''
+        regressed |= ratio > threshold
+        print(f"{name:24} {prev['median_ms']:10.3f} {res['median_ms']:10.3f} {ratio:7.2f}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Microbenchmark jalur deteksi judi')
+    parser.add_argument('--docs', type=int, default=200, help='jumlah dokumen sintetis')
+    parser.add_argument('--words', type=int, default=150, help='jumlah kata per dokumen')
+    parser.add_argument('--frames', type=int, default=5, help='jumlah frame sintetis')
+    parser.add_argument('--video-seconds', type=int, default=10, help='durasi video sintetis (30 fps, 720p)')
+    parser.add_argument('--gambling-ratio', type=float, default=0.3)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--ocr', action='store_true', help='ikutkan OCR frame (butuh EasyOCR + Tesseract)')
+    parser.add_argument('--tokenizer', default=None, help='path tokenizer pickle/.vocab (default: detector.TOKENIZER_PATH)')
+    parser.add_argument('--only', default=None, help='daftar nama benchmark dipisah koma')
+    parser.add_argument('--output', default=None, help='tulis hasil JSON ke file (default: stdout)')
+    parser.add_argument('--compare', default=None, help='file JSON hasil sebelumnya untuk dibandingkan')
+    parser.add_argument('--threshold', type=float, default=1.2, help='rasio median yang dianggap regresi')
+    args = parser.parse_args(argv)
+
+    if args.tokenizer:
+        detector.TOKENIZER_PATH = args.tokenizer
+    elif not os.path.exists(detector.TOKENIZER_PATH) and os.path.exists('tokenizer.vocab'):
+        detector.TOKENIZER_PATH = 'tokenizer.pkl'
+
+    benches, stub = build_benchmarks(args)
+    only = set(args.only.split(',')) if args.only else None
+
+    results = {}
+    for name, bench in benches.items():
+        if only and name not in only:
+            continue
+        if isinstance(bench, str):
+            results[name] = bench
+            print(f"⚠️ {name}: {bench}", file=sys.stderr)
+            continue
+        fn, inputs, *units = bench
+        results[name] = run_bench(fn, inputs, args.repeat)
+        if units:
+            # Benchmark dengan jumlah unit per panggilan (mis. frame video) juga melaporkan throughput unit
+            results[name]['decode_fps'] = units[0] / (results[name]['median_ms'] / 1000)
+        print(f"✅ {name}: median {results[name]['median_ms']:.3f} ms", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'stub_model': stub,
+            'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if compare(old, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
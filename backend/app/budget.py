@@ -0,0 +1,132 @@
+"""
+Budget waktu per request untuk pipeline media (detect_video / detect_youtube).
+
+Tanpa budget, setiap tahap berjalan sampai selesai: download penuh YOUTUBE_ANALYSIS_SECONDS,
+OCR seluruh frame sampel dengan EasyOCR + Tesseract, dan ASR seluruh audio. Dengan budget,
+satu objek Budget ikut dioper ke pipeline (seperti `cancel`) dan setiap tahap mengecek
+sisa waktunya lalu menurunkan kualitas alih-alih melewati batas:
+
+    download   rentang video dipersingkat, dibatalkan di progress hook jika deadline lewat
+    frame OCR  Tesseract dilewati (hanya EasyOCR), lalu jumlah frame sampel dikurangi
+               (tetap tersebar di rentang yang sama), berhenti jika jatah waktunya habis
+    audio      audio dipotong ke durasi yang masih sempat di-ASR, atau dilewati
+    ASR        berhenti di antara segmen jika segmen berikutnya tidak akan sempat
+
+Tahap yang dipangkas dicatat di respons (`partial`, `budget.truncated`) dan di event SSE
+'truncated'; verdict dihitung dari bukti yang sempat terkumpul. BUDGET_RESERVE_SECONDS
+disisakan untuk analisis akhir (keyword + model).
+
+Biaya per unit (detik per frame OCR, detik ASR per detik audio) dimulai dari nilai env di
+bawah lalu diperbarui dengan rata-rata bergerak dari durasi nyata di proses ini.
+
+Budget diambil dari header X-Request-Budget atau field `budget_seconds` (JSON / form /
+query), default REQUEST_BUDGET_SECONDS, dibatasi ke [REQUEST_BUDGET_MIN_SECONDS,
+REQUEST_BUDGET_MAX_SECONDS]. Waktu tunggu di antrian admission ikut dihitung.
+Pipeline yang dipanggil tanpa budget (bulk_scan, CLI) tidak dibatasi.
+"""
+import math
+import os
+import threading
+import time
+
+from metrics import BUDGET_TRUNCATIONS
+
+REQUEST_BUDGET_SECONDS = float(os.environ.get('REQUEST_BUDGET_SECONDS', '120'))
+REQUEST_BUDGET_MIN_SECONDS = float(os.environ.get('REQUEST_BUDGET_MIN_SECONDS', '5'))
+REQUEST_BUDGET_MAX_SECONDS = float(os.environ.get('REQUEST_BUDGET_MAX_SECONDS', '540'))  # < GUNICORN_TIMEOUT
+BUDGET_RESERVE_SECONDS = float(os.environ.get('BUDGET_RESERVE_SECONDS', '2'))
+# Bagian sisa budget untuk OCR frame jika setelahnya masih ada ekstraksi audio + ASR
+BUDGET_FRAME_SHARE = float(os.environ.get('BUDGET_FRAME_SHARE', '0.5'))
+
+# Estimasi awal biaya per unit, diperbarui dari durasi nyata
+_costs = {
+    'frame_ocr': float(os.environ.get('BUDGET_FRAME_OCR_SECONDS', '1.5')),        # EasyOCR + Tesseract per frame
+    'frame_ocr_fast': float(os.environ.get('BUDGET_FRAME_OCR_FAST_SECONDS', '1.0')),  # hanya EasyOCR per frame
+    'asr': float(os.environ.get('BUDGET_ASR_SECONDS_PER_AUDIO_SECOND', '0.2')),
+}
+_costs_lock = threading.Lock()
+_EWMA_ALPHA = 0.2
+
+
+def estimate(name):
+    """Estimasi biaya satu unit `name` (detik)."""
+    return _costs[name]
+
+
+def observe(name, seconds):
+    """Catat biaya nyata satu unit `name` ke rata-rata bergerak."""
+    with _costs_lock:
+        _costs[name] += _EWMA_ALPHA * (seconds - _costs[name])
+
+
+def costs():
+    with _costs_lock:
+        return {name: round(value, 3) for name, value in _costs.items()}
+
+
+class Budget:
+    """Deadline satu request. `seconds=None` berarti tanpa batas (semua tahap berjalan penuh)."""
+
+    def __init__(self, seconds=None, spent=0.0):
+        now = time.monotonic()
+        self.seconds = seconds
+        self.started = now - spent
+        self.deadline = None if seconds is None else self.started + seconds
+        self.truncated = {}
+
+    def remaining(self):
+        if self.deadline is None:
+            return math.inf
+        return max(0.0, self.deadline - time.monotonic())
+
+    def available(self):
+        """Sisa waktu untuk tahap media (setelah cadangan analisis akhir)."""
+        return max(0.0, self.remaining() - BUDGET_RESERVE_SECONDS)
+
+    def deadline_after(self, seconds):
+        """Deadline monotonic untuk tahap yang diberi jatah `seconds` (None jika tanpa batas)."""
+        return None if math.isinf(seconds) else time.monotonic() + seconds
+
+    def plan_frames(self, samples, seconds):
+        """
+        (jumlah frame, pakai Tesseract) yang muat dalam `seconds`: Tesseract dilepas dulu,
+        baru jumlah frame dikurangi.
+        """
+        if seconds >= samples * estimate('frame_ocr'):
+            return samples, True
+        return min(samples, int(seconds // estimate('frame_ocr_fast'))), False
+
+    def audio_seconds(self):
+        """Detik audio yang masih sempat di-ASR dengan sisa budget."""
+        return self.available() / estimate('asr')
+
+    def truncate(self, stage, **info):
+        """Catat bahwa `stage` dipangkas/dilewati karena budget."""
+        if stage not in self.truncated:
+            BUDGET_TRUNCATIONS.inc(stage=stage)
+        self.truncated.setdefault(stage, {}).update(info)
+
+    def as_dict(self):
+        return {
+            'seconds': self.seconds,
+            'elapsed_seconds': round(time.monotonic() - self.started, 2),
+            'truncated_stages': list(self.truncated),
+            'truncated': self.truncated,
+        }
+
+
+def from_request(request, default=REQUEST_BUDGET_SECONDS):
+    """Budget request Flask ini; raise ValueError jika nilai budget tidak valid."""
+    from flask import g
+
+    value = request.headers.get('X-Request-Budget') or request.values.get('budget_seconds')
+    if value is None:
+        value = (request.get_json(silent=True) or {}).get('budget_seconds')
+    try:
+        seconds = float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        raise ValueError('budget_seconds harus berupa angka (detik).')
+    if not math.isfinite(seconds) or seconds <= 0:
+        raise ValueError('budget_seconds harus lebih dari 0.')
+    seconds = min(max(seconds, REQUEST_BUDGET_MIN_SECONDS), REQUEST_BUDGET_MAX_SECONDS)
+    return Budget(seconds, spent=g.get('_admission_wait', 0.0))
@@ -0,0 +1,398 @@
+"""
+Bulk scan offline untuk audit moderasi: folder screenshot/video dan manifest CSV/JSONL
+berisi URL, URL YouTube atau caption. Memakai inti deteksi yang sama dengan app.py
+(pipeline.analyze_* / video_events / youtube_events) tanpa menjalankan Flask.
+
+Pemakaian:
+    python bulk_scan.py arsip/ urls.csv captions.jsonl --output verdicts.jsonl
+    python bulk_scan.py arsip/ urls.csv --output verdicts.jsonl --resume     # lanjutkan run yang terputus
+    python bulk_scan.py urls.csv --workers 8 --kinds url,youtube --summary summary.json
+
+Input:
+    folder         di-walk rekursif (urut nama); file gambar -> image, file video -> video
+    *.csv/*.jsonl  manifest, satu item per baris. Kolom yang dikenali (pertama yang terisi):
+                   youtube_url, url (URL YouTube otomatis jadi youtube), text, caption,
+                   path (relatif ke folder manifest). Kolom `id` opsional, default
+                   "<manifest>:<nomor baris>".
+    file lain      gambar/video tunggal
+
+Output JSONL, satu verdict per item:
+    {"id": ..., "kind": "image", "status": "Terindikasi Iklan Judi", "raw_confidence": 0.65,
+     "gambling_keywords": [...], "keyword_count": 2, "method": ..., "elapsed_ms": 812.4}
+Item yang gagal punya field "error" (dan status null). --full menambahkan respons lengkap.
+
+Resume: file output sekaligus checkpoint. Tiap verdict langsung di-flush, dan --resume
+membaca id yang sudah ada (disimpan sebagai hash 8 byte) lalu melewatinya; baris terakhir
+yang terpotong karena crash dibuang. --retry-errors ikut mengulang item yang error.
+
+Memori terbatas: input dibaca lazy (generator), dan hanya --inflight item yang sedang
+diproses di pool; verdict tidak ditahan di memori. Tiap worker me-load model/tokenizer
+sendiri (EasyOCR hanya jika ada item gambar/video). --max-tasks-per-child me-recycle
+worker secara berkala jika memori OCR/TF terus naik.
+
+Ringkasan throughput (item/detik, error, positif, latensi rata-rata per jenis) ditulis
+ke stdout sebagai JSON dan ke --summary jika diberikan. Progres dicetak ke stderr.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.mkv', '.webm', '.avi', '.m4v', '.3gp'}
+MANIFEST_EXTENSIONS = {'.csv', '.jsonl'}
+KINDS = ('text', 'image', 'video', 'url', 'youtube')
+POSITIVE_STATUS = 'Terindikasi Iklan Judi'
+# Sama dengan YOUTUBE_URL_PATTERN di app.py (bulk_scan tidak meng-import Flask)
+YOUTUBE_URL_PATTERN = re.compile(r'^(https?://)?(www\.)?(youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})(\S*)?$')
+
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# ====== Input (lazy) ======
+def _kind_for_path(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    return None
+
+
+def _kind_for_url(url):
+    return 'youtube' if YOUTUBE_URL_PATTERN.match(url) else 'url'
+
+
+def _row_item(row, default_id, base_dir):
+    """Item (id, kind, value) dari satu baris manifest, None jika tidak ada kolom yang dikenali."""
+    item_id = str(row.get('id') or default_id)
+    for field in ('youtube_url', 'url', 'text', 'caption', 'path'):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            continue
+        value = value.strip()
+        if field in ('youtube_url', 'url'):
+            return item_id, _kind_for_url(value), value
+        if field == 'path':
+            path = value if os.path.isabs(value) else os.path.join(base_dir, value)
+            kind = _kind_for_path(path)
+            return (item_id, kind, path) if kind else None
+        return item_id, 'text', value
+    return None
+
+
+def _iter_manifest(path):
+    base_dir = os.path.dirname(os.path.abspath(path))
+    name = os.path.basename(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            rows = csv.DictReader(f)
+            # Baris data mulai di baris 2 (baris 1 = header)
+            numbered = ((i + 2, row) for i, row in enumerate(rows))
+        else:
+            numbered = ((i + 1, line) for i, line in enumerate(f))
+        for line_no, row in numbered:
+            if not isinstance(row, dict):
+                if not row.strip():
+                    continue
+                try:
+                    row = json.loads(row)
+                except ValueError:
+                    print(f"⚠️ {name}:{line_no} bukan JSON valid, dilewati", file=sys.stderr)
+                    continue
+                if not isinstance(row, dict):
+                    continue
+            item = _row_item(row, f'{name}:{line_no}', base_dir)
+            if item is None:
+                print(f"⚠️ {name}:{line_no} tidak punya kolom yang dikenali, dilewati", file=sys.stderr)
+                continue
+            yield item
+
+
+def _iter_directory(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            kind = _kind_for_path(path)
+            if kind:
+                yield path, kind, path
+
+
+def iter_items(paths):
+    """Generator item (id, kind, value) dari folder, manifest dan file tunggal."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from _iter_directory(path)
+        elif os.path.splitext(path)[1].lower() in MANIFEST_EXTENSIONS:
+            yield from _iter_manifest(path)
+        elif _kind_for_path(path):
+            yield path, _kind_for_path(path), path
+        else:
+            print(f"⚠️ {path}: bukan folder, manifest, gambar atau video, dilewati", file=sys.stderr)
+
+
+# ====== Checkpoint ======
+def _id_key(item_id):
+    return int.from_bytes(hashlib.blake2b(item_id.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def load_checkpoint(output_path, retry_errors=False):
+    """Set hash id yang sudah selesai di file output; buang baris terakhir yang terpotong."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'rb+') as f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            valid_end += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if retry_errors and record.get('error'):
+                continue
+            done.add(_id_key(str(record['id'])))
+        f.truncate(valid_end)
+    return done
+
+
+# ====== Worker ======
+def _init_worker():
+    import signal
+    import warnings
+    # Ctrl+C ditangani proses utama (shutdown + ringkasan), worker cukup dihentikan
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    warnings.filterwarnings("ignore")
+    from detector import get_model, get_tokenizer
+    get_tokenizer()
+    get_model()
+
+
+def _analyze(kind, value):
+    from pipeline import (
+        analyze_image, analyze_text, analyze_url, run_to_result, video_events, youtube_events,
+    )
+    if kind == 'text':
+        return analyze_text(value)
+    if kind == 'url':
+        return analyze_url(value)
+    if kind == 'image':
+        with open(value, 'rb') as f:
+            return analyze_image(f.read())
+    if kind == 'video':
+        return run_to_result(video_events(value))
+    if kind == 'youtube':
+        return run_to_result(youtube_events(value))
+    raise ValueError(f'Jenis item tidak dikenal: {kind}')
+
+
+def scan_item(item, full=False):
+    """Jalankan deteksi satu item di worker; return record verdict (tidak pernah raise)."""
+    import ruleset
+    item_id, kind, value = item
+    record = {'id': item_id, 'kind': kind}
+    if kind != 'text':
+        record['input'] = value
+    started = time.perf_counter()
+    try:
+        with ruleset.pinned() as rules:
+            record['ruleset_version'] = rules.version
+            result = _analyze(kind, value) or {}
+        if 'error' in result:
+            raise ValueError(result['error'])
+        record.update({
+            'status': result.get('status'),
+            'raw_confidence': result.get('raw_confidence'),
+            'gambling_keywords': result.get('gambling_keywords', []),
+            'keyword_count': result.get('keyword_count', 0),
+            'method': result.get('method') or result.get('verdict_source'),
+        })
+        if full:
+            record['result'] = result
+    except Exception as e:
+        record.update({'status': None, 'error': f'{type(e).__name__}: {e}'})
+    record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+# ====== Ringkasan ======
+class Summary:
+    """Counter throughput dengan memori konstan (tidak menyimpan latensi per item)."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.started = time.perf_counter()
+        self.scanned = 0
+        self.skipped = 0
+        self.errors = 0
+        self.positives = 0
+        self.per_kind = {}
+
+    def add(self, record):
+        self.scanned += 1
+        stats = self.per_kind.setdefault(record['kind'], {'count': 0, 'errors': 0, 'positives': 0,
+                                                         'total_ms': 0.0, 'max_ms': 0.0})
+        stats['count'] += 1
+        stats['total_ms'] += record['elapsed_ms']
+        stats['max_ms'] = max(stats['max_ms'], record['elapsed_ms'])
+        if record.get('error'):
+            self.errors += 1
+            stats['errors'] += 1
+        elif record.get('status') == POSITIVE_STATUS:
+            self.positives += 1
+            stats['positives'] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def progress_line(self):
+        elapsed = self.elapsed()
+        return (f"[bulk] {self.scanned} item ({self.skipped} dilewati), "
+                f"{self.scanned / elapsed if elapsed else 0:.1f} item/s, "
+                f"{self.positives} positif, {self.errors} error")
+
+    def as_dict(self, interrupted=False):
+        elapsed = self.elapsed()
+        return {
+            'scanned': self.scanned,
+            'skipped_checkpoint': self.skipped,
+            'errors': self.errors,
+            'positives': self.positives,
+            'elapsed_seconds': round(elapsed, 2),
+            'items_per_second': round(self.scanned / elapsed, 2) if elapsed else 0.0,
+            'workers': self.workers,
+            'interrupted': interrupted,
+            'per_kind': {
+                kind: {
+                    'count': s['count'],
+                    'errors': s['errors'],
+                    'positives': s['positives'],
+                    'mean_ms': round(s['total_ms'] / s['count'], 1),
+                    'max_ms': round(s['max_ms'], 1),
+                }
+                for kind, s in sorted(self.per_kind.items())
+            },
+        }
+
+
+# ====== Main ======
+def run(items, output, workers, inflight, full=False, max_tasks_per_child=None, progress_every=10.0, summary=None):
+    """Proses item lewat process pool, tulis verdict ke `output` (file terbuka). Return Summary."""
+    summary = summary or Summary(workers)
+    pool_kwargs = {}
+    if max_tasks_per_child:
+        import multiprocessing
+        # max_tasks_per_child tidak kompatibel dengan fork
+        pool_kwargs = {'max_tasks_per_child': max_tasks_per_child,
+                       'mp_context': multiprocessing.get_context('spawn')}
+
+    items = iter(items)
+    pending = set()
+    last_progress = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, **pool_kwargs) as executor:
+        try:
+            exhausted = False
+            while pending or not exhausted:
+                # Isi jendela in-flight; sisa input tetap di generator
+                while not exhausted and len(pending) < inflight:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(scan_item, item, full))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                    summary.add(record)
+                output.flush()
+                if time.perf_counter() - last_progress >= progress_every:
+                    print(summary.progress_line(), file=sys.stderr)
+                    last_progress = time.perf_counter()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk scan offline iklan judi (folder, CSV, JSONL)')
+    parser.add_argument('inputs', nargs='+', help='folder, manifest .csv/.jsonl, atau file gambar/video')
+    parser.add_argument('--output', '-o', required=True, help='file JSONL verdict (sekaligus checkpoint)')
+    parser.add_argument('--resume', action='store_true', help='lewati item yang sudah ada di --output')
+    parser.add_argument('--retry-errors', action='store_true', help='dengan --resume: ulangi item yang error')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('BULK_WORKERS', '0')) or default_workers())
+    parser.add_argument('--inflight', type=int, default=0, help='maks item di pool (default 4 x workers)')
+    parser.add_argument('--kinds', default=','.join(KINDS), help='jenis item yang diproses, pisahkan koma')
+    parser.add_argument('--limit', type=int, default=0, help='berhenti setelah N item baru (0 = semua)')
+    parser.add_argument('--full', action='store_true', help='sertakan respons deteksi lengkap di tiap verdict')
+    parser.add_argument('--max-tasks-per-child', type=int, default=0, help='recycle worker setelah N item')
+    parser.add_argument('--progress-every', type=float, default=10.0, help='detik antar baris progres')
+    parser.add_argument('--summary', help='tulis ringkasan JSON ke file ini')
+    args = parser.parse_args(argv)
+
+    kinds = set(args.kinds.split(','))
+    unknown = kinds - set(KINDS)
+    if unknown:
+        parser.error(f'jenis tidak dikenal: {", ".join(sorted(unknown))}')
+    if os.path.exists(args.output) and os.path.getsize(args.output) and not args.resume:
+        parser.error(f'{args.output} sudah ada; pakai --resume untuk melanjutkan atau pilih file lain')
+
+    # Batasi thread native per worker (sama seperti gunicorn.conf.py); paralelisme dari jumlah proses
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ.setdefault(var, os.environ.get('NATIVE_THREADS', '1'))
+    csv.field_size_limit(sys.maxsize)
+
+    done = load_checkpoint(args.output, args.retry_errors) if args.resume else set()
+    summary = Summary(args.workers)
+
+    def pending_items():
+        new = 0
+        for item in iter_items(args.inputs):
+            if item[1] not in kinds:
+                continue
+            if done and _id_key(item[0]) in done:
+                summary.skipped += 1
+                continue
+            if args.limit and new >= args.limit:
+                return
+            new += 1
+            yield item
+
+    interrupted = False
+    with open(args.output, 'a', encoding='utf-8') as output:
+        try:
+            run(pending_items(), output, args.workers, args.inflight or args.workers * 4,
+                full=args.full, max_tasks_per_child=args.max_tasks_per_child or None,
+                progress_every=args.progress_every, summary=summary)
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\n⚠️ Dihentikan; jalankan ulang dengan --resume untuk melanjutkan.", file=sys.stderr)
+
+    result = summary.as_dict(interrupted)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    return 130 if interrupted else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,586 @@
+"""
+Inti deteksi judi online yang dipakai bersama oleh app.py, benchmark dan tool lain.
+
+Modul ini sengaja tidak meng-import Flask, dan model/tokenizer/OCR reader
+di-load secara lazy lewat get_model(), get_tokenizer() dan get_reader()
+supaya fungsi teks bisa dipakai tanpa memuat TensorFlow atau EasyOCR.
+"""
+import os
+import re
+import tempfile
+
+import numpy as np
+
+import ruleset
+from fast_tokenizer import load_tokenizer
+from metrics import OCR_CHARACTERS, stage
+
+# ====== Path Model & Tokenizer ======
+MODEL_PATH = 'model_rnn.h5'
+TOKENIZER_PATH = 'tokenizer_rnn.pkl'
+
+_model = None
+_model_loaded = False
+_tokenizer = None
+_tokenizer_loaded = False
+_reader = None
+
+# Region-of-interest OCR untuk detect_image (0 = readtext penuh seperti semula)
+IMAGE_ROI_OCR = os.environ.get('IMAGE_ROI_OCR', '1') != '0'
+ROI_BATCH_SIZE = int(os.environ.get('ROI_BATCH_SIZE', '16'))
+TILE_OCR_WIDTH = int(os.environ.get('TILE_OCR_WIDTH', '480'))
+ASR_SEGMENT_SECONDS = int(os.environ.get('ASR_SEGMENT_SECONDS', '30'))
+OCR_SERVICE_SOCKET = os.environ.get('OCR_SERVICE_SOCKET', '')
+
+
+# ====== Lazy Loader ======
+def get_tokenizer():
+    """Load tokenizer sekali (None jika file tidak ada)."""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        # Pickle Keras dikonversi sekali ke file .vocab (memory-mapped), lihat fast_tokenizer.py
+        _tokenizer = load_tokenizer(TOKENIZER_PATH)
+        _tokenizer_loaded = True
+        if _tokenizer is not None:
+            print("✅ Tokenizer loaded successfully.")
+        else:
+            print("⚠️ Tokenizer file not found, using None.")
+    return _tokenizer
+
+
+def get_model():
+    """Load model RNN sekali (None jika file tidak ada -> dummy mode)."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        if os.path.exists(MODEL_PATH):
+            import tensorflow as tf
+            _model = tf.keras.models.load_model(MODEL_PATH)
+            print("✅ Model loaded successfully.")
+        else:
+            print("⚠️ Model file not found, using dummy mode.")
+        _model_loaded = True
+    return _model
+
+
+def get_reader():
+    """
+    Inisialisasi EasyOCR reader sekali. Jika OCR_SERVICE_SOCKET di-set, yang dipakai
+    adalah client ke service OCR bersama (ocr_service.py) sehingga worker tidak
+    memuat bobot model EasyOCR sendiri.
+    """
+    global _reader
+    if _reader is None:
+        if OCR_SERVICE_SOCKET:
+            from ocr_service import OCRServiceClient
+            _reader = OCRServiceClient(OCR_SERVICE_SOCKET)
+        else:
+            import easyocr
+            _reader = easyocr.Reader(['en'])
+    return _reader
+
+
+# ====== Fungsi Normalizer untuk hasil OCR ======
+def normalize_ocr_text(text):
+    """
+    Normalisasi teks OCR: setiap token dicocokkan ke kosakata judi lewat indeks fuzzy
+    (fuzzy_index.py), jadi substitusi leet/digit ('5l0t', 'b0nus') dan salah baca OCR
+    ('kekalahai', 'hemmember') kembali ke istilah aslinya, sementara merek yang memang
+    mengandung angka (slot88, 1xbet, 188bet) dan kata biasa tidak ikut diubah.
+    """
+    text = re.sub(r'[^a-z0-9@$!|\s]', ' ', text.lower())
+    index = ruleset.active().fuzzy_index
+    with stage('fuzzy_normalize'):
+        tokens = [index.correct(token) for token in text.split()]
+    text = re.sub(r'[^a-z0-9\s]', ' ', ' '.join(tokens))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+# ====== Daftar Kata Kunci Judi ======
+# Kata kunci, aturan kedekatan dan kosakata fuzzy ada di rules/gambling.json (lihat ruleset.py)
+
+_WORD_RE = re.compile(r'\w+')
+
+
+class KeywordMatcher:
+    """
+    Pencocok kata kunci yang dikompilasi sekali, hasilnya sama dengan
+    `re.search(r'\b' + re.escape(kw) + r'\b', text.lower())` untuk tiap keyword.
+
+    Keyword satu kata dicocokkan lewat irisan set token (satu kali `findall`),
+    keyword multi-kata hanya di-regex jika kata pertamanya muncul di teks.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._single = {}
+        self._multi = {}
+        for kw in self.keywords:
+            lower = kw.lower()
+            if _WORD_RE.fullmatch(lower):
+                self._single.setdefault(lower, []).append(kw)
+            else:
+                first = _WORD_RE.match(lower)
+                pattern = re.compile(r'\b' + re.escape(lower) + r'\b')
+                self._multi.setdefault(first.group() if first else '', []).append((kw, pattern))
+
+    def scan(self, text):
+        """Set keyword (bentuk asli) yang muncul di teks."""
+        if not text:
+            return set()
+        text_lower = text.lower()
+        tokens = set(_WORD_RE.findall(text_lower))
+        found = set()
+        for token in tokens & self._single.keys():
+            found.update(self._single[token])
+        for first, patterns in self._multi.items():
+            if first and first not in tokens:
+                continue
+            for kw, pattern in patterns:
+                if pattern.search(text_lower):
+                    found.add(kw)
+        return found
+
+
+NORMALIZATION_DICTIONARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'kamusnormalisasi.csv')
+# Vocabulary kata dikenal untuk indeks fuzzy: tokenizer yang ikut di repo (tokenizer.pkl /
+# tokenizer.vocab), bukan TOKENIZER_PATH yang bisa saja tidak ada di deployment
+KNOWN_WORDS_TOKENIZER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tokenizer.pkl')
+
+_known_words = None
+
+
+def _load_known_words():
+    """Kata di kamus normalisasi (slang dan baku); kata-kata ini tidak pernah dikoreksi secara fuzzy."""
+    global _known_words
+    if _known_words is None:
+        words = set()
+        if os.path.exists(NORMALIZATION_DICTIONARY):
+            with open(NORMALIZATION_DICTIONARY, encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    words.update(_WORD_RE.findall(line.lower()))
+        _known_words = words
+    return _known_words
+
+
+def make_fuzzy_index(terms, corrections=None, known_words=()):
+    """
+    Indeks fuzzy (fuzzy_index.py) untuk kosakata ruleset. Kata dikenal: kamus, tokenizer,
+    dan `known_words` (fuzzy_known_words di ruleset).
+    """
+    from fuzzy_index import FuzzyIndex
+    known = _load_known_words() | set(known_words)
+    tokenizers = [t for t in (get_tokenizer(), load_tokenizer(KNOWN_WORDS_TOKENIZER_PATH)) if t is not None]
+
+    def is_known_word(token):
+        if token in known:
+            return True
+        for tokenizer in tokenizers:
+            index = int(tokenizer.lookup([token])[0])
+            if index not in (0, tokenizer.oov_index):
+                return True
+        return False
+
+    return FuzzyIndex(terms, is_known_word, corrections=corrections)
+
+
+# ====== Aturan Kedekatan Token ======
+# Aturan: (nama, term A, term B, jarak maks dalam token, berurutan: A harus sebelum B),
+# dari 'proximity_rules' di file ruleset. Term diakhiri '*' cocok sebagai prefix token
+# ('slot*' -> slot, slot88); B None = cukup A saja.
+class ProximityMatcher:
+    """
+    Aturan "A dalam N token dari B" (berurutan atau tidak) yang dikompilasi sekali dan
+    dievaluasi dalam SATU pass atas token teks, pengganti regex `a.*b` yang bisa
+    menyeberangi seluruh teks OCR+ASR dan menjodohkan kata yang berjauhan.
+
+    Semua term digabung menjadi satu regex kandidat, jadi loop Python hanya menyentuh
+    token yang merupakan term aturan; posisi token dihitung dari jumlah kata di antara
+    dua kandidat. Untuk tiap aturan disimpan posisi terakhir A dan B; saat salah satunya
+    muncul cukup dibandingkan dengan posisi terakhir pasangannya, jadi biaya O(jumlah token).
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._exact = {}
+        self._prefix = {}
+        for index, (name, first, second, distance, ordered) in enumerate(self.rules):
+            for role, term in ((0, first), (1, second)):
+                if term is None:
+                    continue
+                term = term.lower()
+                if term.endswith('*'):
+                    self._prefix.setdefault(term[:-1], []).append((index, role))
+                else:
+                    self._exact.setdefault(term, []).append((index, role))
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._prefix})
+        alternatives = [re.escape(term) + r'\b' for term in self._exact]
+        alternatives += [re.escape(prefix) + r'\w*' for prefix in self._prefix]
+        alternatives.sort(key=len, reverse=True)
+        self._candidates = re.compile(r'\b(?:' + '|'.join(alternatives) + ')') if alternatives else None
+
+    def _roles(self, token):
+        roles = list(self._exact.get(token, ()))
+        for length in self._prefix_lengths:
+            if length > len(token):
+                break
+            roles.extend(self._prefix.get(token[:length], ()))
+        return roles
+
+    def scan(self, text):
+        """Set nama aturan yang terpenuhi di teks."""
+        if not text or self._candidates is None:
+            return set()
+        text_lower = text.lower()
+        found = set()
+        last = [[None, None] for _ in self.rules]
+        position = -1
+        cursor = 0
+        for match in self._candidates.finditer(text_lower):
+            # Posisi token = jumlah kata sebelum kandidat ini
+            position += len(_WORD_RE.findall(text_lower, cursor, match.start())) + 1
+            cursor = match.end()
+            for index, role in self._roles(match.group()):
+                name, _, second, distance, ordered = self.rules[index]
+                if name in found:
+                    continue
+                if second is None:
+                    found.add(name)
+                    continue
+                other = last[index][1 - role]
+                # Berurutan: hanya B yang datang setelah A yang memenuhi aturan
+                if other is not None and position - other <= distance and (role == 1 or not ordered):
+                    found.add(name)
+                last[index][role] = position
+        return found
+
+
+def find_proximity_matches(text):
+    """Nama aturan kedekatan (proximity_rules ruleset aktif) yang terpenuhi di teks."""
+    proximity = ruleset.active().proximity
+    with stage('rule_scan'):
+        return list(proximity.scan(text))
+
+
+def find_gambling_keywords_in_text(text):
+    """
+    Deteksi kata kunci judi dengan pencarian fleksibel dan regex boundary.
+    """
+    matcher = ruleset.active().matcher
+    with stage('keyword_scan'):
+        return list(matcher.scan(text))
+
+
+def find_gambling_keywords_in_fields(fields):
+    """
+    Scan beberapa field bernama sekaligus (satu pass per field).
+
+    Return (gabungan keyword, {nama_field: [keyword]}) supaya caller bisa
+    melaporkan dari field mana keyword berasal tanpa men-scan ulang teks gabungan.
+    """
+    per_field = {}
+    union = set()
+    matcher = ruleset.active().matcher
+    with stage('keyword_scan'):
+        for name, text in fields.items():
+            found = matcher.scan(text)
+            per_field[name] = list(found)
+            union |= found
+    return list(union), per_field
+
+
+# ========= HITUNG CONFIDENCE BERDASARKAN KEYWORD =====
+def calculate_confidence_based_on_keywords(keyword_count):
+    """
+    Menentukan confidence berdasar jumlah keyword:
+    - 0 keyword: 0%
+    - 1 keyword: 55%
+    - 2 keyword: 60%
+    - 3 keyword: 70%
+    - 4 keyword: 85%
+    - >=5 keyword: 100%
+    """
+    if keyword_count == 0:
+        return 0.0
+    elif keyword_count == 1:
+        return 0.55
+    elif keyword_count == 2:
+        return 0.60
+    elif keyword_count == 3:
+        return 0.70
+    elif keyword_count == 4:
+        return 0.85
+    else:
+        return 1.0
+
+
+# ================ PREPROCESS TEKS ====================
+def preprocess_text(text, maxlen=200):
+    """Konversi teks ke bentuk numerik untuk model RNN."""
+    tokenizer = get_tokenizer()
+    if not tokenizer:
+        return np.zeros((1, maxlen))
+    with stage('tokenize'):
+        return tokenizer.texts_to_padded([text], maxlen=maxlen, padding='post', truncating='post')
+
+
+def predict_proba(processed):
+    """Skor model RNN (0..1) untuk satu input hasil preprocess_text."""
+    with stage('model_inference'):
+        return float(get_model().predict(processed, verbose=0)[0][0])
+
+
+# ================ EKSTRAK TEKS HTML ==================
+def extract_text_from_html(html):
+    """Ambil teks yang terlihat dari HTML (dipakai detect_url)."""
+    from bs4 import BeautifulSoup
+    with stage('html_parse'):
+        soup = BeautifulSoup(html, 'html.parser')
+        return soup.get_text(separator=' ', strip=True)
+
+
+# ================ FRAME VIDEO ========================
+def preprocess_frame(frame):
+    """Grayscale -> denoise -> CLAHE -> Otsu threshold -> resize (maks lebar 1200)."""
+    import cv2
+    with stage('frame_preprocess'):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        denoised = cv2.medianBlur(gray, 3)
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+        enhanced = clahe.apply(denoised)
+        _, thresh = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+        height, width = thresh.shape
+        if width > 1200:
+            scale = 1200 / width
+            resized = cv2.resize(thresh, (1200, int(height * scale)), interpolation=cv2.INTER_CUBIC)
+        else:
+            resized = thresh
+    return resized
+
+
+def ocr_frame(image, tesseract=True):
+    """
+    OCR satu frame hasil preprocess_frame dengan EasyOCR + Tesseract, return teks bersih.
+    Array frame dikirim langsung ke kedua engine (tanpa file JPEG sementara); Tesseract
+    memakai instance yang tetap ter-load, lihat tesseract_ocr.py. `tesseract=False`
+    hanya memakai EasyOCR (budget waktu request menipis, lihat budget.py).
+    """
+    from tesseract_ocr import image_to_string
+
+    ocr_results = []
+    try:
+        with stage('ocr', engine='easyocr'):
+            easy_results = get_reader().readtext(image, detail=0, paragraph=True)
+        OCR_CHARACTERS.inc(sum(map(len, easy_results)), engine='easyocr')
+        ocr_results.extend(easy_results)
+    except:
+        pass
+    if tesseract:
+        try:
+            with stage('ocr', engine='tesseract'):
+                result3 = image_to_string(image)
+            OCR_CHARACTERS.inc(len(result3.strip()), engine='tesseract')
+            if result3.strip():
+                ocr_results.append(result3)
+        except:
+            pass
+
+    combined_text = ' '.join(ocr_results)
+    return re.sub(r'\s+', ' ', combined_text).strip()
+
+
+def ocr_frame_cached(image, tesseract=True):
+    """
+    Seperti ocr_frame, tapi cek cache pHash lintas video dulu (frame_cache.py).
+    Hasil tanpa Tesseract disimpan terpisah supaya tidak dipakai request dengan OCR penuh.
+    Return (teks, hit).
+    """
+    from frame_cache import cached_ocr
+    kind = 'frame' if tesseract else 'frame_fast'
+    texts, hit = cached_ocr(kind, image, lambda: [ocr_frame(image, tesseract)])
+    return texts[0], hit
+
+
+# ================ OCR GAMBAR ========================
+def ocr_image(image_bytes):
+    """
+    OCR gambar upload. Return (list teks, info) dengan info berisi ukuran gambar
+    dan jumlah region teks yang di-OCR.
+
+    Gambar di-decode sekali dan diperkecil, lalu dicari di cache pHash (frame_cache.py).
+    Jika miss, region teks dicari dengan OpenCV (text_regions.py) dan hanya region itu
+    yang dikenali EasyOCR (`recognize`, tanpa detector CRAFT) dalam satu batch; gambar
+    tanpa region teks tidak di-OCR sama sekali.
+    """
+    import cv2
+    from text_regions import decode_image, propose_text_regions
+
+    reader = get_reader()
+    if not IMAGE_ROI_OCR:
+        with stage('ocr', engine='easyocr'):
+            results = reader.readtext(image_bytes, detail=0)
+        OCR_CHARACTERS.inc(sum(map(len, results)), engine='easyocr')
+        return results, {'mode': 'full'}
+
+    from frame_cache import cached_ocr
+
+    with stage('image_decode'):
+        image = decode_image(image_bytes)
+    info = {'mode': 'roi', 'image_size': [image.shape[1], image.shape[0]]}
+
+    def recognize_regions():
+        with stage('text_regions'):
+            regions = propose_text_regions(image)
+        info['regions'] = len(regions)
+        if not regions:
+            return []
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        with stage('ocr', engine='easyocr'):
+            results = reader.recognize(gray, horizontal_list=regions, free_list=[], detail=0,
+                                       batch_size=ROI_BATCH_SIZE)
+        results = [text for text in results if text.strip()]
+        OCR_CHARACTERS.inc(sum(map(len, results)), engine='easyocr')
+        return results
+
+    # Gambar yang hampir identik dengan gambar/banner sebelumnya tidak di-OCR ulang
+    results, hit = cached_ocr('image', image, recognize_regions)
+    info['cache'] = 'hit' if hit else 'miss'
+    return results, info
+
+
+def ocr_tiles(images, width=TILE_OCR_WIDTH, gap=16):
+    """
+    OCR banyak gambar kecil (thumbnail + tile storyboard) dengan SATU panggilan recognize.
+
+    Tiap gambar diskalakan ke lebar `width` (tile storyboard 160px diperbesar), region
+    teksnya dicari per gambar, lalu semua gambar ditumpuk vertikal (dipisah `gap` piksel)
+    supaya seluruh region dikenali dalam satu batch EasyOCR. Return list teks.
+    """
+    import cv2
+    from text_regions import propose_text_regions
+
+    strips, boxes, offset = [], [], 0
+    with stage('text_regions'):
+        for image in images:
+            scale = width / image.shape[1]
+            interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+            resized = cv2.resize(image, (width, max(1, int(image.shape[0] * scale))), interpolation=interpolation)
+            for x_min, x_max, y_min, y_max in propose_text_regions(resized):
+                boxes.append([x_min, x_max, y_min + offset, y_max + offset])
+            strips.append(cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY))
+            strips.append(np.zeros((gap, width), dtype=np.uint8))
+            offset += resized.shape[0] + gap
+    if not boxes:
+        return []
+
+    mosaic = np.vstack(strips)
+    with stage('ocr', engine='easyocr'):
+        results = get_reader().recognize(mosaic, horizontal_list=boxes, free_list=[], detail=0,
+                                         batch_size=ROI_BATCH_SIZE)
+    results = [text for text in results if text.strip()]
+    OCR_CHARACTERS.inc(sum(map(len, results)), engine='easyocr')
+    return results
+
+
+# ================ AUDIO =============================
+def extract_audio(video_path, max_seconds=None):
+    """
+    Ekstrak audio video ke file WAV sementara (hanya `max_seconds` detik pertama jika diisi),
+    return path atau None jika gagal.
+    """
+    audio_path = tempfile.NamedTemporaryFile(delete=False, suffix='.wav').name
+    try:
+        with stage('audio_extract'):
+            from moviepy.editor import VideoFileClip
+            clip = VideoFileClip(video_path)
+            audio = clip.audio
+            if max_seconds is not None and clip.duration and clip.duration > max_seconds:
+                audio = audio.subclip(0, max_seconds)
+            audio.write_audiofile(audio_path, codec='pcm_s16le')
+            clip.close()
+        return audio_path
+    except Exception as e:
+        print(f"Audio extraction error: {e}")
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+        return None
+
+
+def transcribe_audio(audio_path):
+    """Speech-to-text (Google, id-ID) untuk file WAV, return '' jika gagal."""
+    audio_text = ""
+    try:
+        import speech_recognition as sr
+        with stage('asr', engine='google'):
+            recognizer = sr.Recognizer()
+            with sr.AudioFile(audio_path) as source:
+                audio_data = recognizer.record(source)
+                audio_text = recognizer.recognize_google(audio_data, language="id-ID")
+        print(f"Audio transcription: {audio_text[:200]}...")
+    except Exception as e:
+        print(f"Speech recognition error: {e}")
+    return audio_text
+
+
+def transcribe_audio_segments(audio_path, segment_seconds=ASR_SEGMENT_SECONDS):
+    """
+    Speech-to-text per segmen `segment_seconds` detik (Google, id-ID), generator teks per segmen.
+    Segmen yang tidak dikenali menghasilkan ''; dipakai pipeline streaming supaya transkrip
+    bisa dikirim bertahap (dan dibatalkan di antara segmen).
+    """
+    try:
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(audio_path) as source:
+            while True:
+                with stage('asr', engine='google'):
+                    audio_data = recognizer.record(source, duration=segment_seconds)
+                    if not audio_data.frame_data:
+                        break
+                    try:
+                        text = recognizer.recognize_google(audio_data, language="id-ID")
+                    except sr.UnknownValueError:
+                        text = ''
+                yield text
+    except Exception as e:
+        print(f"Speech recognition error: {e}")
+
+
+# ================ STATUS SUBSISTEM ==================
+def _memory_mb():
+    """RSS dan USS (memori unik proses, tidak dibagi dengan master/worker lain) dalam MB."""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        kb = lambda key: int(fields.get(key, '0 kB').split()[0])
+        usage['rss_mb'] = round(kb('Rss') / 1024, 1)
+        usage['pss_mb'] = round(kb('Pss') / 1024, 1)
+        usage['uss_mb'] = round((kb('Private_Clean') + kb('Private_Dirty')) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+
+def subsystem_status():
+    """Status load tiap subsistem tanpa memicu loading (dipakai /readyz)."""
+    import tier0
+    from tesseract_ocr import tesseract_backend
+    status = {
+        'tokenizer': 'loaded' if _tokenizer is not None else ('missing' if _tokenizer_loaded else 'not_loaded'),
+        'model': 'loaded' if _model is not None else ('dummy' if _model_loaded else 'not_loaded'),
+        'ocr_reader': 'not_loaded' if _reader is None else ('service' if OCR_SERVICE_SOCKET else 'loaded'),
+        'tesseract': tesseract_backend() or 'missing',
+        'ruleset': ruleset.loaded_version() or 'not_loaded',
+        'tier0': tier0.status(),
+        'pid': os.getpid(),
+        'memory': _memory_mb(),
+    }
+    if OCR_SERVICE_SOCKET:
+        from ocr_service import OCRServiceClient
+        try:
+            OCRServiceClient(OCR_SERVICE_SOCKET, timeout=2).stats()
+            status['ocr_service'] = 'up'
+        except (ConnectionError, RuntimeError):
+            status['ocr_service'] = 'down'
+    return status
@@ -0,0 +1,358 @@
+"""
+Tokenizer ringkas berbasis array untuk menggantikan Keras Tokenizer hasil pickle.
+
+File `tokenizer.pkl` dikonversi SEKALI menjadi file vocabulary beku (.vocab):
+kata-kata disimpan sebagai array byte terurut (dikelompokkan per lebar 8/16/32/...
+byte) beserta array id int32, lalu dibaca lewat memory-map. Lookup dilakukan
+dengan `np.searchsorted` untuk satu batch teks sekaligus dan hasilnya langsung
+ditulis ke array NumPy yang sudah dialokasikan (setara `pad_sequences`).
+
+Pemakaian:
+    python fast_tokenizer.py convert tokenizer.pkl tokenizer.vocab
+    python fast_tokenizer.py verify tokenizer.pkl tokenizer.vocab
+    python fast_tokenizer.py bench tokenizer.pkl tokenizer.vocab
+"""
+import json
+import os
+import pickle
+import struct
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+MAGIC = b'RJTOK001'
+ALIGN = 8
+MIN_WIDTH = 8
+
+
+def _bucket_width(nbytes):
+    """Lebar bucket (pangkat dua, minimal 8 byte) untuk kata sepanjang nbytes."""
+    width = MIN_WIDTH
+    while width < nbytes:
+        width *= 2
+    return width
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _write_vocab(path, word_index, config):
+    """Tulis file vocabulary beku dari dict word -> id."""
+    buckets = {}
+    for word, idx in word_index.items():
+        encoded = word.encode('utf-8')
+        if b'\x00' in encoded:
+            # Array 'S' NumPy membuang NUL di akhir, jadi kata seperti ini tidak bisa dijamin exact
+            raise ValueError(f'Kata mengandung karakter NUL, tidak bisa dibekukan: {word!r}')
+        buckets.setdefault(_bucket_width(len(encoded)), []).append((encoded, idx))
+
+    header = dict(config)
+    header['vocab_size'] = len(word_index)
+    header['buckets'] = []
+
+    blobs = []
+    offset = 0
+    for width in sorted(buckets):
+        items = sorted(buckets[width])
+        words = np.array([w for w, _ in items], dtype=f'S{width}')
+        ids = np.array([i for _, i in items], dtype='<i4')
+        words_off = offset
+        offset = _align(offset + words.nbytes)
+        ids_off = offset
+        offset = _align(offset + ids.nbytes)
+        header['buckets'].append({
+            'width': width, 'count': len(items),
+            'words_offset': words_off, 'ids_offset': ids_off,
+        })
+        blobs.append((words_off, words.tobytes()))
+        blobs.append((ids_off, ids.tobytes()))
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+    body = bytearray(offset)
+    for off, raw in blobs:
+        body[off:off + len(raw)] = raw
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\x00' * (data_start - len(MAGIC) - 4 - len(header_bytes)))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+class FrozenTokenizer:
+    """Tokenizer read-only yang kompatibel id-per-id dengan Keras `Tokenizer.word_index`."""
+
+    def __init__(self, header, buckets):
+        self.filters = header['filters']
+        self.split = header['split']
+        self.lower = header['lower']
+        self.num_words = header['num_words']
+        self.oov_token = header['oov_token']
+        self.oov_index = header['oov_index']
+        self.vocab_size = header['vocab_size']
+        self._buckets = buckets  # list of (width, words S-array, ids int32-array)
+        self._translate = str.maketrans({c: self.split for c in self.filters})
+
+    # ====== Pembuatan & Loading ======
+    @classmethod
+    def from_keras(cls, keras_tokenizer, path):
+        """Bekukan Keras Tokenizer ke file `path`, lalu load hasilnya."""
+        if getattr(keras_tokenizer, 'char_level', False):
+            raise ValueError('Tokenizer char_level tidak didukung')
+        if getattr(keras_tokenizer, 'analyzer', None) is not None:
+            raise ValueError('Tokenizer dengan analyzer kustom tidak didukung')
+        oov_token = keras_tokenizer.oov_token
+        config = {
+            'filters': keras_tokenizer.filters,
+            'split': keras_tokenizer.split,
+            'lower': bool(keras_tokenizer.lower),
+            'num_words': keras_tokenizer.num_words,
+            'oov_token': oov_token,
+            'oov_index': keras_tokenizer.word_index.get(oov_token) if oov_token is not None else None,
+        }
+        _write_vocab(path, keras_tokenizer.word_index, config)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        """Load file .vocab lewat memory-map (tanpa menyalin isi array)."""
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f'Bukan file vocabulary tokenizer: {path}')
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+        data_start = _align(len(MAGIC) + 4 + header_len)
+        mm = np.memmap(path, dtype=np.uint8, mode='r', offset=data_start)
+
+        buckets = []
+        for b in header['buckets']:
+            width, count = b['width'], b['count']
+            words = mm[b['words_offset']:b['words_offset'] + width * count].view(f'S{width}')
+            ids = mm[b['ids_offset']:b['ids_offset'] + 4 * count].view('<i4')
+            buckets.append((width, words, ids))
+        return cls(header, buckets)
+
+    # ====== Tokenisasi ======
+    def text_to_word_sequence(self, text):
+        """Sama persis dengan `text_to_word_sequence` milik Keras."""
+        if self.lower:
+            text = text.lower()
+        return [w for w in text.translate(self._translate).split(self.split) if w]
+
+    def lookup(self, words):
+        """Konversi list kata ke array id int32 (0 = tidak dikenal)."""
+        result = np.zeros(len(words), dtype=np.int32)
+        if not words:
+            return result
+        encoded = [w.encode('utf-8') for w in words]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        # Token dengan NUL tidak pernah ada di vocabulary (dijamin saat konversi),
+        # dan array 'S' akan membuang NUL di akhir, jadi keluarkan dari pencarian.
+        if '\x00' in ''.join(words):
+            lengths[[i for i, w in enumerate(words) if '\x00' in w]] = 0
+        encoded = np.array(encoded, dtype=object)
+
+        prev_width = 0
+        for width, vocab_words, vocab_ids in self._buckets:
+            mask = (lengths > prev_width) & (lengths <= width)
+            prev_width = width
+            if not mask.any():
+                continue
+            positions = np.nonzero(mask)[0]
+            candidates = encoded[positions].astype(f'S{width}')
+            idx = np.searchsorted(vocab_words, candidates)
+            idx[idx >= len(vocab_words)] = len(vocab_words) - 1
+            hit = vocab_words[idx] == candidates
+            result[positions[hit]] = vocab_ids[idx[hit]]
+
+        if self.oov_index is not None:
+            result[result == 0] = self.oov_index
+        if self.num_words:
+            too_big = result >= self.num_words
+            result[too_big] = self.oov_index if self.oov_index is not None else 0
+        return result
+
+    def _batch_ids(self, texts):
+        sequences = [self.text_to_word_sequence(t) for t in texts]
+        lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+        flat = [w for seq in sequences for w in seq]
+        # Lookup hanya kata unik, lalu sebarkan kembali ke posisi aslinya
+        position = {w: i for i, w in enumerate(dict.fromkeys(flat))}
+        unique_ids = self.lookup(list(position))
+        ids = unique_ids[np.fromiter(map(position.__getitem__, flat), dtype=np.int64, count=len(flat))]
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        keep = ids > 0
+        return ids[keep], rows[keep], len(texts)
+
+    def texts_to_sequences(self, texts):
+        """API kompatibel dengan Keras: list of list id."""
+        ids, rows, n = self._batch_ids(texts)
+        bounds = np.searchsorted(rows, np.arange(n + 1))
+        return [ids[bounds[i]:bounds[i + 1]].tolist() for i in range(n)]
+
+    def texts_to_padded(self, texts, maxlen, padding='post', truncating='post', dtype='int32', value=0):
+        """
+        Tokenisasi satu batch teks langsung ke array (n, maxlen) yang sudah dialokasikan,
+        hasilnya identik dengan `pad_sequences(texts_to_sequences(texts), ...)`.
+        """
+        ids, rows, n = self._batch_ids(texts)
+        out = np.full((n, maxlen), value, dtype=dtype)
+        if ids.size == 0 or maxlen <= 0:
+            return out
+
+        counts = np.bincount(rows, minlength=n)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        pos = np.arange(ids.size) - starts[rows]          # posisi token di dalam barisnya
+        kept = np.minimum(counts, maxlen)
+
+        if truncating == 'post':
+            keep = pos < maxlen
+        elif truncating == 'pre':
+            drop = counts - kept
+            keep = pos >= drop[rows]
+            pos = pos - drop[rows]
+        else:
+            raise ValueError(f'truncating tidak dikenal: {truncating}')
+
+        if padding == 'post':
+            col = pos
+        elif padding == 'pre':
+            col = pos + (maxlen - kept)[rows]
+        else:
+            raise ValueError(f'padding tidak dikenal: {padding}')
+
+        out[rows[keep], col[keep]] = ids[keep]
+        return out
+
+    def __len__(self):
+        return self.vocab_size
+
+
+# ====== Helper untuk app.py ======
+def vocab_path_for(pickle_path):
+    return os.path.splitext(pickle_path)[0] + '.vocab'
+
+
+def load_tokenizer(pickle_path, vocab_path=None):
+    """
+    Load tokenizer beku. Jika file .vocab belum ada (atau lebih lama dari pickle),
+    pickle di-load sekali, diverifikasi, lalu dikonversi. Return None jika tidak ada file.
+    """
+    vocab_path = vocab_path or vocab_path_for(pickle_path)
+    pickle_exists = os.path.exists(pickle_path)
+
+    if os.path.exists(vocab_path) and (
+            not pickle_exists or os.path.getmtime(vocab_path) >= os.path.getmtime(pickle_path)):
+        return FrozenTokenizer.load(vocab_path)
+
+    if not pickle_exists:
+        return None
+
+    try:
+        with open(pickle_path, 'rb') as handle:
+            keras_tokenizer = pickle.load(handle)
+    except ImportError as e:
+        # Keras tidak terpasang: pakai .vocab yang sudah ada walaupun lebih lama dari pickle
+        if os.path.exists(vocab_path):
+            print(f"⚠️ Tidak bisa unpickle {pickle_path} ({e}), memakai {vocab_path}")
+            return FrozenTokenizer.load(vocab_path)
+        raise
+    frozen = FrozenTokenizer.from_keras(keras_tokenizer, vocab_path)
+    mismatches = verify(keras_tokenizer, frozen)
+    if mismatches:
+        os.remove(vocab_path)
+        raise ValueError(f'Tokenizer beku tidak kompatibel ({len(mismatches)} perbedaan): {mismatches[:5]}')
+    return frozen
+
+
+# ====== Verifikasi kompatibilitas ======
+SAMPLE_TEXTS = [
+    'Slot Gacor hari ini!! Bonus new member 100%, deposit via DANA.',
+    'ChatGPT adalah asisten AI yang dikembangkan oleh OpenAI.',
+    'link   alternatif\tsitus-judi (resmi) RTP live 98%...',
+    '',
+    'kata_tidak_dikenal qwertyuiop asdfghjkl',
+]
+
+
+def verify(keras_tokenizer, frozen, texts=None):
+    """
+    Bandingkan tokenizer beku dengan Keras Tokenizer asli:
+    setiap kata di word_index harus memetakan ke id yang sama, dan
+    `texts_to_sequences` harus identik untuk teks contoh. Return list perbedaan.
+    """
+    mismatches = []
+    words = list(keras_tokenizer.word_index)
+    ids = frozen.lookup(words)
+    for word, got in zip(words, ids.tolist()):
+        expected = keras_tokenizer.word_index[word]
+        if frozen.num_words and expected >= frozen.num_words:
+            expected = frozen.oov_index or 0
+        if got != expected:
+            mismatches.append((word, expected, got))
+
+    texts = list(texts or []) + SAMPLE_TEXTS + [' '.join(words[i:i + 50]) for i in range(0, len(words), 997)]
+    expected_seqs = keras_tokenizer.texts_to_sequences(texts)
+    got_seqs = frozen.texts_to_sequences(texts)
+    for text, exp, got in zip(texts, expected_seqs, got_seqs):
+        if exp != got:
+            mismatches.append((text[:50], exp[:10], got[:10]))
+    return mismatches
+
+
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, elapsed, peak
+
+
+def bench(pickle_path, vocab_path, repeat=5):
+    """Bandingkan waktu load dan memori (tracemalloc) antara unpickle dan memory-map."""
+    def load_pickle():
+        with open(pickle_path, 'rb') as handle:
+            return pickle.load(handle)
+
+    results = {}
+    for name, fn in (('pickle', load_pickle), ('frozen', lambda: FrozenTokenizer.load(vocab_path))):
+        times, peaks = [], []
+        for _ in range(repeat):
+            _, elapsed, peak = _measure(fn)
+            times.append(elapsed)
+            peaks.append(peak)
+        results[name] = {'load_ms': min(times) * 1000, 'peak_kb': max(peaks) / 1024}
+    results['vocab_file_kb'] = os.path.getsize(vocab_path) / 1024
+    results['pickle_file_kb'] = os.path.getsize(pickle_path) / 1024
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in ('convert', 'verify', 'bench'):
+        print(__doc__)
+        sys.exit(1)
+
+    command, pkl_path, out_path = sys.argv[1:]
+    if command == 'convert':
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        tok = load_tokenizer(pkl_path, out_path)
+        print(f"✅ {len(tok)} kata dibekukan ke {out_path} (terverifikasi id-per-id)")
+    elif command == 'verify':
+        with open(pkl_path, 'rb') as handle:
+            original = pickle.load(handle)
+        problems = verify(original, FrozenTokenizer.load(out_path))
+        print("✅ Kompatibel" if not problems else f"❌ {len(problems)} perbedaan: {problems[:10]}")
+        sys.exit(1 if problems else 0)
+    else:
+        print(json.dumps(bench(pkl_path, out_path), indent=2))
@@ -0,0 +1,298 @@
+"""
+Cache OCR lintas video: perceptual hash frame -> teks OCR.
+
+Banner dan end-card judi yang sama dipakai ulang di ratusan video/channel. Sebelum
+EasyOCR/Tesseract dijalankan, frame (hasil preprocess_frame) atau gambar upload di-hash
+dengan pHash 64-bit (DCT 32x32 -> 8x8 frekuensi rendah), lalu dicari di cache dengan
+jarak Hamming <= FRAME_CACHE_MAX_DISTANCE, jadi frame yang hampir identik (counter,
+noise kompresi) ikut kena hit.
+
+pHash saja tidak cukup untuk teks: dua banner dengan layout sama tapi kata berbeda
+bisa punya pHash identik. Karena itu tiap entri juga menyimpan thumbnail biner 64x36
+(288 byte); kandidat hanya lolos jika proporsi piksel thumbnail yang berbeda
+<= FRAME_CACHE_MAX_DIFF. Thumbnail 64x36 pun masih terlalu kasar untuk teks kecil
+("Promo kopi murah" vs "Promo slot murah" bisa berbeda < 0.5%), jadi hit terakhir
+diverifikasi dengan mask teks biner 320x180 (zlib, umumnya < 2 KB per entri): di
+jendela 16x16 piksel mana pun, proporsi piksel yang berbeda harus
+<= FRAME_CACHE_MAX_LOCAL_DIFF. Noise kompresi tersebar tipis di seluruh frame (< 7%
+per jendela), sedangkan satu kata yang diganti mengubah banyak piksel di satu tempat
+(> 9%), jadi frame dengan teks berbeda (termasuk counter yang berubah) selalu miss.
+
+Lookup memakai multi-index hashing: hash dipecah menjadi FRAME_CACHE_MAX_DISTANCE + 1
+potongan bit; dua hash yang berjarak <= r pasti sama persis di minimal satu potongan
+(pigeonhole), jadi cukup ambil kandidat yang cocok di salah satu kolom potongan
+(ter-index) lalu hitung jarak sebenarnya dan cek thumbnail/mask. Tidak ada scan seluruh tabel.
+
+Penyimpanan SQLite (FRAME_CACHE_PATH, mode WAL) supaya persisten antar restart dan
+dipakai bersama semua worker gunicorn / proses bulk_scan. Eviction LRU: last_used
+diperbarui setiap hit, dan jika jumlah entri melewati FRAME_CACHE_MAX_ENTRIES entri
+terlama dihapus. Error SQLite tidak pernah menggagalkan deteksi (dianggap miss).
+
+Hit/miss dicatat di metrik risetjudi_cache_requests_total{cache="frame_ocr"|"image_ocr"}.
+FRAME_CACHE=0 mematikan cache.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from metrics import CACHE_REQUESTS, stage
+
+FRAME_CACHE = os.environ.get('FRAME_CACHE', '1') != '0'
+FRAME_CACHE_PATH = os.environ.get('FRAME_CACHE_PATH', 'frame_ocr_cache.sqlite3')
+FRAME_CACHE_MAX_ENTRIES = int(os.environ.get('FRAME_CACHE_MAX_ENTRIES', '100000'))
+FRAME_CACHE_MAX_DISTANCE = int(os.environ.get('FRAME_CACHE_MAX_DISTANCE', '4'))
+FRAME_CACHE_MAX_DIFF = float(os.environ.get('FRAME_CACHE_MAX_DIFF', '0.005'))
+FRAME_CACHE_MAX_LOCAL_DIFF = float(os.environ.get('FRAME_CACHE_MAX_LOCAL_DIFF', '0.08'))
+
+HASH_BITS = 64
+THUMB_SIZE = (64, 36)
+MASK_SIZE = (320, 180)
+MASK_WINDOW = 16
+# Eviction dicek setiap sejumlah insert (bukan tiap insert) supaya COUNT(*) tidak di jalur panas
+_EVICT_EVERY = 256
+
+
+# ====== Perceptual Hash ======
+def _gray(image):
+    import cv2
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def phash(image):
+    """pHash 64-bit (int tanpa tanda) dari frame grayscale/BGR."""
+    import cv2
+    small = cv2.resize(_gray(image), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # Median tanpa koefisien DC supaya kecerahan rata-rata tidak mendominasi
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def thumbnail(image):
+    """Thumbnail biner 64x36 (Otsu) sebagai bytes, untuk verifikasi kandidat pHash."""
+    import cv2
+    small = cv2.resize(_gray(image), THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return np.packbits(binary).tobytes()
+
+
+def thumbnail_diff(a, b):
+    """Proporsi piksel yang berbeda antara dua thumbnail."""
+    xor = np.bitwise_xor(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8))
+    return int(np.unpackbits(xor).sum()) / (THUMB_SIZE[0] * THUMB_SIZE[1])
+
+
+def text_mask(image):
+    """Mask biner 320x180 (Otsu, zlib) untuk verifikasi akhir: cukup tajam untuk beda satu kata."""
+    import cv2
+    small = cv2.resize(_gray(image), MASK_SIZE, interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return zlib.compress(np.packbits(binary).tobytes())
+
+
+def local_diff(a, b):
+    """Proporsi piksel berbeda terbesar di jendela MASK_WINDOW x MASK_WINDOW mana pun."""
+    import cv2
+    width, height = MASK_SIZE
+    xor = np.bitwise_xor(np.frombuffer(zlib.decompress(a), dtype=np.uint8),
+                         np.frombuffer(zlib.decompress(b), dtype=np.uint8))
+    changed = np.unpackbits(xor)[:width * height].reshape(height, width).astype(np.float32)
+    window = cv2.boxFilter(changed, -1, (MASK_WINDOW, MASK_WINDOW), normalize=False,
+                           borderType=cv2.BORDER_CONSTANT)
+    return float(window.max()) / (MASK_WINDOW * MASK_WINDOW)
+
+
+def signature(image):
+    """(pHash, thumbnail, mask teks) satu frame."""
+    return phash(image), thumbnail(image), text_mask(image)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _chunk_bounds(parts):
+    """Batas bit tiap potongan (sebisa mungkin sama panjang)."""
+    bounds = []
+    start = 0
+    for i in range(parts):
+        size = HASH_BITS // parts + (1 if i < HASH_BITS % parts else 0)
+        bounds.append((start, size))
+        start += size
+    return bounds
+
+
+def _signed(value):
+    # SQLite INTEGER adalah 64-bit bertanda
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+# ====== Cache ======
+class FrameOCRCache:
+    """Cache pHash -> list teks OCR dengan lookup Hamming multi-index di SQLite."""
+
+    def __init__(self, path=FRAME_CACHE_PATH, max_entries=FRAME_CACHE_MAX_ENTRIES,
+                 max_distance=FRAME_CACHE_MAX_DISTANCE, max_diff=FRAME_CACHE_MAX_DIFF,
+                 max_local_diff=FRAME_CACHE_MAX_LOCAL_DIFF):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_diff = max_diff
+        self.max_local_diff = max_local_diff
+        self.bounds = _chunk_bounds(max_distance + 1)
+        self._local = threading.local()
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        layout = json.dumps({'chunks': self.bounds, 'thumbnail': THUMB_SIZE, 'mask': MASK_SIZE})
+        row = conn.execute("SELECT value FROM meta WHERE key = 'chunks'").fetchone()
+        if row is not None and row[0] != layout:
+            # FRAME_CACHE_MAX_DISTANCE / ukuran thumbnail / mask berubah -> kolom tidak cocok, cache dibuang
+            conn.execute('DROP TABLE IF EXISTS frame_ocr')
+        chunk_columns = ''.join(f', c{i} INTEGER NOT NULL' for i in range(len(self.bounds)))
+        conn.execute(f'CREATE TABLE IF NOT EXISTS frame_ocr (kind TEXT NOT NULL, hash INTEGER NOT NULL'
+                     f'{chunk_columns}, thumbnail BLOB NOT NULL, mask BLOB NOT NULL, texts TEXT NOT NULL, last_used REAL NOT NULL, '
+                     f'hits INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (kind, hash, thumbnail))')
+        for i in range(len(self.bounds)):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS frame_ocr_c{i} ON frame_ocr (kind, c{i})')
+        conn.execute('CREATE INDEX IF NOT EXISTS frame_ocr_last_used ON frame_ocr (last_used)')
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('chunks', ?)", (layout,))
+
+    def _chunks(self, value):
+        return [(value >> (HASH_BITS - start - size)) & ((1 << size) - 1) for start, size in self.bounds]
+
+    def get(self, kind, value, thumb, mask):
+        """
+        List teks untuk frame termirip (pHash <= max_distance, thumbnail <= max_diff,
+        mask <= max_local_diff per jendela), None jika miss.
+        """
+        conn = self._connection()
+        # Satu SELECT per kolom potongan (masing-masing memakai index-nya sendiri)
+        query = ' UNION '.join(f'SELECT hash, thumbnail, mask, texts FROM frame_ocr WHERE kind = ? AND c{i} = ?'
+                               for i in range(len(self.bounds)))
+        params = []
+        for chunk in self._chunks(value):
+            params += [kind, chunk]
+        best = None
+        for stored, stored_thumb, stored_mask, texts in conn.execute(query, params):
+            if hamming(stored & ((1 << 64) - 1), value) > self.max_distance:
+                continue
+            diff = thumbnail_diff(stored_thumb, thumb)
+            if diff > self.max_diff or (best is not None and diff >= best[0]):
+                continue
+            # Mask hanya di-decompress untuk kandidat yang sudah lolos pHash dan thumbnail
+            if local_diff(stored_mask, mask) <= self.max_local_diff:
+                best = (diff, stored, stored_thumb, texts)
+        if best is None:
+            return None
+        conn.execute('UPDATE frame_ocr SET last_used = ?, hits = hits + 1 '
+                     'WHERE kind = ? AND hash = ? AND thumbnail = ?', (time.time(), kind, best[1], best[2]))
+        return json.loads(best[3])
+
+    def put(self, kind, value, thumb, mask, texts):
+        conn = self._connection()
+        columns = ''.join(f', c{i}' for i in range(len(self.bounds)))
+        placeholders = ', ?' * len(self.bounds)
+        conn.execute(f'INSERT OR REPLACE INTO frame_ocr (kind, hash{columns}, thumbnail, mask, texts, last_used) '
+                     f'VALUES (?, ?{placeholders}, ?, ?, ?, ?)',
+                     [kind, _signed(value)] + self._chunks(value) + [thumb, mask, json.dumps(texts), time.time()])
+        with self._lock:
+            self._inserts += 1
+            evict = self._inserts % _EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Hapus entri yang paling lama tidak dipakai sampai jumlah entri <= max_entries."""
+        conn = self._connection()
+        count = conn.execute('SELECT COUNT(*) FROM frame_ocr').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute('DELETE FROM frame_ocr WHERE rowid IN '
+                         '(SELECT rowid FROM frame_ocr ORDER BY last_used LIMIT ?)', (count - self.max_entries,))
+
+    def stats(self):
+        conn = self._connection()
+        entries, hits = conn.execute('SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM frame_ocr').fetchone()
+        return {'entries': entries, 'stored_hits': hits, 'max_entries': self.max_entries,
+                'max_distance': self.max_distance, 'max_diff': self.max_diff,
+                'max_local_diff': self.max_local_diff}
+
+
+_cache = None
+_cache_failed = False
+
+
+def get_cache():
+    """Cache bersama proses ini (None jika dimatikan atau SQLite tidak bisa dibuka)."""
+    global _cache, _cache_failed
+    if _cache is None and FRAME_CACHE and not _cache_failed:
+        try:
+            _cache = FrameOCRCache()
+        except sqlite3.Error as e:
+            print(f"⚠️ Frame OCR cache tidak aktif: {e}")
+            _cache_failed = True
+    return _cache
+
+
+def cached_ocr(kind, image, ocr):
+    """
+    Return (hasil, hit). `ocr()` hanya dipanggil jika tidak ada frame mirip di cache;
+    hasilnya (list teks) disimpan. Tanpa cache, selalu memanggil `ocr()`.
+    """
+    cache = get_cache()
+    if cache is None:
+        return ocr(), False
+    try:
+        with stage('ocr_cache_lookup'):
+            value, thumb, mask = signature(image)
+            texts = cache.get(kind, value, thumb, mask)
+    except sqlite3.Error as e:
+        print(f"Frame OCR cache error: {e}")
+        return ocr(), False
+    CACHE_REQUESTS.inc(cache=f'{kind}_ocr', result='hit' if texts is not None else 'miss')
+    if texts is not None:
+        return texts, True
+    texts = ocr()
+    try:
+        cache.put(kind, value, thumb, mask, texts)
+    except sqlite3.Error as e:
+        print(f"Frame OCR cache error: {e}")
+    return texts, False
+
+
+class HitCounter:
+    """Hit rate cache untuk satu request (dilaporkan di respons)."""
+
+    def __init__(self):
+        self.lookups = 0
+        self.hits = 0
+
+    def add(self, hit):
+        self.lookups += 1
+        self.hits += int(hit)
+
+    def as_dict(self):
+        return {
+            'enabled': get_cache() is not None,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+        }
@@ -0,0 +1,133 @@
+"""
+Sampler frame video untuk OCR (dipakai detect_video dan detect_youtube).
+
+Dua backend decode, dipilih lewat env VIDEO_DECODER:
+    opencv (default)  cv2.VideoCapture.read() berurutan, ambil tiap `frame_interval`
+                      frame dari `max_frames` frame pertama (perilaku lama).
+    pyav              PyAV/FFmpeg dengan thread decoder aktif. Mode `keyframes` hanya
+                      men-decode I-frame (skip_frame=NONKEY), mode `rate` men-decode
+                      semua frame tapi hanya mengonversi frame tiap 1/PYAV_SAMPLE_FPS
+                      detik. Frame dikonversi langsung ke resolusi kecil (maks
+                      DECODE_MAX_WIDTH) oleh swscale, bukan di-resize setelahnya.
+
+Jumlah frame yang di-OCR sama untuk kedua backend (ceil(max_frames / frame_interval)),
+bedanya backend pyav menyebar sampel sepanjang video tanpa men-decode P/B-frame penuh.
+Jika PyAV tidak ter-install, otomatis kembali ke opencv.
+
+Benchmark decode fps: python benchmark.py --only video_decode_opencv,video_decode_pyav,video_decode_pyav_rate
+"""
+import os
+
+from metrics import stage
+
+VIDEO_DECODER = os.environ.get('VIDEO_DECODER', 'opencv')  # opencv | pyav
+PYAV_MODE = os.environ.get('PYAV_MODE', 'keyframes')  # keyframes | rate
+PYAV_SAMPLE_FPS = float(os.environ.get('PYAV_SAMPLE_FPS', '1'))
+DECODE_MAX_WIDTH = int(os.environ.get('DECODE_MAX_WIDTH', '1200'))
+DECODE_THREADS = int(os.environ.get('DECODE_THREADS', '0'))  # 0 = otomatis (FFmpeg)
+
+
+def pyav_available():
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def active_decoder():
+    """Nama backend yang benar-benar dipakai (pyav hanya jika ter-install)."""
+    return 'pyav' if VIDEO_DECODER == 'pyav' and pyav_available() else 'opencv'
+
+
+def video_info(video_path):
+    """(jumlah frame, fps) dari header video, tanpa men-decode frame."""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+
+
+def sample_frames(video_path, max_frames, frame_interval, decoder=None, mode=None, sample_fps=None, stats=None):
+    """
+    Generator (nomor_frame, frame BGR) yang perlu di-OCR.
+
+    `decoder`, `mode` dan `sample_fps` default ke konfigurasi env di atas. Jika `stats`
+    (dict) diberikan, stats['frames_read'] diisi jumlah frame yang dibaca dari video
+    (termasuk yang tidak di-OCR), yaitu arti lama `frames_processed`.
+    """
+    decoder = decoder or VIDEO_DECODER
+    stats = stats if stats is not None else {}
+    stats['frames_read'] = 0
+    if decoder == 'pyav':
+        if pyav_available():
+            max_samples = -(-max_frames // frame_interval)
+            return _sample_pyav(video_path, max_samples, mode or PYAV_MODE, sample_fps or PYAV_SAMPLE_FPS, stats)
+        print("⚠️ PyAV tidak ter-install, kembali ke decoder opencv.")
+    return _sample_opencv(video_path, max_frames, frame_interval, stats)
+
+
+def _sample_opencv(video_path, max_frames, frame_interval, stats):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    frame_count = 0
+    try:
+        while cap.isOpened() and frame_count < max_frames:
+            with stage('frame_decode', engine='opencv'):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_count % frame_interval == 0:
+                yield frame_count, frame
+            frame_count += 1
+            stats['frames_read'] = frame_count
+    finally:
+        cap.release()
+
+
+def _next_frame(frames, not_before):
+    """Frame decode berikutnya dengan timestamp >= not_before (frame di antaranya tidak dikonversi)."""
+    for frame in frames:
+        if frame.time is None or frame.time + 1e-6 >= not_before:
+            return frame
+    return None
+
+
+def _to_bgr(frame, max_width):
+    width, height = frame.width, frame.height
+    if width > max_width:
+        height = max(2, int(height * max_width / width) // 2 * 2)
+        width = max_width
+    return frame.to_ndarray(format='bgr24', width=width, height=height)
+
+
+def _sample_pyav(video_path, max_samples, mode, sample_fps, stats):
+    import av
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        if DECODE_THREADS:
+            stream.codec_context.thread_count = DECODE_THREADS
+        if mode == 'keyframes':
+            stream.codec_context.skip_frame = 'NONKEY'
+        fps = float(stream.average_rate or 0) or 25.0
+        step = 1.0 / sample_fps if sample_fps > 0 else 0.0
+
+        frames = container.decode(stream)
+        next_time = 0.0
+        samples = 0
+        while samples < max_samples:
+            with stage('frame_decode', engine='pyav'):
+                frame = _next_frame(frames, next_time)
+                image = _to_bgr(frame, DECODE_MAX_WIDTH) if frame is not None else None
+            if frame is None:
+                break
+            timestamp = frame.time or 0.0
+            next_time = timestamp + step
+            samples += 1
+            frame_number = int(round(timestamp * fps))
+            # Posisi frame terakhir yang dicapai decoder (frame yang di-skip tetap terlewati)
+            stats['frames_read'] = frame_number + 1
+            yield frame_number, image
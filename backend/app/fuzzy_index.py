@@ -0,0 +1,132 @@
+"""
+Indeks fuzzy kosakata judi untuk token hasil OCR (SymSpell symmetric delete).
+
+Setiap istilah kosakata dilipat dulu (fold): digit/simbol leet dipetakan ke huruf
+yang mirip (0->o, 1->i, 3->e, 4->a, 5->s, 8->b, 9->g, @->a, $->s, ...) dan 'l' disamakan
+dengan 'i'. Substitusi leet/digit jadi berbiaya 0: '5l0t', 's1ot' dan 'sl0t' semuanya
+jatuh ke kunci yang sama dengan 'slot', dan '1xbet' / 'ixbet' ke '1xbet'.
+
+Sisa kerusakan OCR (huruf salah baca, huruf hilang/tambahan) ditangani dengan
+symmetric delete: semua varian kunci dengan <= MAX_DISTANCE huruf dihapus
+di-precompute sekali, jadi lookup token cukup membangkitkan varian delete token itu
+sendiri dan mencocokkannya di dict (hampir konstan per token, tidak bergantung ukuran
+kosakata). Kandidat diverifikasi dengan jarak Damerau-Levenshtein (OSA) sebenarnya.
+
+Batas jarak bergantung panjang token: < 5 huruf hanya cocok lewat fold, 5-7 huruf
+jarak 1 ('jonus' -> bonus, 'depasit' -> deposit), >= 8 huruf jarak 2. Kata biasa yang
+kebetulan berjarak 1 dari keyword ('angkat' -> angka, 'polar' -> pola, 'casing' ->
+casino) dilindungi `is_known_word` (kamus, vocabulary tokenizer, daftar
+fuzzy_known_words di ruleset): kata yang dikenal tidak pernah dikoreksi secara fuzzy.
+
+Salah baca OCR yang terlalu jauh dari istilah mana pun ('rpee8' -> rp888, 'ekeo' ->
+depo) didaftarkan sebagai `corrections` (alias -> istilah); alias hanya cocok lewat
+fold, tanpa jarak edit.
+"""
+from functools import lru_cache
+
+MAX_DISTANCE = 2
+
+_FOLD = str.maketrans({
+    '0': 'o', '1': 'i', 'l': 'i', '!': 'i', '|': 'i', '2': 'z', '3': 'e', '4': 'a', '@': 'a',
+    '5': 's', '$': 's', '6': 'b', '7': 't', '8': 'b', '9': 'g',
+})
+
+
+def fold(token):
+    """Kunci token setelah substitusi leet/digit (biaya 0)."""
+    return token.lower().translate(_FOLD)
+
+
+def allowed_distance(token):
+    """Jarak edit maksimum untuk token (sebelum fold)."""
+    if len(token) < 5:
+        return 0
+    if len(token) < 8:
+        return 1
+    return MAX_DISTANCE
+
+
+def _deletes(word, distance):
+    """Semua string hasil menghapus 1..distance huruf dari word."""
+    result = set()
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - result
+        result |= frontier
+    return result
+
+
+def osa_distance(a, b, limit):
+    """Jarak Damerau-Levenshtein (optimal string alignment); > limit jika melebihi batas."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """
+    Indeks kosakata -> istilah kanonik. Istilah multi-kata ('situs slot') diindeks dalam
+    bentuk tanpa spasi, karena OCR sering menempelkan kata pada banner. `corrections`
+    (alias -> istilah) hanya cocok persis setelah fold.
+    """
+
+    def __init__(self, terms, is_known_word=None, max_distance=MAX_DISTANCE, corrections=None):
+        self.max_distance = max_distance
+        self.is_known_word = is_known_word or (lambda token: False)
+        self._exact = {}
+        self._deletes = {}
+        for term in terms:
+            key = fold(term.replace(' ', ''))
+            if key in self._exact:
+                continue
+            self._exact[key] = term
+            for variant in _deletes(key, max_distance):
+                self._deletes.setdefault(variant, []).append(key)
+        # Alias tidak masuk tabel delete, jadi tidak pernah menjadi kandidat fuzzy
+        self._aliases = {fold(alias): term for alias, term in (corrections or {}).items()}
+        self.correct = lru_cache(maxsize=65536)(self._correct)
+
+    def lookup(self, token):
+        """(istilah, jarak) untuk token, atau None jika tidak ada yang cukup dekat."""
+        key = fold(token)
+        term = self._exact.get(key)
+        if term is None:
+            term = self._aliases.get(key)
+        if term is not None:
+            return term, 0
+        limit = min(allowed_distance(token), self.max_distance)
+        if not limit or self.is_known_word(token):
+            return None
+        candidates = set(self._deletes.get(key, ()))
+        for variant in _deletes(key, limit):
+            if variant in self._exact:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        best = None
+        for candidate in candidates:
+            distance = osa_distance(key, candidate, limit)
+            if distance > limit:
+                continue
+            rank = (distance, abs(len(candidate) - len(key)))
+            if best is None or rank < best[0]:
+                best = (rank, candidate)
+        return (self._exact[best[1]], best[0][0]) if best else None
+
+    def _correct(self, token):
+        """Istilah kanonik jika token cocok, selain itu token apa adanya."""
+        if token.isdigit():
+            return token
+        match = self.lookup(token)
+        return match[0] if match else token
@@ -0,0 +1,170 @@
+"""
+Konfigurasi serving production (multi-proses) untuk app.py.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Bagian yang aman di-fork (tokenizer .vocab memory-mapped, ruleset + indeks fuzzy,
+tier-0 NumPy) di-load SEKALI di proses master (preload_app), lalu N worker di-fork dan
+berbagi halaman memori itu secara copy-on-write. Sebelum fork, semua objek dipindah ke
+generasi permanen GC (gc.freeze) supaya garbage collector di worker tidak menulis ulang
+halaman milik master.
+
+Model RNN (TensorFlow) dan EasyOCR reader (torch) TIDAK di-load di master: keduanya
+membuat thread pool native saat load, dan fork dari proses yang punya thread seperti itu
+bisa membuat worker hang di inferensi pertama. Dengan preload, DEFER_MODEL_LOAD=1 dan
+model di-load per worker di post_fork (app.load_models). Bobot EasyOCR tidak lagi
+dibagi antar worker; pakai OCR_SERVICE=1 supaya cukup satu reader untuk semua worker.
+
+Stream SSE hanya dikenal worker yang menjalankannya: dengan >1 worker, batalkan stream
+dengan menutup koneksi, bukan DELETE /api/streams/<id> (lihat streaming.py).
+
+Worker di-recycle setelah MAX_REQUESTS request atau jika RSS-nya melewati MAX_RSS_MB.
+Cek /readyz di tiap worker untuk melihat rss/pss/uss: uss adalah memori unik worker.
+
+Env yang bisa diatur:
+    PORT, WEB_CONCURRENCY (jumlah worker), GUNICORN_THREADS, MAX_REQUESTS,
+    MAX_REQUESTS_JITTER, MAX_RSS_MB, GUNICORN_TIMEOUT, PRELOAD (0 = load per worker),
+    OCR_SERVICE (1 = jalankan ocr_service.py sebagai proses terpisah; semua worker
+    memakai satu EasyOCR reader lewat OCR_SERVICE_SOCKET, lihat ocr_service.py),
+    URL_SERVICE (1 = jalankan url_service.py, jalur async untuk detect-url / detect-web /
+    fetch-webpage di URL_SERVICE_PORT; reverse proxy meneruskan path itu ke sana),
+    METRICS_DIR (direktori snapshot metrik per proses; default direktori sementara baru per
+    start, jadi /metrics di worker mana pun berisi total semua worker, lihat metrics.py)
+"""
+import gc
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+# Metrik dijumlahkan lintas worker lewat snapshot di METRICS_DIR; harus di-set sebelum import app
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='risetjudi-metrics-'))
+
+# Batasi thread pool native (TF / torch / OpenMP) per proses; harus di-set sebelum import app
+for _var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+             'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+    os.environ.setdefault(_var, os.environ.get('NATIVE_THREADS', '2'))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, multiprocessing.cpu_count() // 2)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+preload_app = os.environ.get('PRELOAD', '1') != '0'
+if preload_app:
+    # Harus di-set sebelum import app: TF/EasyOCR di-load di post_fork, bukan di master
+    os.environ.setdefault('DEFER_MODEL_LOAD', '1')
+
+# Video/YouTube bisa memakan beberapa menit per request
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '600'))
+graceful_timeout = 60
+keepalive = 5
+
+# Recycle worker setelah sejumlah request (jitter supaya tidak restart bersamaan)
+max_requests = int(os.environ.get('MAX_REQUESTS', '500'))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', '50'))
+MAX_RSS_MB = float(os.environ.get('MAX_RSS_MB', '0'))  # 0 = tanpa batas RSS
+
+# Service OCR bersama harus diketahui SEBELUM app di-import (preload), supaya
+# detector.get_reader() membuat client, bukan easyocr.Reader
+OCR_SERVICE = os.environ.get('OCR_SERVICE', '0') != '0'
+if OCR_SERVICE:
+    os.environ.setdefault('OCR_SERVICE_SOCKET', '/tmp/risetjudi-ocr.sock')
+_ocr_service_process = None
+URL_SERVICE = os.environ.get('URL_SERVICE', '0') != '0'
+_url_service_process = None
+
+accesslog = '-'
+errorlog = '-'
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+def on_starting(server):
+    global _ocr_service_process, _url_service_process
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    import metrics
+    metrics.clear_dir()
+    if URL_SERVICE:
+        from url_service import URL_SERVICE_HOST, URL_SERVICE_PORT, wait_until_ready as wait_url_service
+        # URL service punya /metrics sendiri (satu proses), tidak ikut dijumlahkan ke worker
+        env = {k: v for k, v in os.environ.items() if k != 'METRICS_DIR'}
+        _url_service_process = subprocess.Popen([sys.executable, os.path.join(app_dir, 'url_service.py')],
+                                                cwd=app_dir, env=env)
+        wait_url_service(f'http://{URL_SERVICE_HOST}:{URL_SERVICE_PORT}')
+        server.log.info("URL service siap di %s:%s (pid %s)", URL_SERVICE_HOST, URL_SERVICE_PORT,
+                        _url_service_process.pid)
+    if not OCR_SERVICE:
+        return
+    from ocr_service import wait_until_ready
+    socket_path = os.environ['OCR_SERVICE_SOCKET']
+    _ocr_service_process = subprocess.Popen([sys.executable, os.path.join(app_dir, 'ocr_service.py'),
+                                             '--socket', socket_path], cwd=app_dir)
+    wait_until_ready(socket_path)
+    server.log.info("OCR service siap di %s (pid %s)", socket_path, _ocr_service_process.pid)
+
+
+def on_exit(server):
+    for process in (_ocr_service_process, _url_service_process):
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def when_ready(server):
+    server.log.info("Master siap (preload_app=%s, workers=%s, threads=%s)", preload_app, workers, threads)
+
+
+def pre_fork(server, worker):
+    # Metrik hasil preload di master (worker mulai dari nol setelah fork)
+    if preload_app:
+        import metrics
+        metrics.flush()
+    # Semua objek hasil preload dibekukan supaya GC di worker tidak menyentuh halamannya
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s di-fork (RSS awal %.0f MB)", worker.pid, _rss_mb())
+    import metrics
+    metrics.start_flusher()
+    if preload_app:
+        # Thread watcher ruleset tidak ikut ter-fork dari master; mulai per worker
+        import ruleset
+        ruleset.start_watcher()
+        import app
+        if app.DEFER_MODEL_LOAD:
+            app.load_models()
+            server.log.info("Worker %s: model dan OCR reader di-load (RSS %.0f MB)", worker.pid, _rss_mb())
+
+
+def post_request(worker, req, environ, resp):
+    # Recycle worker yang RSS-nya membengkak; request yang sedang berjalan tetap diselesaikan
+    if MAX_RSS_MB and worker.alive:
+        rss = _rss_mb()
+        if rss > MAX_RSS_MB:
+            worker.log.warning("Worker %s RSS %.0f MB > %.0f MB, recycle", worker.pid, rss, MAX_RSS_MB)
+            worker.alive = False
+
+
+def worker_exit(server, worker):
+    # Snapshot terakhir worker sebelum keluar (flush periodik bisa tertinggal)
+    import metrics
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    # Counter worker yang keluar dipindah ke dead.json; error di sini tidak boleh menjatuhkan master
+    import metrics
+    try:
+        metrics.mark_process_dead(worker.pid)
+    except Exception as e:
+        server.log.warning("Gagal memindahkan metrik worker %s: %s", worker.pid, e)
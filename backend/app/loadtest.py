@@ -0,0 +1,431 @@
+"""
+Harness load-test end-to-end untuk endpoint deteksi (berjalan offline di satu mesin).
+
+- Membuat data sintetis: teks, gambar banner judi (PNG) dan video MP4 pendek.
+- Menjalankan mock web server lokal untuk target /api/detect-url, dan mock server
+  media (MockMediaServer) pengganti YouTube untuk youtube_ingest.py.
+- Menjalankan server Flask sendiri (--spawn) atau memakai server yang sudah jalan (--target).
+- Mengirim traffic campuran secara konkuren, lalu melaporkan throughput,
+  latensi p50/p95/p99, error rate, porsi 429 (admission control) per endpoint dan RSS server dari waktu ke waktu.
+
+Pemakaian:
+    python loadtest.py --spawn --concurrency 8 --duration 60 --mix text=6,url=2,image=2,video=1
+    python loadtest.py --target http://127.0.0.1:5000 --server-pid 1234 --requests 500
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from benchmark import make_corpus, make_frames, make_html_pages
+
+ENDPOINTS = {
+    'text': '/api/detect-text',
+    'url': '/api/detect-url',
+    'image': '/api/detect-image',
+    'video': '/api/detect-video',
+}
+
+
+# ====== Data Sintetis ======
+def make_images(count, seed):
+    import cv2
+    images = []
+    for frame in make_frames(count, seed, width=1080, height=1080):
+        ok, buf = cv2.imencode('.png', frame)
+        if ok:
+            images.append(buf.tobytes())
+    return images
+
+
+def make_videos(count, seed, seconds=3, fps=10, workdir=None):
+    """Video MP4 pendek berisi banner judi, return list bytes."""
+    import cv2
+    workdir = workdir or tempfile.gettempdir()
+    videos = []
+    for i in range(count):
+        frames = make_frames(4, seed + i, width=640, height=360)
+        path = os.path.join(workdir, f'loadtest_{os.getpid()}_{i}.mp4')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (640, 360))
+        for t in range(seconds * fps):
+            writer.write(frames[(t // fps) % len(frames)])
+        writer.release()
+        with open(path, 'rb') as f:
+            videos.append(f.read())
+        os.remove(path)
+    return videos
+
+
+# ====== Mock Web Server untuk /api/detect-url ======
+class MockSite:
+    """Server HTTP lokal yang menyajikan halaman sintetis di /page/<n>, dengan delay opsional."""
+
+    def __init__(self, pages, delay=0.0, host='127.0.0.1', port=0):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    index = int(self.path.rstrip('/').rsplit('/', 1)[-1])
+                    body = site.pages[index % len(site.pages)].encode('utf-8')
+                except ValueError:
+                    self.send_error(404)
+                    return
+                if site.delay:
+                    time.sleep(site.delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.pages = pages
+        self.delay = delay
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MockMediaServer:
+    """
+    Server file statis lokal (pengganti server media YouTube) dengan dukungan Range/HEAD.
+    `files` = {path: (bytes, content_type)}. `bytes_sent` mencatat total byte yang diunduh klien.
+    """
+
+    def __init__(self, files, host='127.0.0.1', port=0):
+        media = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self, send_body):
+                entry = media.files.get(self.path.split('?', 1)[0])
+                if entry is None:
+                    self.send_error(404)
+                    return
+                body, content_type = entry
+                start, end = 0, len(body) - 1
+                range_header = self.headers.get('Range', '')
+                if range_header.startswith('bytes='):
+                    first, _, last = range_header[6:].split(',')[0].partition('-')
+                    start = int(first) if first else max(0, len(body) - int(last))
+                    end = min(int(last), end) if first and last else end
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(end - start + 1))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+                if send_body:
+                    try:
+                        self.wfile.write(body[start:end + 1])
+                    except (BrokenPipeError, ConnectionResetError):
+                        return  # klien (mis. probe yt-dlp) menutup koneksi lebih awal
+                    with media.lock:
+                        media.bytes_sent += end - start + 1
+
+            def do_GET(self):
+                self._serve(True)
+
+            def do_HEAD(self):
+                self._serve(False)
+
+            def log_message(self, *args):
+                pass
+
+        self.files = files
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    base_url = MockSite.base_url
+    start = MockSite.start
+    stop = MockSite.stop
+
+
+# ====== Monitor RSS ======
+def read_rss_mb(pid):
+    """RSS proses (termasuk child, misal worker) dari /proc, dalam MB."""
+    total_kb = 0
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return total_kb / 1024
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval, started_at):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.started_at = started_at
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append((round(time.monotonic() - self.started_at, 2), round(read_rss_mb(self.pid), 1)))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ====== Server Flask ======
+def spawn_server(port, cwd):
+    """Jalankan app.py tanpa reloader/debug di port tertentu, tunggu sampai siap."""
+    code = (
+        "import app as a; "
+        f"a.app.run(host='127.0.0.1', port={port}, debug=False, threaded=True, use_reloader=False)"
+    )
+    proc = subprocess.Popen([sys.executable, '-c', code], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 300  # load TF + EasyOCR bisa lama
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'Server berhenti saat startup (exit {proc.returncode})')
+        try:
+            requests.get(base + '/api/detect-text', timeout=1)
+            return proc, base
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError('Server tidak siap dalam 300 detik')
+
+
+# ====== Load Generator ======
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f'Endpoint tidak dikenal di --mix: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadGenerator:
+    def __init__(self, base_url, payloads, mix, timeout, seed):
+        self.base_url = base_url
+        self.payloads = payloads
+        self.names = [n for n in mix if payloads.get(n)]
+        self.weights = [mix[n] for n in self.names]
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.results = {name: [] for name in self.names}  # (latency_s, ok, status)
+        self.local = threading.local()
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _send(self, name, payload):
+        url = self.base_url + ENDPOINTS[name]
+        session = self._session()
+        if name in ('text', 'url'):
+            return session.post(url, json=payload, timeout=self.timeout)
+        field, filename, mime = ('image', 'banner.png', 'image/png') if name == 'image' else ('video', 'clip.mp4', 'video/mp4')
+        return session.post(url, files={field: (filename, payload, mime)}, timeout=self.timeout)
+
+    def one_request(self):
+        with self.lock:
+            name = self.rng.choices(self.names, self.weights)[0]
+            payload = self.rng.choice(self.payloads[name])
+        start = time.perf_counter()
+        try:
+            response = self._send(name, payload)
+            ok = response.status_code < 400
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            ok, status = False, type(e).__name__
+        latency = time.perf_counter() - start
+        with self.lock:
+            self.results[name].append((latency, ok, status))
+
+    def run(self, concurrency, duration=None, total=None):
+        deadline = time.monotonic() + duration if duration else None
+        counter = itertools.count()
+
+        def worker():
+            while True:
+                if deadline and time.monotonic() >= deadline:
+                    return
+                if total is not None and next(counter) >= total:
+                    return
+                self.one_request()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(worker)
+
+    def summary(self, elapsed):
+        report = {}
+        for name, rows in self.results.items():
+            # 429 dari admission control dihitung terpisah, bukan error/latensi layanan
+            rejected = [r for r in rows if r[2] == 429]
+            served = [r for r in rows if r[2] != 429]
+            latencies = sorted(r[0] for r in served)
+            errors = [r[2] for r in served if not r[1]]
+            report[name] = {
+                'requests': len(rows),
+                'rejected': len(rejected),
+                'rejected_rate': len(rejected) / len(rows) if rows else 0.0,
+                'errors': len(errors),
+                'error_rate': len(errors) / len(served) if served else 0.0,
+                'error_kinds': {str(k): errors.count(k) for k in set(errors)},
+                'throughput_rps': len(rows) / elapsed if elapsed else 0.0,
+                'p50_ms': _ms(percentile(latencies, 50)),
+                'p95_ms': _ms(percentile(latencies, 95)),
+                'p99_ms': _ms(percentile(latencies, 99)),
+                'max_ms': _ms(latencies[-1] if latencies else None),
+            }
+        return report
+
+
+def _ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def build_payloads(args, mock_site):
+    corpus = make_corpus(args.samples, 120, 0.4, args.seed)
+    payloads = {
+        'text': [{'text': t} for t in corpus],
+        'url': [{'url': f'{mock_site.base_url}/page/{i}'} for i in range(args.samples)],
+    }
+    try:
+        payloads['image'] = make_images(min(args.samples, 10), args.seed)
+        payloads['video'] = make_videos(min(args.samples, 3), args.seed, seconds=args.video_seconds)
+    except ImportError as e:
+        print(f"⚠️ OpenCV tidak tersedia, endpoint image/video dilewati: {e}", file=sys.stderr)
+    return payloads
+
+
+def print_table(report):
+    print(f"\n{'endpoint':8} {'req':>6} {'429%':>6} {'err%':>6} {'rps':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, r in report['endpoints'].items():
+        print(f"{name:8} {r['requests']:6d} {r['rejected_rate'] * 100:6.1f} {r['error_rate'] * 100:6.1f} {r['throughput_rps']:7.2f} "
+              f"{r['p50_ms'] or 0:9.1f} {r['p95_ms'] or 0:9.1f} {r['p99_ms'] or 0:9.1f}")
+    if report['rss_mb']:
+        peak = max(v for _, v in report['rss_mb'])
+        print(f"RSS server: awal {report['rss_mb'][0][1]:.0f} MB, puncak {peak:.0f} MB, "
+              f"akhir {report['rss_mb'][-1][1]:.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test endpoint deteksi judi')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--target', help='base URL server yang sudah berjalan')
+    target.add_argument('--spawn', action='store_true', help='jalankan app.py sendiri')
+    parser.add_argument('--port', type=int, default=5055, help='port untuk --spawn')
+    parser.add_argument('--server-pid', type=int, default=None, help='PID server untuk sampling RSS (--target)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=None, help='lama test dalam detik')
+    parser.add_argument('--requests', type=int, default=None, help='jumlah total request')
+    parser.add_argument('--mix', default='text=6,url=2,image=2,video=1')
+    parser.add_argument('--samples', type=int, default=50, help='jumlah payload sintetis per jenis')
+    parser.add_argument('--video-seconds', type=int, default=3)
+    parser.add_argument('--site-delay', type=float, default=0.0, help='delay mock web server (detik)')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--rss-interval', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=None, help='tulis laporan JSON ke file')
+    args = parser.parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = 30.0
+
+    mock_site = MockSite(make_html_pages(make_corpus(args.samples, 300, 0.5, args.seed)),
+                         delay=args.site_delay).start()
+    proc = None
+    try:
+        if args.spawn:
+            proc, base_url = spawn_server(args.port, os.path.dirname(os.path.abspath(__file__)))
+            server_pid = proc.pid
+        else:
+            base_url, server_pid = args.target.rstrip('/'), args.server_pid
+
+        payloads = build_payloads(args, mock_site)
+        generator = LoadGenerator(base_url, payloads, parse_mix(args.mix), args.timeout, args.seed)
+
+        started = time.monotonic()
+        sampler = RssSampler(server_pid, args.rss_interval, started) if server_pid else None
+        if sampler:
+            sampler.start()
+        generator.run(args.concurrency, duration=args.duration, total=args.requests)
+        elapsed = time.monotonic() - started
+        if sampler:
+            sampler.stop()
+
+        endpoints = generator.summary(elapsed)
+        total = sum(r['requests'] for r in endpoints.values())
+        report = {
+            'params': vars(args),
+            'elapsed_s': round(elapsed, 2),
+            'total_requests': total,
+            'throughput_rps': total / elapsed if elapsed else 0.0,
+            'endpoints': endpoints,
+            'rss_mb': sampler.samples if sampler else [],
+        }
+    finally:
+        mock_site.stop()
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print_table(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,437 @@
+"""
+Metrik ringan format Prometheus (text exposition 0.0.4) tanpa dependensi tambahan.
+
+Pemakaian di kode pipeline:
+    with stage('keyword_scan'):
+        ...
+    FRAMES_PROCESSED.inc(source='video')
+
+Overhead satu `stage()` hanya dua perf_counter + satu bisect (beberapa µs),
+jadi aman dipakai di jalur teks.
+
+Multi-proses (gunicorn, lihat gunicorn.conf.py): registry ada di memori tiap proses,
+jadi tanpa agregasi /metrics hanya berisi angka worker yang kebetulan menerima scrape.
+Jika METRICS_DIR di-set, tiap proses menulis snapshot metriknya ke METRICS_DIR/<pid>.json
+tiap METRICS_FLUSH_SECONDS (dan saat worker berhenti), lalu /metrics di worker mana pun
+menjumlahkan snapshot semua proses. Saat worker mati (child_exit), counter dan histogramnya
+dipindah ke METRICS_DIR/dead.json supaya total tidak turun saat worker di-recycle; gauge
+worker mati dibuang. Angka worker lain bisa tertinggal paling lama METRICS_FLUSH_SECONDS.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+import profiling
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+REGISTRY = []
+
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '1'))
+_DEAD_FILE = 'dead.json'
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self, children=None):
+        children = self._children if children is None else children
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, child in sorted(children.items()):
+            lines.extend(self._collect_child(key, child))
+        return lines
+
+    def snapshot(self):
+        """[[label values, state], ...] yang bisa di-JSON-kan (untuk METRICS_DIR)."""
+        return [[list(key), self._state(child)] for key, child in list(self._children.items())]
+
+    def merge_state(self, children, key, state):
+        child = children.get(key)
+        if child is None:
+            child = children[key] = self._new_child()
+        self._add_state(child, state)
+
+
+class _Value:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def reset(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def _state(self, child):
+        return child.value
+
+    def _add_state(self, child, state):
+        child.value += state
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+    def _collect_child(self, key, child):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}']
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.labels(**labels).dec(amount)
+
+    def set(self, value, **labels):
+        self.labels(**labels).set(value)
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.upper_bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def reset(self):
+        self.counts = [0] * (len(self.upper_bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def _state(self, child):
+        with child.lock:
+            return [list(child.counts), child.sum]
+
+    def _add_state(self, child, state):
+        counts, total = state
+        child.counts = [a + b for a, b in zip(child.counts, counts)]
+        child.sum += total
+
+    def _collect_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            cumulative += count
+            le = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+            lines.append(f'{self.name}_bucket{le} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+# ====== Metrik Pipeline ======
+STAGE_SECONDS = Histogram(
+    'risetjudi_stage_duration_seconds',
+    'Durasi tiap tahap pipeline deteksi (fetch, html_parse, keyword_scan, tokenize, model_inference, '
+    'image_decode, text_regions, frame_decode, frame_preprocess, ocr_cache_lookup, ocr, fuzzy_normalize, tier0, audio_extract, asr, ...).',
+    ('stage', 'engine'),
+)
+REQUEST_SECONDS = Histogram(
+    'risetjudi_request_duration_seconds', 'Durasi total request HTTP per endpoint.', ('endpoint',))
+IN_FLIGHT = Gauge('risetjudi_in_flight_requests', 'Jumlah request yang sedang diproses per endpoint.', ('endpoint',))
+CACHE_REQUESTS = Counter('risetjudi_cache_requests_total', 'Lookup cache per jenis cache dan hasil (hit/miss).',
+                         ('cache', 'result'))
+FRAMES_PROCESSED = Counter('risetjudi_frames_processed_total', 'Frame video (atau tile storyboard) yang di-OCR.',
+                           ('source',))
+OCR_CHARACTERS = Counter('risetjudi_ocr_characters_total', 'Jumlah karakter teks hasil OCR.', ('engine',))
+TIER0_DECISIONS = Counter('risetjudi_tier0_decisions_total',
+                          'Keputusan klasifier tier-0 per endpoint (benign, gambling, escalated ke RNN, uncertain).',
+                          ('endpoint', 'decision'))
+TIER0_SAVED_SECONDS = Counter('risetjudi_tier0_saved_seconds_total',
+                              'Estimasi waktu inferensi RNN yang dihemat tier-0 per endpoint.', ('endpoint',))
+ADMISSION_ACTIVE = Gauge('risetjudi_admission_active', 'Slot admission control yang sedang dipakai per pool.', ('pool',))
+ADMISSION_QUEUE_DEPTH = Gauge('risetjudi_admission_queue_depth', 'Request yang menunggu slot per pool.', ('pool',))
+ADMISSION_WAIT_SECONDS = Histogram('risetjudi_admission_wait_seconds', 'Waktu tunggu request di antrian admission.',
+                                   ('pool',))
+ADMISSION_REJECTED = Counter('risetjudi_admission_rejected_total', 'Request yang ditolak 429 oleh admission control.',
+                             ('pool', 'endpoint', 'reason'))
+BUDGET_TRUNCATIONS = Counter('risetjudi_budget_truncations_total',
+                             'Tahap pipeline media yang dipangkas/dilewati karena budget waktu request.', ('stage',))
+RULESET_RELOADS = Counter('risetjudi_ruleset_reloads_total', 'Percobaan reload ruleset per hasil (loaded/rejected).',
+                          ('result',))
+YOUTUBE_VERDICTS = Counter('risetjudi_youtube_verdicts_total',
+                           'Verdict detect_youtube per jalur yang menghasilkannya (metadata, captions, storyboard, full_video).',
+                           ('source',))
+
+
+_STAGE_CHILDREN = {}
+
+
+class stage:
+    """
+    Context manager pencatat durasi satu tahap pipeline ke STAGE_SECONDS.
+    Jika request sedang diprofil (profiling.current()), wall + CPU time juga dicatat ke sana.
+    """
+    __slots__ = ('_child', '_start', '_cpu_start', '_profile', 'name', 'engine')
+
+    def __init__(self, name, engine=''):
+        self.name = name
+        self.engine = engine
+        child = _STAGE_CHILDREN.get((name, engine))
+        if child is None:
+            child = _STAGE_CHILDREN[(name, engine)] = STAGE_SECONDS.labels(stage=name, engine=engine)
+        self._child = child
+
+    def __enter__(self):
+        self._profile = profiling.current()
+        if self._profile is not None:
+            self._cpu_start = time.thread_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._child.observe(elapsed)
+        if self._profile is not None:
+            self._profile.record(self.name, self.engine, elapsed, time.thread_time() - self._cpu_start)
+        return False
+
+
+def render():
+    """Seluruh metrik dalam format text Prometheus (dijumlahkan dari semua proses jika METRICS_DIR di-set)."""
+    lines = []
+    if not METRICS_DIR:
+        for metric in REGISTRY:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+    start_flusher()
+    snapshots = _read_snapshots(exclude_pid=os.getpid())
+    for metric in REGISTRY:
+        children = {}
+        for key, state in metric.snapshot():
+            metric.merge_state(children, tuple(key), state)
+        for snapshot in snapshots:
+            for key, state in snapshot.get(metric.name, ()):
+                metric.merge_state(children, tuple(key), state)
+        lines.extend(metric.collect(children))
+    return '\n'.join(lines) + '\n'
+
+
+# ====== Agregasi multi-proses (METRICS_DIR) ======
+_flusher = None
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f'{pid}.json')
+
+
+def _write_json(path, data):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_snapshots(exclude_pid=None):
+    snapshots = []
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        if exclude_pid is not None and path == _snapshot_path(exclude_pid):
+            continue
+        data = _read_json(path)
+        if data:
+            snapshots.append(data)
+    return snapshots
+
+
+def flush():
+    """Tulis snapshot metrik proses ini ke METRICS_DIR/<pid>.json."""
+    if not METRICS_DIR:
+        return
+    _write_json(_snapshot_path(os.getpid()), {metric.name: metric.snapshot() for metric in REGISTRY})
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            flush()
+        except OSError as e:
+            print(f"⚠️ Gagal menulis snapshot metrik ke {METRICS_DIR}: {e}")
+
+
+def start_flusher():
+    """Mulai thread flush snapshot (sekali per proses; dimulai ulang di proses hasil fork)."""
+    global _flusher
+    if not METRICS_DIR or (_flusher is not None and _flusher[0] == os.getpid() and _flusher[1].is_alive()):
+        return
+    thread = threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True)
+    _flusher = (os.getpid(), thread)
+    thread.start()
+
+
+def mark_process_dead(pid):
+    """
+    Dipanggil master saat worker `pid` keluar: counter/histogram-nya digabung ke dead.json
+    (total tidak turun), gauge-nya dibuang, lalu file snapshot worker dihapus.
+    """
+    if not METRICS_DIR:
+        return
+    path = _snapshot_path(pid)
+    snapshot = _read_json(path)
+    if snapshot:
+        dead_path = os.path.join(METRICS_DIR, _DEAD_FILE)
+        dead = _read_json(dead_path) or {}
+        for metric in REGISTRY:
+            if metric.kind == 'gauge' or metric.name not in snapshot:
+                continue
+            children = {}
+            for key, state in dead.get(metric.name, []) + snapshot[metric.name]:
+                metric.merge_state(children, tuple(key), state)
+            dead[metric.name] = [[list(key), metric._state(child)] for key, child in children.items()]
+        _write_json(dead_path, dead)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def clear_dir():
+    """Hapus snapshot lama di METRICS_DIR (dipanggil master saat start)."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        os.remove(path)
+
+
+def _reset_after_fork():
+    # Angka milik master ikut tersalin saat fork; master menulis snapshotnya sendiri
+    for metric in REGISTRY:
+        for child in list(metric._children.values()):
+            child.reset()
+
+
+if METRICS_DIR:
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def init_app(app):
+    """Pasang gauge in-flight + histogram durasi request dan endpoint GET /metrics ke app Flask."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _metrics_start():
+        start_flusher()
+        g._metrics_endpoint = request.endpoint or 'unknown'
+        g._metrics_start = time.perf_counter()
+        IN_FLIGHT.inc(endpoint=g._metrics_endpoint)
+
+    def _finish(endpoint, started):
+        IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+
+    @app.after_request
+    def _metrics_stream(response):
+        from streaming import defer_release
+
+        # SSE: request baru selesai saat thread pipeline selesai, bukan saat teardown
+        endpoint = g.get('_metrics_endpoint')
+        if endpoint is not None:
+            started = g._metrics_start
+            if defer_release(response, lambda: _finish(endpoint, started)):
+                g.pop('_metrics_endpoint')
+                g.pop('_metrics_start')
+        return response
+
+    @app.teardown_request
+    def _metrics_end(exc=None):
+        endpoint = g.pop('_metrics_endpoint', None)
+        if endpoint is None:
+            return
+        _finish(endpoint, g.pop('_metrics_start'))
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -0,0 +1,384 @@
+"""
+Service OCR lokal: satu proses memegang SATU easyocr.Reader untuk semua worker.
+
+Tanpa service, setiap worker gunicorn membuat Reader sendiri (ratusan MB bobot model
+per worker) dan mengenali frame satu per satu. Dengan service, worker hanya membawa
+OCRServiceClient (beberapa KB) dan mengirim gambar lewat Unix socket; service
+mengumpulkan request yang datang hampir bersamaan dari semua worker lalu menjalankannya
+sebagai satu batch `readtext_batched`, dan mengembalikan hasil ke masing-masing pemanggil.
+
+    python ocr_service.py --socket /tmp/risetjudi-ocr.sock        # jalankan service
+    OCR_SERVICE_SOCKET=/tmp/risetjudi-ocr.sock gunicorn -c gunicorn.conf.py app:app
+    python ocr_service.py --stats                                  # statistik batch
+    python ocr_service.py --bench --clients 1,4,16 --images 64     # throughput vs konkurensi
+
+gunicorn.conf.py otomatis menjalankan service ini jika OCR_SERVICE=1.
+
+Batching: request `readtext` dikelompokkan per (ukuran gambar, paragraph) karena
+readtext_batched butuh gambar berukuran sama (frame dari video yang sama selalu sama).
+Batch dikirim saat OCR_BATCH_MAX gambar terkumpul atau OCR_BATCH_WAIT_MS berlalu sejak
+request pertama. Request `recognize` (region dari text_regions.py) sudah di-batch per
+gambar dan dijalankan apa adanya di thread yang sama.
+
+Protokol (satu request per round-trip per koneksi): panjang header 4 byte big-endian,
+header JSON {op, shape, dtype, options}, lalu byte array gambar (C-contiguous).
+Balasan: panjang 4 byte + JSON {texts} atau {error}. Socket dibuat dengan izin 0600.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+OCR_SERVICE_SOCKET = os.environ.get('OCR_SERVICE_SOCKET', '')
+OCR_LANGUAGES = os.environ.get('OCR_LANGUAGES', 'en').split(',')
+OCR_BATCH_MAX = int(os.environ.get('OCR_BATCH_MAX', '16'))
+OCR_BATCH_WAIT_MS = float(os.environ.get('OCR_BATCH_WAIT_MS', '10'))
+OCR_SERVICE_TIMEOUT = float(os.environ.get('OCR_SERVICE_TIMEOUT', '120'))
+DEFAULT_SOCKET = '/tmp/risetjudi-ocr.sock'
+
+_LENGTH = struct.Struct('!I')
+
+
+# ====== Framing ======
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('Koneksi OCR service tertutup')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _send_message(sock, header, payload=b''):
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_header(sock):
+    size, = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+# ====== Client (dipakai detector.get_reader jika OCR_SERVICE_SOCKET di-set) ======
+class OCRServiceClient:
+    """
+    Pengganti easyocr.Reader untuk panggilan yang dipakai repo ini
+    (readtext / recognize dengan detail=0). Satu koneksi per thread.
+    """
+
+    def __init__(self, socket_path=None, timeout=OCR_SERVICE_TIMEOUT):
+        self.socket_path = socket_path or OCR_SERVICE_SOCKET or DEFAULT_SOCKET
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def call(self, op, image=None, **options):
+        header = {'op': op, 'options': options}
+        payload = b''
+        if image is not None:
+            image = np.ascontiguousarray(image)
+            header.update(shape=list(image.shape), dtype=str(image.dtype))
+            payload = image.tobytes()
+        # Sekali coba ulang dengan koneksi baru (service restart / koneksi lama putus)
+        for attempt in (1, 2):
+            try:
+                sock = self._connection()
+                _send_message(sock, header, payload)
+                reply = _recv_header(sock)
+                break
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt == 2:
+                    raise ConnectionError(f'OCR service tidak dapat dihubungi di {self.socket_path}')
+        if 'error' in reply:
+            raise RuntimeError(f"OCR service: {reply['error']}")
+        return reply
+
+    @staticmethod
+    def _load(image):
+        """Path / bytes / array -> array (decode di sisi client supaya service hanya menerima piksel)."""
+        if isinstance(image, np.ndarray):
+            return image
+        import cv2
+        if isinstance(image, (bytes, bytearray)):
+            decoded = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        else:
+            decoded = cv2.imread(image, cv2.IMREAD_UNCHANGED)
+        if decoded is None:
+            raise ValueError('Format gambar tidak dikenali')
+        return decoded
+
+    def readtext(self, image, detail=0, paragraph=False):
+        if detail != 0:
+            raise ValueError('OCR service hanya mendukung detail=0')
+        return self.call('readtext', self._load(image), paragraph=paragraph)['texts']
+
+    def recognize(self, image, horizontal_list=None, free_list=None, detail=0, batch_size=1):
+        if detail != 0:
+            raise ValueError('OCR service hanya mendukung detail=0')
+        return self.call('recognize', self._load(image), horizontal_list=horizontal_list or [],
+                         free_list=free_list or [], batch_size=batch_size)['texts']
+
+    def stats(self):
+        return self.call('stats')
+
+
+# ====== Server ======
+class _Job:
+    __slots__ = ('op', 'image', 'options', 'texts', 'error', 'done')
+
+    def __init__(self, op, image, options):
+        self.op = op
+        self.image = image
+        self.options = options
+        self.texts = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class OCRBatcher:
+    """Satu thread yang memegang Reader dan menjalankan job dari semua koneksi secara batch."""
+
+    def __init__(self, reader, batch_max=OCR_BATCH_MAX, wait_ms=OCR_BATCH_WAIT_MS):
+        self.reader = reader
+        self.batch_max = batch_max
+        self.wait = wait_ms / 1000.0
+        self.jobs = queue.Queue()
+        self.stats = {'requests': 0, 'batches': 0, 'batched_images': 0, 'max_batch': 0, 'busy_seconds': 0.0}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, op, image, options):
+        job = _Job(op, image, options)
+        self.jobs.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.texts
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['mean_batch'] = round(stats['batched_images'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['pending'] = self.jobs.qsize()
+        return stats
+
+    def _collect(self):
+        batch = [self.jobs.get()]
+        deadline = time.monotonic() + self.wait
+        while len(batch) < self.batch_max:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            groups = {}
+            for job in batch:
+                if job.op == 'readtext':
+                    key = (job.image.shape, bool(job.options.get('paragraph')))
+                    groups.setdefault(key, []).append(job)
+                else:
+                    self._run(job, lambda job=job: [self._recognize(job)])
+            for (shape, paragraph), jobs in groups.items():
+                self._run(jobs, lambda jobs=jobs, paragraph=paragraph: self._readtext(jobs, paragraph))
+                with self._lock:
+                    self.stats['batches'] += 1
+                    self.stats['batched_images'] += len(jobs)
+                    self.stats['max_batch'] = max(self.stats['max_batch'], len(jobs))
+            with self._lock:
+                self.stats['requests'] += len(batch)
+                self.stats['busy_seconds'] += time.perf_counter() - started
+
+    @staticmethod
+    def _run(jobs, fn):
+        jobs = jobs if isinstance(jobs, list) else [jobs]
+        try:
+            for job, texts in zip(jobs, fn()):
+                job.texts = [str(text) for text in texts]
+        except Exception as e:
+            for job in jobs:
+                job.error = e
+        finally:
+            for job in jobs:
+                job.done.set()
+
+    def _readtext(self, jobs, paragraph):
+        if len(jobs) == 1:
+            return [self.reader.readtext(jobs[0].image, detail=0, paragraph=paragraph)]
+        return self.reader.readtext_batched([job.image for job in jobs], detail=0, paragraph=paragraph,
+                                            batch_size=len(jobs))
+
+    def _recognize(self, job):
+        options = job.options
+        return self.reader.recognize(job.image, horizontal_list=options.get('horizontal_list', []),
+                                     free_list=options.get('free_list', []), detail=0,
+                                     batch_size=options.get('batch_size', 1))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batcher = self.server.batcher
+        while True:
+            try:
+                header = _recv_header(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            try:
+                image = None
+                if 'shape' in header:
+                    dtype = np.dtype(header['dtype'])
+                    size = int(np.prod(header['shape'])) * dtype.itemsize
+                    image = np.frombuffer(_recv_exact(self.request, size), dtype=dtype).reshape(header['shape'])
+                if header['op'] == 'stats':
+                    reply = batcher.snapshot()
+                    reply['pid'] = os.getpid()
+                elif header['op'] in ('readtext', 'recognize'):
+                    reply = {'texts': batcher.submit(header['op'], image, header.get('options', {}))}
+                else:
+                    reply = {'error': f"op tidak dikenal: {header['op']}"}
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                reply = {'error': f'{type(e).__name__}: {e}'}
+            try:
+                _send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class OCRServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Semua thread dari semua worker bisa connect bersamaan (default socketserver hanya 5)
+    request_queue_size = 256
+
+    def __init__(self, socket_path, reader, batch_max=OCR_BATCH_MAX, wait_ms=OCR_BATCH_WAIT_MS):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.batcher = OCRBatcher(reader, batch_max, wait_ms)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def serve(socket_path, languages=None, batch_max=OCR_BATCH_MAX, wait_ms=OCR_BATCH_WAIT_MS):
+    import easyocr
+    reader = easyocr.Reader(languages or OCR_LANGUAGES)
+    server = OCRServer(socket_path, reader, batch_max, wait_ms)
+    print(f"✅ OCR service siap di {socket_path} (pid {os.getpid()}, batch maks {batch_max}, tunggu {wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def wait_until_ready(socket_path, timeout=300):
+    """Tunggu sampai service menjawab 'stats' (model EasyOCR butuh waktu untuk di-load)."""
+    client = OCRServiceClient(socket_path, timeout=5)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return client.stats()
+        except (ConnectionError, RuntimeError):
+            time.sleep(0.5)
+    raise TimeoutError(f'OCR service di {socket_path} belum siap setelah {timeout} detik')
+
+
+# ====== Benchmark throughput vs jumlah client ======
+def bench(socket_path, clients_list, images, width=960, height=540, seed=0):
+    """Kirim `images` frame sintetis (ukuran sama) dari N thread client; return images/s per N."""
+    from concurrent.futures import ThreadPoolExecutor
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(8):
+        frame = np.full((height, width), 255, dtype=np.uint8)
+        cv2.putText(frame, f'SLOT GACOR {int(rng.integers(10, 99))} MAXWIN', (40, 120 + i * 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+        frames.append(frame)
+
+    client = OCRServiceClient(socket_path)
+    results = {}
+    for clients in clients_list:
+        before = client.stats()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(lambda i: client.readtext(frames[i % len(frames)], paragraph=True), range(images)))
+        elapsed = time.perf_counter() - started
+        after = client.stats()
+        batches = after['batches'] - before['batches']
+        results[clients] = {
+            'images_per_second': round(images / elapsed, 2),
+            'mean_batch': round((after['batched_images'] - before['batched_images']) / batches, 2) if batches else 0.0,
+        }
+        print(f"clients={clients:3d}  {results[clients]['images_per_second']:8.2f} img/s  "
+              f"batch rata-rata {results[clients]['mean_batch']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Service OCR bersama (EasyOCR) via Unix socket')
+    parser.add_argument('--socket', default=OCR_SERVICE_SOCKET or DEFAULT_SOCKET)
+    parser.add_argument('--languages', default=','.join(OCR_LANGUAGES))
+    parser.add_argument('--batch-max', type=int, default=OCR_BATCH_MAX)
+    parser.add_argument('--wait-ms', type=float, default=OCR_BATCH_WAIT_MS)
+    parser.add_argument('--stats', action='store_true', help='tampilkan statistik service yang berjalan')
+    parser.add_argument('--bench', action='store_true', help='benchmark throughput service yang berjalan')
+    parser.add_argument('--clients', default='1,4,16')
+    parser.add_argument('--images', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        print(json.dumps(OCRServiceClient(args.socket).stats(), indent=2))
+    elif args.bench:
+        bench(args.socket, [int(c) for c in args.clients.split(',')], args.images)
+    else:
+        serve(args.socket, args.languages.split(','), args.batch_max, args.wait_ms)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,683 @@
+"""
+Pipeline deteksi yang dipakai bersama oleh app.py, streaming.py dan bulk_scan.py.
+
+analyze_text / analyze_image / analyze_url menghasilkan dict respons yang sama dengan
+endpoint detect-text, detect-image dan detect-url (ValueError untuk input yang ditolak).
+Pipeline YouTube dan video berupa generator event.
+
+Setiap tahap yang selesai menghasilkan tuple (nama_event, data), misalnya
+'metadata', 'captions', 'storyboard', 'download', 'frame' (frame dengan teks OCR),
+'asr' (satu segmen transkrip) dengan keyword terkumpul dan confidence sementara.
+Event terakhir selalu 'result' berisi respons lengkap yang sama dengan endpoint JSON.
+
+    result = run_to_result(youtube_events(url))            # endpoint JSON biasa
+    for name, data in youtube_events(url, cancel=event):   # endpoint SSE
+        ...
+
+`cancel` (threading.Event) dicek di antara tahap, per frame dan per segmen ASR,
+dan juga di progress hook download yt-dlp; jika di-set, pipeline berhenti dengan
+Cancelled dan file sementara tetap dibersihkan.
+
+`budget` (budget.Budget) dicek di titik yang sama: tahap yang tidak sempat dijalankan
+penuh dipangkas (event 'truncated'), dan 'result' berisi `partial` + `budget` dengan
+verdict dari bukti yang sempat terkumpul. Tanpa budget semua tahap berjalan penuh.
+"""
+import math
+import os
+import time
+
+import requests
+
+import tier0
+
+from budget import BUDGET_FRAME_SHARE, Budget, estimate, observe
+from detector import (
+    get_model, get_reader, normalize_ocr_text, ocr_image, extract_text_from_html, find_gambling_keywords_in_text,
+    find_gambling_keywords_in_fields, find_proximity_matches, calculate_confidence_based_on_keywords,
+    preprocess_text, predict_proba, preprocess_frame, ocr_frame_cached, ocr_tiles,
+    extract_audio, transcribe_audio_segments, ASR_SEGMENT_SECONDS,
+)
+from frame_cache import HitCounter
+from frame_sampler import active_decoder, sample_frames, video_info
+from metrics import FRAMES_PROCESSED, YOUTUBE_VERDICTS, stage
+from youtube_ingest import (
+    YOUTUBE_ANALYSIS_SECONDS, download_video, fetch_captions, fetch_storyboard_tiles, metadata_from_info, probe_youtube,
+)
+
+# ====== Tier cepat YouTube (caption & storyboard) sebelum download video ======
+CAPTION_MIN_KEYWORDS = int(os.environ.get('CAPTION_MIN_KEYWORDS', '1'))
+CAPTION_POSITIVE_THRESHOLD = float(os.environ.get('CAPTION_POSITIVE_THRESHOLD', '0.8'))
+CAPTION_NEGATIVE_THRESHOLD = float(os.environ.get('CAPTION_NEGATIVE_THRESHOLD', '0.2'))
+CAPTION_MIN_WORDS = int(os.environ.get('CAPTION_MIN_WORDS', '50'))
+CAPTION_NEGATIVE_EXIT = os.environ.get('CAPTION_NEGATIVE_EXIT', '1') != '0'
+STORYBOARD_OCR = os.environ.get('STORYBOARD_OCR', '1') != '0'
+STORYBOARD_MIN_KEYWORDS = int(os.environ.get('STORYBOARD_MIN_KEYWORDS', '2'))
+
+
+class Cancelled(Exception):
+    """Pipeline dihentikan karena klien membatalkan request."""
+
+
+def _check(cancel):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
+def run_to_result(events):
+    """Jalankan generator event sampai selesai, return data event 'result'."""
+    result = None
+    for name, data in events:
+        if name == 'result':
+            result = data
+    return result
+
+
+def _progress(keywords, **data):
+    """Data event parsial: keyword terkumpul + confidence sementara (berbasis keyword)."""
+    data['keywords'] = sorted(keywords)
+    data['keyword_count'] = len(keywords)
+    data['running_confidence'] = calculate_confidence_based_on_keywords(len(keywords))
+    return data
+
+
+def early_verdict(keyword_count, model_confidence, min_keywords, word_count=0, negative_exit=False):
+    """
+    Verdict dari tier cepat jika sudah meyakinkan, None jika perlu lanjut ke tier berikutnya.
+    - keyword >= min_keywords: judi (tier berikutnya hanya bisa menambah keyword)
+    - skor model >= CAPTION_POSITIVE_THRESHOLD: judi
+    - (negative_exit) teks cukup panjang, tanpa keyword dan skor model <= CAPTION_NEGATIVE_THRESHOLD: bukan judi
+    """
+    if keyword_count >= min_keywords:
+        return 'Terindikasi Iklan Judi', calculate_confidence_based_on_keywords(keyword_count)
+    if model_confidence is None:
+        return None
+    if model_confidence >= CAPTION_POSITIVE_THRESHOLD:
+        return 'Terindikasi Iklan Judi', model_confidence
+    if (negative_exit and keyword_count == 0 and word_count >= CAPTION_MIN_WORDS
+            and model_confidence <= CAPTION_NEGATIVE_THRESHOLD):
+        return 'Tidak Terindikasi Iklan Judi', model_confidence
+    return None
+
+
+def _truncated(budget, found, stage, **info):
+    """Catat tahap yang dipangkas budget; return event 'truncated'."""
+    budget.truncate(stage, **info)
+    return 'truncated', _progress(found, stage=stage, **info)
+
+
+def _budget_result(budget):
+    return {'partial': bool(budget.truncated), 'budget': budget.as_dict()}
+
+
+def _ocr_frames(video_path, max_frames, frame_interval, source, found, cancel, budget, share=1.0):
+    """
+    OCR frame sampel (lewat cache pHash) lalu normalisasi fuzzy (normalize_ocr_text);
+    yield event 'frame' untuk frame yang berisi teks. Keyword di-scan sekali per frame
+    dan dikumpulkan, jadi teks gabungan tidak perlu di-scan ulang.
+    Tahap ini mendapat jatah `share` x sisa budget: jika tidak cukup, Tesseract dilewati
+    lalu jumlah frame dikurangi (tetap tersebar di rentang max_frames).
+    Return (teks, {'frames_processed': frame dibaca, 'frames_ocr': frame di-OCR},
+    statistik cache, set keyword OCR).
+    """
+    all_ocr_texts = []
+    ocr_keywords = set()
+    frames_sampled = 0
+    decode_stats = {'frames_read': 0}
+    cache_hits = HitCounter()
+    samples = -(-max_frames // frame_interval)
+    seconds = budget.available() * share
+    planned, tesseract = budget.plan_frames(samples, seconds)
+    if planned < samples or not tesseract:
+        yield _truncated(budget, found, 'frames', planned=planned, samples=samples, tesseract=tesseract)
+    if not planned:
+        return '', {'frames_processed': 0, 'frames_ocr': 0}, cache_hits.as_dict(), ocr_keywords
+    if planned < samples:
+        frame_interval = -(-max_frames // planned)
+    deadline = budget.deadline_after(seconds)
+    cost = 'frame_ocr' if tesseract else 'frame_ocr_fast'
+    frames = sample_frames(video_path, max_frames, frame_interval, stats=decode_stats)
+    try:
+        for frame_count, frame in frames:
+            _check(cancel)
+            if deadline is not None and time.monotonic() >= deadline:
+                yield _truncated(budget, found, 'frames', processed=frames_sampled, deadline=True)
+                break
+            frames_sampled += 1
+            try:
+                started = time.perf_counter()
+                ocr_text, cached = ocr_frame_cached(preprocess_frame(frame), tesseract)
+                # Cache menyimpan teks mentah; normalisasi fuzzy selalu memakai kosakata terbaru
+                cleaned_text = normalize_ocr_text(ocr_text)
+                cache_hits.add(cached)
+                if not cached:
+                    observe(cost, time.perf_counter() - started)
+                    FRAMES_PROCESSED.inc(source=source)
+            except Exception as e:
+                print(f"OCR error at frame {frame_count}: {e}")
+                continue
+            if cleaned_text:
+                all_ocr_texts.append(cleaned_text)
+                hits = find_gambling_keywords_in_text(cleaned_text)
+                ocr_keywords.update(hits)
+                found.update(hits)
+                yield 'frame', _progress(found, frame=frame_count, text=cleaned_text[:200], frame_keywords=hits,
+                                         cached=cached)
+    finally:
+        frames.close()
+    frame_stats = {'frames_processed': decode_stats['frames_read'], 'frames_ocr': frames_sampled}
+    return ' | '.join(all_ocr_texts), frame_stats, cache_hits.as_dict(), ocr_keywords
+
+
+def _extract_audio(video_path, duration, found, budget):
+    """
+    Ekstrak audio sebanyak yang masih sempat di-ASR dengan sisa budget (dilewati jika
+    tidak sempat sama sekali). Return (path atau None, detik audio yang diekstrak).
+    """
+    max_seconds = budget.audio_seconds()
+    if max_seconds < 1:
+        yield _truncated(budget, found, 'audio', skipped=True)
+        return None, 0
+    if math.isinf(max_seconds) or (duration and duration <= max_seconds):
+        max_seconds = None
+    else:
+        max_seconds = int(max_seconds)
+        if duration:
+            yield _truncated(budget, found, 'audio', seconds=max_seconds, duration=round(duration, 1))
+    return extract_audio(video_path, max_seconds), (max_seconds or duration)
+
+
+def _transcribe(audio_path, found, cancel, budget, audio_seconds=None):
+    """
+    ASR per segmen; yield event 'asr' per segmen. Berhenti di antara segmen jika segmen
+    berikutnya tidak sempat selesai dalam budget. Return (transkrip lengkap, set keyword
+    yang sudah di-scan per segmen).
+    """
+    segments = []
+    audio_keywords = set()
+    results = transcribe_audio_segments(audio_path)
+    try:
+        started = time.perf_counter()
+        for index, text in enumerate(results):
+            done_seconds = (index + 1) * ASR_SEGMENT_SECONDS
+            if not audio_seconds or done_seconds <= audio_seconds:
+                observe('asr', (time.perf_counter() - started) / ASR_SEGMENT_SECONDS)
+            _check(cancel)
+            if text:
+                segments.append(text)
+                hits = find_gambling_keywords_in_text(text)
+                audio_keywords.update(hits)
+                found.update(hits)
+                yield 'asr', _progress(found, segment=index, text=text[:300], segment_keywords=hits)
+            more = not audio_seconds or done_seconds < audio_seconds
+            if more and budget.available() < estimate('asr') * ASR_SEGMENT_SECONDS:
+                yield _truncated(budget, found, 'asr', segments=index + 1)
+                break
+            started = time.perf_counter()
+    finally:
+        results.close()
+    audio_text = ' '.join(segments)
+    print(f"Audio transcription: {audio_text[:200]}...")
+    return audio_text, audio_keywords
+
+
+# ====== Teks, Gambar & URL ======
+URL_FETCH_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+
+def _model_confidence(text, endpoint):
+    """
+    Skor untuk teks tanpa keyword: tier-0 (tier0.py) menjawab kasus yang jelas,
+    hanya pita tidak pasti yang dieskalasi ke RNN. Return (confidence, info classifier).
+    """
+    started = time.perf_counter()
+    probability, decision = tier0.classify(text)
+    tier0_seconds = time.perf_counter() - started
+    info = {'classifier': 'tier0'}
+    if probability is not None:
+        info['tier0_probability'] = round(probability, 4)
+
+    if decision in ('benign', 'gambling'):
+        tier0.record(endpoint, decision, tier0_seconds)
+        return probability, info
+    if get_model():
+        started = time.perf_counter()
+        confidence = predict_proba(preprocess_text(text))
+        if decision is not None:
+            tier0.record(endpoint, 'escalated', tier0_seconds, time.perf_counter() - started)
+        info['classifier'] = 'rnn'
+        return confidence, info
+    if decision is not None:
+        # Pita tidak pasti tapi RNN tidak ada (dummy mode): 0.0 seperti tanpa tier-0, supaya
+        # verdict konfigurasi tanpa model tidak berubah; skor tier-0 tetap dilaporkan di info
+        tier0.record(endpoint, 'uncertain', tier0_seconds)
+        info['classifier'] = 'none'
+        return 0.0, info
+    return 0.0, {'classifier': 'none'}
+
+
+def analyze_text(text):
+    """Respons detect-text: keyword dulu, lalu tier-0 / model RNN jika tidak ada keyword."""
+    text = (text or '').strip()
+    if not text:
+        raise ValueError('Teks tidak boleh kosong.')
+
+    gambling_keywords = find_gambling_keywords_in_text(text)
+    keyword_count = len(gambling_keywords)
+
+    classifier = {'classifier': 'keywords'}
+    if keyword_count > 0:
+        confidence = calculate_confidence_based_on_keywords(keyword_count)
+        status = 'Terindikasi Iklan Judi'
+    else:
+        confidence, classifier = _model_confidence(text, 'detect_text')
+        status = 'Terindikasi Iklan Judi' if confidence > 0.5 else 'Tidak Terindikasi Iklan Judi'
+
+    return {
+        'success': True,
+        'status': status,
+        'confidence': f'{confidence * 100:.2f}%',
+        'raw_confidence': confidence,
+        'gambling_keywords': gambling_keywords,
+        'keyword_count': keyword_count,
+        'method': 'text_analysis',
+        **classifier,
+    }
+
+
+def _image_keyword_confidence(keyword_count):
+    # Tabel detect-image sedikit lebih tinggi dari calculate_confidence_based_on_keywords
+    return {1: 0.55, 2: 0.65, 3: 0.75, 4: 0.9}.get(keyword_count, 1.0)
+
+
+def analyze_image(image_bytes):
+    """Respons detect-image: OCR region teks, normalisasi, lalu keyword / model."""
+    # ValueError dari decode gambar diteruskan ke caller
+    ocr_result, ocr_info = ocr_image(image_bytes)
+    extracted_text = ' '.join(ocr_result).strip()
+    normalized_text = normalize_ocr_text(extracted_text)
+
+    if not normalized_text:
+        return {
+            'ocr_text': '',
+            'normalized_text': '',
+            'status': 'Tidak Terindikasi Iklan Judi',
+            'confidence': '0.00%',
+            'raw_confidence': 0.0,
+            'gambling_keywords': [],
+            'keyword_count': 0,
+            'ocr_regions': ocr_info
+        }
+
+    gambling_keywords = find_gambling_keywords_in_text(normalized_text)
+    keyword_count = len(gambling_keywords)
+
+    classifier = {'classifier': 'keywords'}
+    if keyword_count > 0:
+        # Minimal 1 keyword -> langsung terindikasi judi
+        status = 'Terindikasi Iklan Judi'
+        confidence = _image_keyword_confidence(keyword_count)
+    else:
+        confidence, classifier = _model_confidence(normalized_text, 'detect_image')
+        status = 'Terindikasi Iklan Judi' if confidence > 0.5 else 'Tidak Terindikasi Iklan Judi'
+
+    return {
+        'ocr_text': extracted_text,
+        'normalized_text': normalized_text,
+        'status': status,
+        'confidence': f'{confidence * 100:.2f}%',
+        'raw_confidence': confidence,
+        'gambling_keywords': gambling_keywords,
+        'keyword_count': keyword_count,
+        'text_length': len(normalized_text),
+        'ocr_regions': ocr_info,
+        'method': 'image_ocr_analysis',
+        **classifier,
+    }
+
+
+def analyze_url(url, timeout=15):
+    """Respons detect-url: ambil halaman, ekstrak teks HTML, hitung keyword."""
+    url = (url or '').strip()
+    if not url:
+        raise ValueError('URL tidak boleh kosong')
+
+    try:
+        with stage('fetch'):
+            response = requests.get(url, headers=URL_FETCH_HEADERS, timeout=timeout, verify=False, allow_redirects=True)
+    except requests.exceptions.RequestException as e:
+        raise ValueError(f'Tidak dapat mengakses URL: {str(e)}')
+
+    return analyze_url_content(url, response.status_code, response.text)
+
+
+def analyze_url_content(url, status_code, html):
+    """
+    Bagian CPU detect-url untuk halaman yang sudah diambil (dipakai juga oleh jalur async
+    url_service.py yang mengambil halaman dengan aiohttp).
+    """
+    if status_code != 200:
+        raise ValueError(f'Gagal mengambil konten dari URL. Status: {status_code}')
+
+    extracted_text = extract_text_from_html(html)
+    if not extracted_text or len(extracted_text) < 50:
+        raise ValueError('Konten halaman terlalu sedikit atau tidak dapat diambil.')
+
+    gambling_keywords = find_gambling_keywords_in_text(extracted_text)
+    keyword_count = len(gambling_keywords)
+
+    if keyword_count > 0:
+        confidence = calculate_confidence_based_on_keywords(keyword_count)
+        status = "Terindikasi Iklan Judi"
+    else:
+        confidence = 0.0
+        status = "Tidak Terindikasi Iklan Judi"
+
+    return {
+        'success': True,
+        'source_url': url,
+        'status': status,
+        'confidence': f"{confidence * 100:.2f}%",
+        'raw_confidence': confidence,
+        'gambling_keywords': gambling_keywords,
+        'keyword_count': keyword_count,
+        'logic': f'{keyword_count} keyword(s) detected'
+    }
+
+
+# ====== Pipeline YouTube ======
+def youtube_events(youtube_url, cancel=None, budget=None):
+    """Generator event analisis YouTube: metadata -> caption -> storyboard -> video penuh."""
+    model = get_model()
+    budget = budget or Budget()
+
+    # ====== 1. Probe YouTube (satu extract_info: metadata + format) ======
+    with stage('youtube_metadata'):
+        info = probe_youtube(youtube_url, timeout=budget.remaining())
+    _check(cancel)
+    metadata = metadata_from_info(info)
+    video_duration = metadata['duration']
+    title = metadata.get('title', '')
+    description = metadata.get('description', '')
+    tags = metadata.get('tags', [])
+
+    # Gabungkan metadata untuk analisis
+    metadata_text = f"{title} {description} {' '.join(tags)}"
+
+    # ====== 2. Analisis Metadata (satu scan per field) ======
+    metadata_keywords, metadata_field_keywords = find_gambling_keywords_in_fields({
+        'title': title,
+        'description': description,
+        'tags': ' '.join(tags),
+    })
+    found = set(metadata_keywords)
+    yield 'metadata', _progress(found, video_title=title, video_duration=video_duration,
+                                field_keywords=metadata_field_keywords)
+
+    metadata_analysis = {
+        'title_keywords': metadata_field_keywords['title'],
+        'description_keywords': metadata_field_keywords['description'],
+        'tags_keywords': metadata_field_keywords['tags']
+    }
+
+    def quick_result(status, confidence, keywords, source, method, **extra):
+        YOUTUBE_VERDICTS.inc(source=source)
+        return dict({
+            'success': True,
+            'youtube_url': youtube_url,
+            'status': status,
+            'confidence': f'{confidence * 100:.2f}%',
+            'raw_confidence': float(confidence),
+            'gambling_keywords': keywords,
+            'keyword_count': len(keywords),
+            'video_title': title,
+            'video_duration': video_duration,
+            'video_metadata_analysis': metadata_analysis,
+            **_budget_result(budget),
+        }, verdict_source=source, method=method, **extra)
+
+    # ====== 3. Fast path: caption/subtitle (tanpa download video, ekstraksi audio & ASR) ======
+    caption_text, caption_info, caption_keywords = '', {}, []
+    if info:
+        with stage('youtube_captions'):
+            caption_text, caption_info = fetch_captions(info)
+        _check(cancel)
+    if caption_text:
+        caption_keywords = find_gambling_keywords_in_text(caption_text)
+        found.update(caption_keywords)
+        yield 'captions', _progress(found, caption_keywords=caption_keywords, **caption_info)
+        caption_all_keywords = list(set(metadata_keywords + caption_keywords))
+        caption_confidence = predict_proba(preprocess_text(f"{metadata_text} {caption_text}")) if model else None
+        verdict = early_verdict(len(caption_all_keywords), caption_confidence, CAPTION_MIN_KEYWORDS,
+                                caption_info['words'], CAPTION_NEGATIVE_EXIT)
+        if verdict is not None:
+            yield 'result', quick_result(
+                *verdict, caption_all_keywords, 'captions', 'caption_analysis',
+                caption_analysis=dict(caption_info, keywords=caption_keywords, transcript=caption_text[:500]))
+            return
+
+    # ====== 4. Tier storyboard: OCR thumbnail + tile storyboard (ratusan KB, bukan video) ======
+    storyboard_text, storyboard_keywords, storyboard_info = '', [], {}
+    if info and STORYBOARD_OCR and not budget.available():
+        yield _truncated(budget, found, 'storyboard', skipped=True)
+    elif info and STORYBOARD_OCR:
+        try:
+            get_reader()
+            with stage('youtube_storyboard'):
+                tiles, storyboard_info = fetch_storyboard_tiles(info)
+            _check(cancel)
+            if tiles:
+                FRAMES_PROCESSED.inc(len(tiles), source='storyboard')
+                storyboard_text = normalize_ocr_text(' '.join(ocr_tiles(tiles)))
+                storyboard_keywords = find_gambling_keywords_in_text(storyboard_text)
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Storyboard OCR error: {e}")
+    if storyboard_text:
+        found.update(storyboard_keywords)
+        yield 'storyboard', _progress(found, storyboard_keywords=storyboard_keywords, **storyboard_info)
+        tier_keywords = list(set(metadata_keywords + storyboard_keywords + caption_keywords))
+        tier_confidence = (predict_proba(preprocess_text(f"{metadata_text} {caption_text} {storyboard_text}"))
+                           if model else None)
+        verdict = early_verdict(len(tier_keywords), tier_confidence, STORYBOARD_MIN_KEYWORDS)
+        if verdict is not None:
+            yield 'result', quick_result(
+                *verdict, tier_keywords, 'storyboard', 'storyboard_ocr_analysis',
+                storyboard_analysis=dict(storyboard_info, keywords=storyboard_keywords,
+                                         ocr_text_samples=storyboard_text[:500]))
+            return
+
+    # ====== 5. Download Video (<= 360p, hanya YOUTUBE_ANALYSIS_SECONDS detik pertama) ======
+    video_path, download_info = None, {}
+    if info and not budget.available():
+        yield _truncated(budget, found, 'download', skipped=True)
+    elif info:
+        seconds = min(YOUTUBE_ANALYSIS_SECONDS, video_duration) if video_duration else YOUTUBE_ANALYSIS_SECONDS
+        if not caption_text:
+            # Rentang yang diunduh harus sempat di-ASR dengan sisa budget setelah OCR frame
+            affordable = budget.audio_seconds() * (1 - BUDGET_FRAME_SHARE)
+            if affordable < seconds:
+                yield _truncated(budget, found, 'download', range_seconds=max(1, int(affordable)),
+                                 requested_seconds=seconds)
+                seconds = max(1, int(affordable))
+        with stage('youtube_download'):
+            video_path, download_info = download_video(
+                info, seconds=seconds, cancel=cancel, deadline=budget.deadline_after(budget.available()))
+        if not video_path and not budget.available():
+            yield _truncated(budget, found, 'download', deadline=True)
+    if video_path and cancel is not None and cancel.is_set():
+        os.remove(video_path)
+    _check(cancel)
+
+    if not video_path:
+        # Jika download gagal, gunakan metadata (+ keyword caption/storyboard yang sudah didapat)
+        fallback_keywords = list(set(metadata_keywords + storyboard_keywords + caption_keywords))
+        confidence = calculate_confidence_based_on_keywords(len(fallback_keywords))
+        status = 'Terindikasi Iklan Judi' if fallback_keywords else 'Tidak Terindikasi Iklan Judi'
+        YOUTUBE_VERDICTS.inc(source='metadata')
+        yield 'result', {
+            'success': True,
+            'youtube_url': youtube_url,
+            'status': status,
+            'confidence': f'{confidence * 100:.2f}%',
+            'raw_confidence': confidence,
+            'gambling_keywords': fallback_keywords,
+            'keyword_count': len(fallback_keywords),
+            'video_title': title,
+            'video_duration': video_duration,
+            'verdict_source': 'metadata',
+            'method': 'metadata_analysis_only',
+            'note': ('Budget waktu habis sebelum video diunduh, analisis berdasarkan metadata saja'
+                     if {'skipped', 'deadline'} & set(budget.truncated.get('download', ())) else
+                     'Video tidak dapat diunduh, analisis berdasarkan metadata saja'),
+            **_budget_result(budget),
+        }
+        return
+
+    yield 'download', _progress(found, **download_info)
+
+    # ====== 6. Proses Video (OCR + Audio) ======
+    audio_path = None
+    try:
+        # OCR dari frame video (backend decode: env VIDEO_DECODER, lihat frame_sampler.py)
+        # Caption yang ada (tapi belum meyakinkan) menggantikan ekstraksi audio + ASR,
+        # jadi OCR frame boleh memakai seluruh sisa budget
+        combined_ocr_text, frame_stats, frame_cache, ocr_keywords = yield from _ocr_frames(
+            video_path, 50, 5, 'youtube', found, cancel, budget, 1.0 if caption_text else BUDGET_FRAME_SHARE)
+
+        if caption_text:
+            # Caption sudah di-scan di langkah 3
+            audio_text, audio_keywords = caption_text, set(caption_keywords)
+        else:
+            audio_path, audio_seconds = yield from _extract_audio(
+                video_path, download_info.get('range_seconds') or video_duration, found, budget)
+            _check(cancel)
+            audio_text, audio_keywords = "", set()
+            if audio_path and os.path.exists(audio_path):
+                audio_text, audio_keywords = yield from _transcribe(audio_path, found, cancel, budget, audio_seconds)
+    finally:
+        # Cleanup
+        if os.path.exists(video_path):
+            os.remove(video_path)
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+    # ====== 7. Gabungkan semua teks untuk analisis ======
+    all_text = f"{metadata_text} {storyboard_text} {combined_ocr_text} {audio_text}"
+
+    # ====== 8. Analisis akhir ======
+    # Semua teks sudah di-scan saat diproses (metadata, caption, storyboard, per frame,
+    # per segmen ASR); hasilnya cukup digabung, tidak di-scan ulang
+    combined_keywords = list(set(metadata_keywords + storyboard_keywords) | ocr_keywords | audio_keywords)
+    combined_keyword_count = len(combined_keywords)
+
+    if combined_keyword_count > 0:
+        confidence = calculate_confidence_based_on_keywords(combined_keyword_count)
+        status = 'Terindikasi Iklan Judi'
+    else:
+        processed = preprocess_text(all_text)
+        if model:
+            confidence = predict_proba(processed)
+            status = 'Terindikasi Iklan Judi' if confidence > 0.3 else 'Tidak Terindikasi Iklan Judi'
+        else:
+            confidence = 0.0
+            status = 'Tidak Terindikasi Iklan Judi'
+
+    yield 'result', quick_result(
+        status, confidence, combined_keywords, 'full_video', 'full_video_analysis',
+        video_content_analysis={
+            'ocr_keywords': list(ocr_keywords),
+            'audio_keywords': list(audio_keywords),
+            'ocr_text_samples': combined_ocr_text[:500],
+            'audio_transcript': audio_text[:500],
+            **frame_stats,
+            'frame_decoder': active_decoder(),
+            'frame_cache': frame_cache,
+            'download': download_info,
+            'audio_source': 'captions' if caption_text else 'asr',
+            'storyboard_keywords': storyboard_keywords
+        })
+
+
+# ====== Pipeline Video Upload ======
+def video_events(video_path, cancel=None, remove_input=False, budget=None):
+    """Generator event analisis file video (OCR frame + ASR). `remove_input` menghapus file di akhir."""
+    model = get_model()
+    budget = budget or Budget()
+    found = set()
+    audio_path = None
+
+    total_frames, fps = video_info(video_path)
+    duration = total_frames / fps if fps > 0 else 0
+    yield 'video_info', _progress(found, total_frames=total_frames, fps=fps, duration_seconds=duration)
+
+    try:
+        # ====== 1️⃣ Proses OCR frame ======
+        combined_ocr_text, frame_stats, frame_cache, ocr_keywords = yield from _ocr_frames(
+            video_path, 30, 3, 'video', found, cancel, budget, BUDGET_FRAME_SHARE)
+
+        # ====== 2️⃣ Ekstraksi AUDIO + speech-to-text per segmen ======
+        audio_path, audio_seconds = yield from _extract_audio(video_path, duration, found, budget)
+        _check(cancel)
+        audio_text, audio_keywords = "", set()
+        if audio_path and os.path.exists(audio_path):
+            audio_text, audio_keywords = yield from _transcribe(audio_path, found, cancel, budget, audio_seconds)
+        elif 'audio' not in budget.truncated:
+            print("Tidak ada audio ditemukan atau gagal diekstrak.")
+    finally:
+        if remove_input and os.path.exists(video_path):
+            os.remove(video_path)
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+    # ====== 3️⃣ Gabungkan hasil OCR dan hasil audio speech ======
+    combined_text = f"{combined_ocr_text} {audio_text}"
+    print(f"Gabungan teks total: {len(combined_text)} karakter")
+
+    # ====== 4️⃣ Analisis deteksi (pakai model dan keyword) ======
+    # Keyword OCR/audio sudah di-scan per frame dan per segmen; cukup digabung
+    keyword_sources = {'ocr': list(ocr_keywords), 'audio': list(audio_keywords)}
+    gambling_keywords = list(ocr_keywords | audio_keywords)
+
+    # Aturan kedekatan token (mis. slot_online = "slot" <= 4 token sebelum "online"), lihat proximity_rules di rules/gambling.json
+    gambling_keywords = list(set(gambling_keywords + find_proximity_matches(combined_text)))
+    keyword_count = len(gambling_keywords)
+
+    if keyword_count > 0:
+        confidence = calculate_confidence_based_on_keywords(keyword_count)
+        status = 'Terindikasi Iklan Judi'
+    else:
+        processed = preprocess_text(combined_text)
+        if model:
+            confidence = predict_proba(processed)
+            status = 'Terindikasi Iklan Judi' if confidence > 0.3 else 'Tidak Terindikasi Iklan Judi'
+        else:
+            confidence = 0.0
+            status = 'Tidak Terindikasi Iklan Judi'
+
+    print(f"Final result: {status} ({confidence:.2f})")
+    yield 'result', {
+        'status': status,
+        'confidence': f'{confidence * 100:.2f}%',
+        'raw_confidence': float(confidence),
+        'gambling_keywords': gambling_keywords,
+        'keyword_count': keyword_count,
+        'combined_ocr_text': combined_ocr_text[:300],
+        'audio_transcript': audio_text[:300],
+        'keyword_sources': keyword_sources,
+        **frame_stats,
+        'frame_decoder': active_decoder(),
+        'frame_cache': frame_cache,
+        'video_info': {
+            'total_frames': total_frames,
+            'fps': fps,
+            'duration_seconds': duration
+        },
+        **_budget_result(budget),
+    }
@@ -0,0 +1,198 @@
+"""
+Mode profiling per-request (opt-in, dilindungi admin token).
+
+Aktifkan dengan header `X-Profile: 1` atau query `?profile=1`, ditambah header
+`X-Admin-Token` yang cocok dengan env `ADMIN_TOKEN`. Respons endpoint detect_*
+lalu berisi blok `timings` (wall + CPU per tahap dari metrics.stage).
+
+Nilai `profile` juga bisa `cprofile` atau `tracemalloc` untuk menyimpan snapshot
+request tersebut ke PROFILE_DIR. Daftar dan unduh snapshot lewat:
+    GET /admin/profiles
+    GET /admin/profiles/<nama>
+"""
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+ADMIN_TOKEN_ENV = 'ADMIN_TOKEN'
+TRUTHY = ('1', 'true', 'yes', 'on')
+CAPTURE_MODES = ('cprofile', 'tracemalloc')
+
+_current = contextvars.ContextVar('risetjudi_request_profile', default=None)
+_tracemalloc_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Kumpulan timing tahap untuk satu request yang sedang diprofil."""
+
+    def __init__(self, capture=None):
+        self.capture = capture
+        self.stages = {}
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.thread_time()
+        self.profiler = None
+        self.tracing = False
+        self.capture_note = None
+
+    def record(self, name, engine, wall, cpu):
+        key = (name, engine)
+        entry = self.stages.get(key)
+        if entry is None:
+            entry = self.stages[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += wall
+        entry[2] += cpu
+
+    def as_dict(self):
+        stages = []
+        for (name, engine), (count, wall, cpu) in self.stages.items():
+            item = {'stage': name, 'count': count, 'wall_ms': round(wall * 1000, 3), 'cpu_ms': round(cpu * 1000, 3)}
+            if engine:
+                item['engine'] = engine
+            stages.append(item)
+        return {
+            'total_wall_ms': round((time.perf_counter() - self.started_wall) * 1000, 3),
+            'total_cpu_ms': round((time.thread_time() - self.started_cpu) * 1000, 3),
+            'stages': stages,
+        }
+
+
+def current():
+    """RequestProfile aktif untuk context ini, atau None (jalur normal)."""
+    return _current.get()
+
+
+def admin_token_ok(supplied):
+    """True jika `supplied` sama dengan token admin (env ADMIN_TOKEN); dipakai semua endpoint /admin."""
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    if not expected or not supplied:
+        return False
+    return hmac.compare_digest(expected.encode(), supplied.encode())
+
+
+def _safe_name(name):
+    return re.fullmatch(r'[A-Za-z0-9_.-]+', name or '') is not None
+
+
+def _start_capture(profile):
+    if profile.capture == 'cprofile':
+        profile.profiler = cProfile.Profile()
+        profile.profiler.enable()
+    elif profile.capture == 'tracemalloc':
+        # tracemalloc bersifat global, jadi hanya satu request yang boleh merekam sekaligus
+        if not tracemalloc.is_tracing() and _tracemalloc_lock.acquire(blocking=False):
+            tracemalloc.start(25)
+            profile.tracing = True
+        else:
+            profile.capture_note = 'tracemalloc sedang dipakai request lain'
+
+
+def _finish_capture(profile, endpoint):
+    """Simpan snapshot ke PROFILE_DIR, return nama file atau None."""
+    if profile.profiler is None and not profile.tracing:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = f"{time.strftime('%Y%m%d-%H%M%S')}_{endpoint}_{uuid.uuid4().hex[:8]}"
+
+    if profile.profiler is not None:
+        profile.profiler.disable()
+        name = base + '.prof'
+        profile.profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        profile.profiler = None
+        return name
+
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        profile.tracing = False
+        _tracemalloc_lock.release()
+    name = base + '.tracemalloc'
+    snapshot.dump(os.path.join(PROFILE_DIR, name))
+    with open(os.path.join(PROFILE_DIR, base + '.txt'), 'w') as f:
+        f.write(f'peak traced memory: {peak / 1024:.1f} KiB\n\n')
+        for stat in snapshot.statistics('lineno')[:50]:
+            f.write(f'{stat}\n')
+    return name
+
+
+def init_app(app):
+    """Pasang hook profiling dan endpoint admin ke app Flask."""
+    from flask import g, jsonify, request, send_from_directory
+
+    @app.before_request
+    def _profile_start():
+        if not (request.endpoint or '').startswith('detect_'):
+            return
+        flag = (request.headers.get('X-Profile') or request.args.get('profile') or '').lower()
+        if not flag or not admin_token_ok(request.headers.get('X-Admin-Token')):
+            return
+        if flag not in TRUTHY and flag not in CAPTURE_MODES:
+            return
+        profile = RequestProfile(capture=flag if flag in CAPTURE_MODES else None)
+        g._profile_token = _current.set(profile)
+        _start_capture(profile)
+
+    @app.after_request
+    def _profile_attach(response):
+        profile = _current.get()
+        if profile is None or not response.is_json:
+            return response
+        capture_file = _finish_capture(profile, request.endpoint)
+        data = response.get_json(silent=True)
+        if isinstance(data, dict):
+            data['timings'] = profile.as_dict()
+            if capture_file:
+                data['timings']['profile_file'] = capture_file
+            if profile.capture_note:
+                data['timings']['profile_note'] = profile.capture_note
+            response.set_data(json.dumps(data))
+        return response
+
+    @app.teardown_request
+    def _profile_end(exc=None):
+        token = g.pop('_profile_token', None)
+        if token is None:
+            return
+        profile = _current.get()
+        # Jika after_request tidak sempat jalan (exception), pastikan capture dihentikan
+        if profile.profiler is not None:
+            profile.profiler.disable()
+            profile.profiler = None
+        if profile.tracing:
+            tracemalloc.stop()
+            profile.tracing = False
+            _tracemalloc_lock.release()
+        _current.reset(token)
+
+    @app.route('/admin/profiles', methods=['GET'])
+    def list_profiles():
+        if not admin_token_ok(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Unauthorized'}), 401
+        files = []
+        if os.path.isdir(PROFILE_DIR):
+            for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+                path = os.path.join(PROFILE_DIR, name)
+                files.append({
+                    'name': name,
+                    'size_bytes': os.path.getsize(path),
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(os.path.getmtime(path))),
+                })
+        return jsonify({'profiles': files})
+
+    @app.route('/admin/profiles/<name>', methods=['GET'])
+    def download_profile(name):
+        if not admin_token_ok(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Unauthorized'}), 401
+        if not _safe_name(name) or not os.path.isfile(os.path.join(PROFILE_DIR, name)):
+            return jsonify({'error': 'Profile tidak ditemukan'}), 404
+        return send_from_directory(PROFILE_DIR, name, as_attachment=True)
@@ -0,0 +1,333 @@
+"""
+Ruleset deteksi (kata kunci, aturan kedekatan, kosakata fuzzy OCR) dari file versi.
+
+Isi ruleset ada di RULESET_PATH (default rules/gambling.json):
+
+    {
+      "version": "2026.10.19-1",
+      "keywords": [...],            kata kunci utama (find_gambling_keywords_in_text)
+      "strict_keywords": [...],     frasa spesifik (app1.py)
+      "proximity_rules": [{"name", "first", "second", "max_distance", "ordered"}, ...],
+      "fuzzy_vocabulary": [...],    istilah tambahan untuk normalize_ocr_text
+      "fuzzy_corrections": {...},   salah baca OCR -> istilah (cocok persis, tanpa jarak edit)
+      "fuzzy_known_words": [...]    kata biasa yang tidak boleh dikoreksi secara fuzzy
+    }
+
+File di-compile penuh (KeywordMatcher, ProximityMatcher, FuzzyIndex) menjadi objek
+Ruleset yang tidak pernah diubah lagi, baru kemudian referensi aktif diganti dalam satu
+assignment. Request yang sedang berjalan tidak pernah melihat ruleset setengah jadi:
+di awal request ruleset aktif di-pin ke contextvar (ikut tersalin ke thread SSE), jadi
+satu request memakai satu versi dari awal sampai akhir meskipun ruleset diganti di tengah.
+
+Reload tanpa restart (model TF dan EasyOCR tetap di memori):
+  - otomatis: thread watcher mengecek mtime/ukuran file tiap RULESET_POLL_SECONDS (0 = mati)
+  - manual:   POST /admin/ruleset/reload dengan header X-Admin-Token
+Thread tidak ikut ter-fork, jadi watcher dimulai per proses yang melayani request
+(post_fork di gunicorn.conf.py dan request pertama), bukan di master saat preload.
+Reload manual hanya mengenai worker yang menerima request; supaya worker lain ikut,
+endpoint itu menyentuh (touch) file ruleset sehingga watcher di setiap worker me-reload.
+File yang tidak valid (JSON rusak, sedang ditulis setengah, field salah) ditolak dan
+ruleset lama tetap aktif. Untuk update, tulis ke file sementara lalu rename.
+
+Versi aktif dikirim di header X-Ruleset-Version, field `ruleset_version` pada respons
+JSON detect_* dan event 'stream' SSE, serta di record bulk_scan.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+
+from metrics import RULESET_RELOADS
+
+RULESET_PATH = os.environ.get(
+    'RULESET_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules', 'gambling.json'))
+RULESET_POLL_SECONDS = float(os.environ.get('RULESET_POLL_SECONDS', '5'))
+
+_active = None
+_pinned = contextvars.ContextVar('ruleset', default=None)
+_reload_lock = threading.Lock()
+_file_state = None
+_last_error = None
+_watcher = None
+
+
+class RulesetError(ValueError):
+    """File ruleset tidak bisa dibaca atau isinya tidak valid."""
+
+
+# ====== Ruleset Terkompilasi ======
+class Ruleset:
+    """Satu versi ruleset yang sudah di-compile; tidak diubah setelah dibuat."""
+
+    def __init__(self, data, source=None, digest=None):
+        from detector import KeywordMatcher, ProximityMatcher, make_fuzzy_index
+
+        self.version = data['version']
+        self.source = source
+        self.digest = digest
+        self.loaded_at = time.time()
+        self.keywords = tuple(data['keywords'])
+        self.strict_keywords = tuple(data.get('strict_keywords', ()))
+        self.proximity_rules = tuple(
+            (rule['name'], rule['first'], rule.get('second'), int(rule.get('max_distance', 0)),
+             bool(rule.get('ordered', False)))
+            for rule in data.get('proximity_rules', ()))
+        self.fuzzy_vocabulary = tuple(data.get('fuzzy_vocabulary', ()))
+        self.fuzzy_corrections = dict(data.get('fuzzy_corrections', {}))
+        self.fuzzy_known_words = frozenset(word.lower() for word in data.get('fuzzy_known_words', ()))
+
+        self.matcher = KeywordMatcher(self.keywords)
+        self.strict_matcher = KeywordMatcher(self.strict_keywords)
+        self.proximity = ProximityMatcher(self.proximity_rules)
+        self.fuzzy_index = make_fuzzy_index(self.keywords + self.fuzzy_vocabulary,
+                                            self.fuzzy_corrections, self.fuzzy_known_words)
+
+    def as_dict(self):
+        return {
+            'version': self.version,
+            'source': self.source,
+            'digest': self.digest,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            'keywords': len(self.keywords),
+            'strict_keywords': len(self.strict_keywords),
+            'proximity_rules': len(self.proximity_rules),
+            'fuzzy_vocabulary': len(self.fuzzy_vocabulary),
+            'fuzzy_corrections': len(self.fuzzy_corrections),
+            'fuzzy_known_words': len(self.fuzzy_known_words),
+        }
+
+
+def _string_list(data, field, required=False):
+    value = data.get(field)
+    if value is None and not required:
+        return
+    if not isinstance(value, list) or not all(isinstance(item, str) and item.strip() for item in value):
+        raise RulesetError(f"'{field}' harus berupa list string yang tidak kosong")
+
+
+def validate(data):
+    """Raise RulesetError jika struktur ruleset tidak valid."""
+    if not isinstance(data, dict):
+        raise RulesetError('ruleset harus berupa object JSON')
+    if not isinstance(data.get('version'), str) or not data['version'].strip():
+        raise RulesetError("'version' wajib diisi (string)")
+    _string_list(data, 'keywords', required=True)
+    _string_list(data, 'strict_keywords')
+    _string_list(data, 'fuzzy_vocabulary')
+    _string_list(data, 'fuzzy_known_words')
+    corrections = data.get('fuzzy_corrections', {})
+    if not isinstance(corrections, dict) or not all(
+            isinstance(k, str) and k.strip() and isinstance(v, str) and v.strip() for k, v in corrections.items()):
+        raise RulesetError("'fuzzy_corrections' harus berupa object string -> string")
+    rules = data.get('proximity_rules', [])
+    if not isinstance(rules, list):
+        raise RulesetError("'proximity_rules' harus berupa list")
+    names = set()
+    for rule in rules:
+        if not isinstance(rule, dict) or not isinstance(rule.get('name'), str) or not isinstance(rule.get('first'), str):
+            raise RulesetError(f"aturan kedekatan tidak valid: {rule!r}")
+        if rule['name'] in names:
+            raise RulesetError(f"nama aturan kedekatan duplikat: {rule['name']}")
+        names.add(rule['name'])
+        if rule.get('second') is not None and not isinstance(rule['second'], str):
+            raise RulesetError(f"'second' pada aturan {rule['name']} harus string atau null")
+        if not isinstance(rule.get('max_distance', 0), int) or rule.get('max_distance', 0) < 0:
+            raise RulesetError(f"'max_distance' pada aturan {rule['name']} harus integer >= 0")
+
+
+def load_ruleset(path=RULESET_PATH):
+    """Baca, validasi dan compile file ruleset (raise RulesetError jika gagal)."""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+    except (OSError, ValueError) as e:
+        raise RulesetError(f'{path}: {e}') from e
+    validate(data)
+    return Ruleset(data, source=path, digest=hashlib.sha256(raw).hexdigest()[:12])
+
+
+# ====== Ruleset Aktif ======
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def current():
+    """Ruleset aktif proses ini (di-load saat pertama dipakai)."""
+    if _active is None:
+        reload(force=True)
+    return _active
+
+
+def loaded_version():
+    """Versi ruleset aktif tanpa memicu loading (None jika belum di-load)."""
+    return _active.version if _active is not None else None
+
+
+def active():
+    """Ruleset yang di-pin untuk request ini, atau ruleset aktif jika tidak ada pin."""
+    return _pinned.get() or current()
+
+
+class pinned:
+    """Context manager: pakai satu versi ruleset untuk seluruh blok (mis. satu item bulk_scan)."""
+
+    def __enter__(self):
+        ruleset = active()
+        self._token = _pinned.set(ruleset)
+        return ruleset
+
+    def __exit__(self, *exc):
+        _pinned.reset(self._token)
+        return False
+
+
+def reload(force=False, path=None):
+    """
+    Load ulang file ruleset jika berubah (atau selalu jika force) lalu tukar secara atomik.
+    Return (ruleset aktif, True jika diganti). Raise RulesetError jika file baru tidak valid;
+    ruleset lama tetap aktif (kecuali belum ada ruleset sama sekali).
+    """
+    global _active, _file_state, _last_error
+    path = path or RULESET_PATH
+    with _reload_lock:
+        state = (path, _stat(path))
+        if not force and _active is not None and state == _file_state:
+            if _last_error:
+                raise RulesetError(_last_error)
+            return _active, False
+        try:
+            ruleset = load_ruleset(path)
+        except RulesetError as e:
+            _file_state = state
+            _last_error = str(e)
+            RULESET_RELOADS.inc(result='rejected')
+            raise
+        if _active is not None and ruleset.digest == _active.digest:
+            _file_state = state
+            return _active, False
+        if _active is not None and ruleset.version == _active.version:
+            print(f"⚠️ Isi ruleset berubah tapi versi tetap {ruleset.version}; naikkan 'version' di {path}.")
+        previous = _active
+        # Satu assignment: request lain melihat ruleset lama atau baru, tidak pernah campuran
+        _active = ruleset
+        _file_state = state
+        _last_error = None
+        RULESET_RELOADS.inc(result='loaded')
+        if previous is not None:
+            print(f"✅ Ruleset {previous.version} -> {ruleset.version} ({ruleset.digest})")
+        return ruleset, True
+
+
+def _watching():
+    return _watcher is not None and _watcher[0] == os.getpid() and _watcher[1].is_alive()
+
+
+def status():
+    """Ringkasan ruleset aktif untuk endpoint admin dan subsystem_status."""
+    result = current().as_dict()
+    result['last_error'] = _last_error
+    result['watching'] = _watching()
+    result['pid'] = os.getpid()
+    return result
+
+
+def _watch():
+    while True:
+        time.sleep(RULESET_POLL_SECONDS)
+        # _file_state bisa None (belum ada load yang berhasil membaca file); reload() yang menanganinya
+        state = _file_state
+        if state is not None and _stat(RULESET_PATH) == state[1]:
+            continue
+        try:
+            reload()
+        except RulesetError as e:
+            print(f"⚠️ Ruleset baru ditolak, tetap memakai {loaded_version()}: {e}")
+
+
+def start_watcher():
+    """
+    Mulai thread yang me-reload ruleset saat file berubah (sekali per proses). Aman dipanggil
+    berulang: setelah fork, thread milik proses induk tidak ada lagi, jadi dimulai ulang.
+    """
+    global _watcher
+    if RULESET_POLL_SECONDS <= 0 or _watching():
+        return
+    current()
+    thread = threading.Thread(target=_watch, name='ruleset-watcher', daemon=True)
+    _watcher = (os.getpid(), thread)
+    thread.start()
+
+
+def broadcast_reload():
+    """
+    Minta semua proses me-reload dengan menyentuh file ruleset (watcher melihat mtime baru).
+    Return False jika watcher mati atau file tidak bisa disentuh.
+    """
+    if RULESET_POLL_SECONDS <= 0:
+        return False
+    try:
+        os.utime(RULESET_PATH)
+    except OSError as e:
+        print(f"⚠️ Tidak bisa menyentuh {RULESET_PATH} untuk reload worker lain: {e}")
+        return False
+    return True
+
+
+def init_app(app):
+    """Pin ruleset per request, versi di respons, watcher file dan endpoint admin reload."""
+    from flask import g, jsonify, request
+
+    from profiling import admin_token_ok
+
+    current()
+
+    @app.before_request
+    def _ruleset_pin():
+        # Watcher dimulai di proses yang melayani request (worker), bukan di master preload
+        start_watcher()
+        g._ruleset_token = _pinned.set(current())
+
+    @app.after_request
+    def _ruleset_version(response):
+        ruleset = _pinned.get()
+        if ruleset is None:
+            return response
+        response.headers['X-Ruleset-Version'] = ruleset.version
+        if (request.endpoint or '').startswith('detect_') and response.is_json:
+            data = response.get_json(silent=True)
+            if isinstance(data, dict):
+                data['ruleset_version'] = ruleset.version
+                response.set_data(json.dumps(data))
+        return response
+
+    @app.teardown_request
+    def _ruleset_unpin(exc=None):
+        token = g.pop('_ruleset_token', None)
+        if token is not None:
+            _pinned.reset(token)
+
+    @app.route('/admin/ruleset', methods=['GET'])
+    def ruleset_status():
+        if not admin_token_ok(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return jsonify(status())
+
+    @app.route('/admin/ruleset/reload', methods=['POST'])
+    def ruleset_reload():
+        if not admin_token_ok(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Unauthorized'}), 401
+        try:
+            ruleset, changed = reload(force=request.args.get('force') == '1')
+        except RulesetError as e:
+            return jsonify({'success': False, 'error': str(e), 'active': current().as_dict()}), 422
+        # File valid (sudah ter-load di sini); worker lain menyusul lewat watcher masing-masing
+        broadcast = broadcast_reload()
+        return jsonify({'success': True, 'changed': changed, 'active': ruleset.as_dict(),
+                        'pid': os.getpid(), 'broadcast': broadcast})
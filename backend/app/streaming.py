@@ -0,0 +1,183 @@
+"""
+Server-Sent Events untuk pipeline deteksi yang panjang (YouTube / video).
+
+event_stream(make_events) menjalankan generator event pipeline di thread terpisah
+dan meneruskan tiap event ke klien sebagai SSE:
+
+    event: frame
+    data: {"frame": 15, "keywords": ["slot"], "running_confidence": 0.55, ...}
+
+Event pertama selalu 'stream' berisi stream_id dan ruleset_version. Klien membatalkan dengan menutup
+koneksi (AbortController / EventSource.close()) atau dengan DELETE /api/streams/<stream_id>.
+Keduanya men-set cancel (threading.Event) yang dicek pipeline di setiap tahap, per frame,
+per segmen ASR dan di progress download. Selama tahap panjang berjalan, server mengirim
+komentar heartbeat tiap SSE_HEARTBEAT_SECONDS supaya koneksi yang sudah putus cepat terdeteksi.
+
+Daftar stream (_streams) hanya ada di memori proses yang menjalankannya. Di gunicorn
+dengan beberapa worker, DELETE bisa diterima worker lain dan dijawab 404 walaupun stream
+masih berjalan, jadi satu-satunya cara membatalkan yang selalu berhasil adalah menutup
+koneksi SSE. DELETE hanya andal dengan satu worker (python app.py, WEB_CONCURRENCY=1)
+atau jika reverse proxy mengarahkan request ke worker yang sama.
+
+Pembatalan baru berlaku di antara frame/segmen, jadi thread pipeline bisa masih OCR/ASR
+setelah koneksi ditutup. Sumber daya per request (gauge in-flight, durasi request, slot
+admission) didaftarkan lewat defer_release() dan dilepas saat thread itu benar-benar selesai.
+"""
+import contextvars
+import json
+import os
+import queue
+import threading
+import uuid
+
+import ruleset
+from pipeline import Cancelled
+
+HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '2'))
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def format_event(name, data, event_id=None):
+    """Satu event SSE (data JSON satu baris)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, default=str))
+    return '\n'.join(lines) + '\n\n'
+
+
+def cancel_stream(stream_id):
+    """Set flag cancel stream; return False jika stream tidak dikenal (sudah selesai)."""
+    with _streams_lock:
+        cancel = _streams.get(stream_id)
+    if cancel is None:
+        return False
+    cancel.set()
+    return True
+
+
+class _Releases:
+    """Callback pelepasan sumber daya satu stream; dijalankan tepat sekali."""
+
+    def __init__(self):
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._done = False
+
+    def add(self, callback):
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def run(self):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error releasing stream resource: {e}")
+
+
+def defer_release(response, callback):
+    """
+    Untuk respons event_stream: jalankan `callback` saat thread pipeline selesai (bukan saat
+    respons ditutup). Return False untuk respons biasa (pemanggil melepas sendiri).
+    """
+    releases = getattr(response, 'stream_releases', None)
+    if releases is None:
+        return False
+    releases.add(callback)
+    return True
+
+
+def event_stream(make_events, on_abandon=None):
+    """
+    Response Flask text/event-stream untuk `make_events(cancel)` (generator (nama, data)).
+    `on_abandon` dipanggil jika koneksi ditutup sebelum pipeline sempat dimulai
+    (mis. untuk menghapus file upload sementara).
+    """
+    from flask import Response
+
+    stream_id = uuid.uuid4().hex
+    cancel = threading.Event()
+    events = queue.Queue()
+    state = {'started': False}
+    releases = _Releases()
+    # Salin context request supaya stage() tetap tercatat ke profil request ini
+    context = contextvars.copy_context()
+    # Ruleset yang di-pin request ini ikut tersalin ke context worker
+    ruleset_version = ruleset.active().version
+
+    def worker():
+        try:
+            for name, data in make_events(cancel):
+                events.put((name, data))
+        except Cancelled:
+            events.put(('cancelled', {'stream_id': stream_id}))
+        except Exception as e:
+            print(f"Error in stream {stream_id}: {e}")
+            events.put(('error', {'success': False, 'error': str(e)}))
+        finally:
+            events.put(None)
+            with _streams_lock:
+                _streams.pop(stream_id, None)
+            releases.run()
+
+    def generate():
+        state['started'] = True
+        with _streams_lock:
+            _streams[stream_id] = cancel
+        threading.Thread(target=context.run, args=(worker,), daemon=True).start()
+        event_id = 0
+        try:
+            yield format_event('stream', {'stream_id': stream_id, 'cancel_url': f'/api/streams/{stream_id}',
+                                          'ruleset_version': ruleset_version}, event_id)
+            while True:
+                try:
+                    item = events.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                if item is None:
+                    break
+                event_id += 1
+                yield format_event(item[0], item[1], event_id)
+        finally:
+            # Klien memutus koneksi (GeneratorExit) atau stream selesai: hentikan pipeline
+            cancel.set()
+
+    def on_close():
+        cancel.set()
+        if not state['started']:
+            # Thread pipeline tidak pernah dimulai: lepas sumber daya di sini
+            if on_abandon is not None:
+                on_abandon()
+            releases.run()
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.stream_releases = releases
+    response.call_on_close(on_close)
+    return response
+
+
+def init_app(app):
+    """Pasang endpoint pembatalan stream ke app Flask (hanya stream di proses ini, lihat docstring modul)."""
+    from flask import jsonify
+
+    @app.route('/api/streams/<stream_id>', methods=['DELETE'])
+    def cancel_stream_endpoint(stream_id):
+        if not cancel_stream(stream_id):
+            # Bisa juga stream yang berjalan di worker gunicorn lain; tutup koneksi SSE untuk membatalkannya
+            return jsonify({'success': False, 'error': 'Stream tidak ditemukan di worker ini (sudah selesai atau '
+                                                       'berjalan di worker lain; tutup koneksi SSE untuk membatalkan)'}), 404
+        return jsonify({'success': True, 'stream_id': stream_id, 'status': 'cancelling'}), 202
@@ -0,0 +1,196 @@
+"""
+Tesseract yang tetap ter-load di dalam proses (tanpa fork/exec per frame).
+
+pytesseract.image_to_string menjalankan binary `tesseract` untuk setiap frame: proses
+baru, load ulang traineddata, lalu tulis/baca file sementara. Modul ini memegang
+TessBaseAPI yang sudah di-Init sekali dan menerima array NumPy langsung (SetImage),
+jadi biaya per frame tinggal proses OCR-nya saja.
+
+Backend (env TESSERACT_BACKEND, default auto = pertama yang tersedia):
+    tesserocr    binding Cython (requirements-optional.txt)
+    capi         libtesseract lewat ctypes (C API resmi, cukup paket tesseract/libtesseract)
+    pytesseract  fallback lama: subprocess per frame
+
+TessBaseAPI tidak thread-safe, jadi tiap thread meminjam satu instance dari pool
+(maks TESSERACT_POOL_SIZE instance per proses, masing-masing puluhan MB untuk 'eng').
+Set OMP_THREAD_LIMIT=1 supaya OpenMP di dalam Tesseract tidak berebut CPU dengan
+worker lain.
+
+Latensi per frame tercatat di stage 'ocr' (engine=tesseract); bandingkan backend dengan
+    python benchmark.py --ocr --only tesseract_subprocess,tesseract_persistent
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import threading
+
+TESSERACT_BACKEND = os.environ.get('TESSERACT_BACKEND', 'auto')  # auto | tesserocr | capi | pytesseract
+TESSERACT_LANG = os.environ.get('TESSERACT_LANG', 'eng')
+TESSERACT_PSM = int(os.environ.get('TESSERACT_PSM', '6'))  # 6 = satu blok teks (sama dengan --psm 6)
+TESSERACT_POOL_SIZE = int(os.environ.get('TESSERACT_POOL_SIZE', '2'))
+TESSDATA_PREFIX = os.environ.get('TESSDATA_PREFIX')
+
+# Tanpa metadata DPI, CLI tesseract juga memakai 70 dpi ("Invalid resolution 0 dpi")
+SOURCE_RESOLUTION = 70
+
+_backend = None
+_pool = queue.LifoQueue()
+_pool_created = 0
+_pool_lock = threading.Lock()
+
+
+# ====== Backend libtesseract (ctypes) ======
+_capi = None
+
+
+def _load_capi():
+    """Load libtesseract dan deklarasikan signature C API yang dipakai (None jika tidak ada)."""
+    global _capi
+    if _capi is None:
+        names = [ctypes.util.find_library('tesseract'), 'libtesseract.so.5', 'libtesseract.so.4', 'libtesseract.dylib']
+        for name in filter(None, names):
+            try:
+                lib = ctypes.CDLL(name)
+                break
+            except OSError:
+                continue
+        else:
+            _capi = False
+            return None
+        handle = ctypes.c_void_p
+        lib.TessBaseAPICreate.restype = handle
+        lib.TessBaseAPIInit3.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPIInit3.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPISetSourceResolution.argtypes = [handle, ctypes.c_int]
+        # char* dikembalikan sebagai pointer mentah supaya bisa dibebaskan dengan TessDeleteText
+        lib.TessBaseAPIGetUTF8Text.argtypes = [handle]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIClear.argtypes = [handle]
+        lib.TessBaseAPIEnd.argtypes = [handle]
+        lib.TessBaseAPIDelete.argtypes = [handle]
+        _capi = lib
+    return _capi or None
+
+
+class _CapiEngine:
+    def __init__(self):
+        self.lib = _load_capi()
+        self.handle = self.lib.TessBaseAPICreate()
+        datapath = TESSDATA_PREFIX.encode() if TESSDATA_PREFIX else None
+        if self.lib.TessBaseAPIInit3(self.handle, datapath, TESSERACT_LANG.encode()) != 0:
+            self.lib.TessBaseAPIDelete(self.handle)
+            raise RuntimeError(f'TessBaseAPIInit3 gagal untuk bahasa {TESSERACT_LANG}')
+        self.lib.TessBaseAPISetPageSegMode(self.handle, TESSERACT_PSM)
+
+    def recognize(self, image):
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        self.lib.TessBaseAPISetImage(self.handle, image.ctypes.data, width, height,
+                                     bytes_per_pixel, image.strides[0])
+        self.lib.TessBaseAPISetSourceResolution(self.handle, SOURCE_RESOLUTION)
+        text_ptr = self.lib.TessBaseAPIGetUTF8Text(self.handle)
+        try:
+            return ctypes.string_at(text_ptr).decode('utf-8', 'replace') if text_ptr else ''
+        finally:
+            if text_ptr:
+                self.lib.TessDeleteText(text_ptr)
+            self.lib.TessBaseAPIClear(self.handle)
+
+
+# ====== Backend tesserocr ======
+class _TesserocrEngine:
+    def __init__(self):
+        from tesserocr import PyTessBaseAPI
+        kwargs = {'lang': TESSERACT_LANG, 'psm': TESSERACT_PSM}
+        if TESSDATA_PREFIX:
+            kwargs['path'] = TESSDATA_PREFIX
+        self.api = PyTessBaseAPI(**kwargs)
+
+    def recognize(self, image):
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        self.api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+        self.api.SetSourceResolution(SOURCE_RESOLUTION)
+        try:
+            return self.api.GetUTF8Text()
+        finally:
+            self.api.Clear()
+
+
+_ENGINES = {'tesserocr': _TesserocrEngine, 'capi': _CapiEngine}
+
+
+def _available(name):
+    if name == 'tesserocr':
+        try:
+            import tesserocr  # noqa: F401
+            return True
+        except (ImportError, ValueError):
+            # ValueError: cysignals (dependensi tesserocr) memasang signal handler saat import,
+            # yang hanya boleh di main thread; import pertama di thread request gthread gagal
+            return False
+    if name == 'capi':
+        return _load_capi() is not None
+    if name == 'pytesseract':
+        import shutil
+        try:
+            import pytesseract  # noqa: F401
+        except ImportError:
+            return False
+        return shutil.which('tesseract') is not None
+    return False
+
+
+def tesseract_backend():
+    """Backend yang dipakai proses ini (None jika Tesseract tidak tersedia sama sekali)."""
+    global _backend
+    if _backend is None:
+        candidates = ('tesserocr', 'capi', 'pytesseract') if TESSERACT_BACKEND == 'auto' else (TESSERACT_BACKEND,)
+        _backend = next((name for name in candidates if _available(name)), '')
+        if TESSERACT_BACKEND != 'auto' and not _backend:
+            print(f"⚠️ Backend Tesseract '{TESSERACT_BACKEND}' tidak tersedia.")
+    return _backend or None
+
+
+# ====== Pool instance TessBaseAPI ======
+def _acquire(backend):
+    global _pool_created
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        if _pool_created < TESSERACT_POOL_SIZE:
+            engine = _ENGINES[backend]()
+            _pool_created += 1
+            return engine
+    return _pool.get()
+
+
+def _prepare(image):
+    """Array uint8 C-contiguous; BGR (OpenCV) dibalik ke RGB seperti yang diharapkan Tesseract."""
+    import numpy as np
+    if image.ndim == 3:
+        image = image[:, :, :3][:, :, ::-1]
+    return np.ascontiguousarray(image, dtype=np.uint8)
+
+
+def image_to_string(image):
+    """OCR satu frame (array grayscale atau BGR) dengan --psm TESSERACT_PSM, return teks mentah."""
+    backend = tesseract_backend()
+    if backend is None:
+        raise RuntimeError('Tesseract tidak tersedia')
+    image = _prepare(image)
+    if backend == 'pytesseract':
+        import pytesseract
+        return pytesseract.image_to_string(image, lang=TESSERACT_LANG, config=f'--psm {TESSERACT_PSM}')
+
+    engine = _acquire(backend)
+    try:
+        return engine.recognize(image)
+    finally:
+        _pool.put(engine)
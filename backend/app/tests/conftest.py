@@ -0,0 +1,14 @@
+"""
+Test perilaku modul di backend/app. Jalankan dari backend/app:
+
+    python -m pytest -q tests
+
+Path model/tokenizer di modul relatif terhadap backend/app, jadi test dijalankan dari sana.
+"""
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+os.chdir(APP_DIR)
@@ -0,0 +1,94 @@
+"""admission.Pool: urutan antrian, timeout, antrian penuh dan eviction prioritas rendah."""
+import threading
+import time
+
+import pytest
+
+from admission import PRIORITIES, Pool, Rejected
+
+HIGH, NORMAL, LOW = PRIORITIES['high'], PRIORITIES['normal'], PRIORITIES['low']
+
+
+class _Waiter(threading.Thread):
+    """Thread yang antre di pool dan mencatat urutan dapat slot (atau alasan ditolak)."""
+
+    def __init__(self, pool, priority, name, order):
+        super().__init__(daemon=True)
+        self.pool = pool
+        self.priority = priority
+        self.label = name
+        self.order = order
+        self.rejected = None
+
+    def run(self):
+        try:
+            self.pool.acquire(self.priority)
+        except Rejected as e:
+            self.rejected = e.reason
+            return
+        self.order.append(self.label)
+        self.pool.release()
+
+
+def _enqueue(pool, priority, name, order):
+    waiter = _Waiter(pool, priority, name, order)
+    before = set(pool._waiters)
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while not set(pool._waiters) - before and waiter.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return waiter
+
+
+def test_waiters_are_served_by_priority_then_fifo():
+    pool = Pool('test', concurrency=1, max_queue=4, timeout=5)
+    pool.acquire()
+    order = []
+    waiters = [_enqueue(pool, LOW, 'low', order), _enqueue(pool, NORMAL, 'normal-1', order),
+               _enqueue(pool, HIGH, 'high', order), _enqueue(pool, NORMAL, 'normal-2', order)]
+    pool.release()
+    for waiter in waiters:
+        waiter.join(5)
+    assert order == ['high', 'normal-1', 'normal-2', 'low']
+    assert pool.active == 0
+
+
+def test_waiter_times_out():
+    pool = Pool('test', concurrency=1, max_queue=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(Rejected) as e:
+        pool.acquire()
+    assert e.value.reason == 'timeout'
+    assert pool.stats()['queued'] == 0
+
+
+def test_full_queue_rejects_same_or_lower_priority():
+    pool = Pool('test', concurrency=1, max_queue=1, timeout=5)
+    pool.acquire()
+    order = []
+    waiter = _enqueue(pool, NORMAL, 'normal', order)
+    for priority in (NORMAL, LOW):
+        with pytest.raises(Rejected) as e:
+            pool.acquire(priority)
+        assert e.value.reason == 'queue_full'
+    pool.release()
+    waiter.join(5)
+    assert order == ['normal']
+
+
+def test_high_priority_evicts_newest_lowest_priority_waiter():
+    pool = Pool('test', concurrency=1, max_queue=3, timeout=5)
+    pool.acquire()
+    order = []
+    normal = _enqueue(pool, NORMAL, 'normal', order)
+    low_old = _enqueue(pool, LOW, 'low-old', order)
+    low_new = _enqueue(pool, LOW, 'low-new', order)
+    high = _enqueue(pool, HIGH, 'high', order)
+    low_new.join(5)
+    assert low_new.rejected == 'evicted'
+    assert pool.stats()['queued'] == 3
+    pool.release()
+    for waiter in (normal, low_old, high):
+        waiter.join(5)
+    assert order == ['high', 'normal', 'low-old']
+    assert low_old.rejected is None
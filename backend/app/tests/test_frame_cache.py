@@ -0,0 +1,66 @@
+"""frame_cache.py: banner dengan layout sama tapi kata berbeda tidak boleh jadi hit."""
+import cv2
+import numpy as np
+import pytest
+
+import frame_cache
+
+
+def _banner(text, scale, noise=0, jpeg=None, size=(720, 1280)):
+    """Banner putih berbingkai dengan satu baris teks, seperti end-card setelah preprocess_frame."""
+    image = np.full(size + (3,), 255, np.uint8)
+    cv2.rectangle(image, (20, 20), (size[1] - 20, size[0] - 20), (0, 0, 200), 4)
+    cv2.putText(image, text, (40, size[0] // 2), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 3)
+    if noise:
+        rng = np.random.default_rng(noise)
+        image = np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+    if jpeg:
+        _, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, jpeg])
+        image = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+    return image
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return frame_cache.FrameOCRCache(path=str(tmp_path / 'cache.sqlite3'))
+
+
+def _put(cache, image, texts):
+    value, thumb, mask = frame_cache.signature(image)
+    cache.put('frame', value, thumb, mask, texts)
+
+
+def _get(cache, image):
+    return cache.get('frame', *frame_cache.signature(image))
+
+
+@pytest.mark.parametrize('stored, other, scale', [
+    ('Promo kopi murah', 'Promo slot murah', 2.0),
+    ('DAFTAR SLOT GACOR MAXWIN', 'DAFTAR BOLA GACOR MAXWIN', 2.0),
+    ('Bonus 100% hari ini', 'Bonus 200% hari ini', 2.0),
+])
+def test_same_layout_different_word_is_miss(cache, stored, other, scale):
+    a, b = _banner(stored, scale), _banner(other, scale)
+    value_a, thumb_a, _ = frame_cache.signature(a)
+    value_b, thumb_b, _ = frame_cache.signature(b)
+    # pHash dan thumbnail 64x36 saja tidak bisa membedakan kedua banner
+    assert frame_cache.hamming(value_a, value_b) <= cache.max_distance
+    assert frame_cache.thumbnail_diff(thumb_a, thumb_b) <= cache.max_diff
+
+    _put(cache, a, [stored])
+    assert _get(cache, b) is None
+    assert _get(cache, a) == [stored]
+
+
+@pytest.mark.parametrize('noise, jpeg', [(5, 80), (10, 40)])
+def test_reencoded_frame_is_hit(cache, noise, jpeg):
+    _put(cache, _banner('DAFTAR SLOT GACOR MAXWIN', 2.0), ['DAFTAR SLOT GACOR MAXWIN'])
+    assert _get(cache, _banner('DAFTAR SLOT GACOR MAXWIN', 2.0, noise, jpeg)) == ['DAFTAR SLOT GACOR MAXWIN']
+
+
+def test_layout_change_drops_old_table(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    old = frame_cache.FrameOCRCache(path=path, max_distance=3)
+    _put(old, _banner('Promo slot murah', 2.0), ['Promo slot murah'])
+    new = frame_cache.FrameOCRCache(path=path)
+    assert new.stats()['entries'] == 0
@@ -0,0 +1,65 @@
+"""fuzzy_index.py + detector.normalize_ocr_text: kata biasa tidak boleh menjadi keyword judi."""
+import pytest
+
+import detector
+from fuzzy_index import FuzzyIndex
+
+
+@pytest.mark.parametrize('word', ['angkat', 'deposito', 'bolak', 'polar', 'casing', 'sloth', 'judul', 'loker',
+                                  'bones', 'inline', 'shatter', 'letting'])
+def test_ordinary_words_are_not_rewritten(word):
+    assert detector.normalize_ocr_text(word) == word
+
+
+@pytest.mark.parametrize('text', [
+    'angkat barang ke gudang',
+    'bunga deposito bank naik',
+    'jalan bolak balik',
+    'kutub polar utara',
+    'casing hp baru',
+])
+def test_ordinary_sentences_have_no_gambling_keywords(text):
+    assert not detector.find_gambling_keywords_in_text(detector.normalize_ocr_text(text))
+
+
+@pytest.mark.parametrize('token, expected', [
+    ('5l0t', 'slot'),
+    ('sl0t', 'slot'),
+    ('b0nus', 'bonus'),
+    ('slot88', 'slot88'),
+    ('bonos', 'bonus'),
+    ('depasit', 'deposit'),
+    ('jackpat', 'jackpot'),
+    ('scater', 'scatter'),
+])
+def test_ocr_damage_is_still_corrected(token, expected):
+    assert detector.normalize_ocr_text(token) == expected
+
+
+# Tabel koreksi lama di normalize_ocr_text sebelum indeks fuzzy
+@pytest.mark.parametrize('token, expected', [
+    ('rpee8', 'rp888'),
+    ('rpeeb', 'rp888'),
+    ('rpeebcc', 'rp888'),
+    ('rpenib', 'rp888'),
+    ('hemmember', 'newmember'),
+    ('kekalahai', 'kekalahan'),
+    ('ratub', 'ratu89'),
+    ('jonus', 'bonus'),
+    ('ekeo', 'depo'),
+    ('wuib9', 'judi89'),
+    ('sirusslot', 'situs slot'),
+    ('tkunbaru', 'akunbaru'),
+])
+def test_old_corrections_table_still_applies(token, expected):
+    assert detector.normalize_ocr_text(token) == expected
+
+
+def test_corrections_match_exactly_and_known_words_are_kept():
+    index = FuzzyIndex(['casino', 'rp888'], is_known_word=lambda token: token == 'casing',
+                       corrections={'rpee8': 'rp888'})
+    assert index.correct('casing') == 'casing'
+    assert index.correct('casinp') == 'casino'
+    assert index.correct('RPEEB') == 'rp888'
+    # Alias tidak ikut jarak edit
+    assert index.correct('rpee88') == 'rpee88'
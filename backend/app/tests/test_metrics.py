@@ -0,0 +1,45 @@
+"""metrics.py: /metrics menjumlahkan snapshot semua proses jika METRICS_DIR di-set."""
+import os
+import re
+
+import pytest
+
+import metrics
+
+
+def _value(text, name):
+    match = re.search(rf'^{re.escape(name)} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_render_sums_workers_and_keeps_dead_counters(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    counter = metrics.Counter('test_jobs_total', 'test', ('kind',))
+    gauge = metrics.Gauge('test_busy', 'test')
+    try:
+        counter.inc(2, kind='a')
+        gauge.inc()
+        pid = os.fork()
+        if pid == 0:
+            # "Worker" lain: mulai dari nol seperti setelah fork gunicorn
+            metrics._reset_after_fork()
+            counter.inc(5, kind='a')
+            gauge.inc(3)
+            metrics.flush()
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        text = metrics.render()
+        assert _value(text, 'test_jobs_total{kind="a"}') == 7
+        assert _value(text, 'test_busy') == 4
+
+        # Worker di-recycle: counter tetap terhitung, gauge-nya dibuang
+        metrics.mark_process_dead(pid)
+        assert not os.path.exists(os.path.join(str(tmp_path), f'{pid}.json'))
+        text = metrics.render()
+        assert _value(text, 'test_jobs_total{kind="a"}') == 7
+        assert _value(text, 'test_busy') == 1
+    finally:
+        metrics.REGISTRY.remove(counter)
+        metrics.REGISTRY.remove(gauge)
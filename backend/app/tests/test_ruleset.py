@@ -0,0 +1,77 @@
+"""ruleset.py: watcher per proses setelah fork dan reload admin yang diteruskan ke worker lain."""
+import json
+import os
+import time
+
+import pytest
+from flask import Flask
+
+import ruleset
+
+
+def _write(path, version, keywords=('slot', 'gacor')):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'version': version, 'keywords': list(keywords)}, f)
+    os.replace(tmp, path)
+
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'rules.json')
+    _write(path, 'v1')
+    monkeypatch.setattr(ruleset, 'RULESET_PATH', path)
+    monkeypatch.setattr(ruleset, 'RULESET_POLL_SECONDS', 0.05)
+    monkeypatch.setattr(ruleset, '_active', None)
+    monkeypatch.setattr(ruleset, '_file_state', None)
+    monkeypatch.setattr(ruleset, '_last_error', None)
+    monkeypatch.setattr(ruleset, '_watcher', None)
+    return path
+
+
+def _wait_for_version(version, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if ruleset.loaded_version() == version:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_watcher_runs_in_forked_worker(rules_file):
+    # "Master" (preload) memulai watcher, lalu worker di-fork seperti gunicorn
+    ruleset.start_watcher()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            stale = ruleset.status()['watching']
+            ruleset.start_watcher()  # post_fork
+            seen = _wait_for_version('v2')
+            os.write(write_fd, json.dumps([stale, seen, ruleset.status()['watching']]).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    time.sleep(0.2)
+    _write(rules_file, 'v2', ('slot', 'gacor', 'maxwin'))
+    with os.fdopen(read_fd) as f:
+        stale, seen, watching = json.loads(f.read())
+    os.waitpid(pid, 0)
+    # Thread master tidak ada di worker; watcher baru di worker melihat file v2
+    assert stale is False
+    assert watching is True
+    assert seen is True
+
+
+def test_admin_reload_touches_file_for_other_workers(rules_file, monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'rahasia')
+    app = Flask(__name__)
+    ruleset.init_app(app)
+    before = os.stat(rules_file).st_mtime_ns
+    time.sleep(0.01)
+    response = app.test_client().post('/admin/ruleset/reload', headers={'X-Admin-Token': 'rahasia'})
+    assert response.status_code == 200
+    assert response.get_json()['broadcast'] is True
+    assert os.stat(rules_file).st_mtime_ns > before
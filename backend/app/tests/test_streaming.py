@@ -0,0 +1,49 @@
+"""streaming.py: sumber daya request SSE dilepas saat thread pipeline selesai, bukan saat koneksi ditutup."""
+import threading
+import time
+
+from flask import Flask
+
+import admission
+import metrics
+import streaming
+
+
+def test_resources_released_when_pipeline_thread_exits(monkeypatch):
+    monkeypatch.setattr(admission, '_scheduler', None)
+    app = Flask(__name__)
+    metrics.init_app(app)
+    admission.init_app(app)
+    ocr_running = threading.Event()
+    ocr_done = threading.Event()
+
+    @app.route('/api/detect-video/stream', methods=['POST'])
+    def detect_video_stream():
+        def events(cancel):
+            yield 'video_info', {}
+            # "OCR" satu frame yang tidak bisa dibatalkan di tengah
+            ocr_running.set()
+            ocr_done.wait(10)
+            yield 'frame', {}
+        return streaming.event_stream(events)
+
+    in_flight = metrics.IN_FLIGHT.labels(endpoint='detect_video_stream')
+    heavy = admission.get_scheduler().pools['heavy']
+    before = in_flight.value
+
+    response = app.test_client().post('/api/detect-video/stream', buffered=False)
+    body = iter(response.response)
+    next(body)  # event 'stream'
+    assert ocr_running.wait(5)
+    response.close()  # klien menutup koneksi saat OCR masih berjalan
+
+    assert in_flight.value == before + 1
+    assert heavy.stats()['active'] == 1
+
+    ocr_done.set()
+    deadline = time.monotonic() + 5
+    while heavy.stats()['active'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert in_flight.value == before
+    assert heavy.stats()['active'] == 0
@@ -0,0 +1,80 @@
+"""url_service.py: fetch membaca body penuh (sampai URL_MAX_BYTES) dan detect-web tanpa model."""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+import url_service
+import viewsource
+
+
+async def _serve_chunked(handler, check):
+    app = web.Application()
+    app.router.add_get('/page', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await check(session, f'http://127.0.0.1:{port}/page')
+    finally:
+        await runner.cleanup()
+
+
+def _chunked_page(chunks, chunk_size):
+    async def handler(request):
+        response = web.StreamResponse(headers={'Content-Type': 'text/html; charset=utf-8'})
+        await response.prepare(request)
+        for i in range(chunks):
+            await response.write(bytes([ord('a') + i % 26]) * chunk_size)
+            await asyncio.sleep(0.001)
+        await response.write_eof()
+        return response
+    return handler
+
+
+def test_fetch_reads_whole_chunked_body():
+    async def check(session, url):
+        return await url_service.fetch(session, url, 10, {})
+
+    status, html = asyncio.run(_serve_chunked(_chunked_page(200, 1024), check))
+    assert status == 200
+    assert len(html) == 200 * 1024
+    assert html.endswith('r' * 1024)  # chunk terakhir (indeks 199) ikut terbaca
+
+
+def test_fetch_caps_body_at_max_bytes(monkeypatch):
+    monkeypatch.setattr(url_service, 'URL_MAX_BYTES', 5000)
+
+    async def check(session, url):
+        return await url_service.fetch(session, url, 10, {})
+
+    _, html = asyncio.run(_serve_chunked(_chunked_page(20, 1024), check))
+    assert len(html) == 5000
+
+
+def test_detect_web_without_model_returns_503(monkeypatch):
+    monkeypatch.setattr(viewsource, '_web_scorer', None)
+    monkeypatch.setattr(viewsource, '_web_scorer_loaded', False)
+    monkeypatch.setattr(viewsource, 'WEB_MODEL_PATH', 'tidak-ada.h5')
+
+    async def run():
+        app = url_service.create_app()
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f'http://127.0.0.1:{port}/api/detect-web',
+                                        json={'url': 'http://127.0.0.1:1/'}) as response:
+                    return response.status, await response.json()
+        finally:
+            await runner.cleanup()
+
+    status, body = asyncio.run(run())
+    assert status == 503
+    assert body['success'] is False
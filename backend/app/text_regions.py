@@ -0,0 +1,87 @@
+"""
+Proposal region teks yang cepat (OpenCV, berbasis gradien) sebelum OCR.
+
+Alur: decode sekali -> batasi resolusi -> gradien morfologi + Otsu -> closing
+horizontal supaya huruf menyatu jadi baris -> kontur -> filter ukuran/rasio/kepadatan
+-> gabungkan kotak yang bertumpuk. Hasilnya kotak [x_min, x_max, y_min, y_max]
+(format `horizontal_list` EasyOCR) yang bisa langsung dikirim ke `reader.recognize`
+tanpa menjalankan detector CRAFT di seluruh gambar.
+"""
+import cv2
+import numpy as np
+
+MAX_IMAGE_SIDE = 1600
+MAX_REGIONS = 64
+
+
+def decode_image(image_bytes, max_side=MAX_IMAGE_SIDE):
+    """Decode bytes gambar ke array BGR, diperkecil jika sisi terpanjang > max_side."""
+    buf = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('Format gambar tidak dikenali')
+    height, width = image.shape[:2]
+    longest = max(height, width)
+    if longest > max_side:
+        scale = max_side / longest
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def _merge_boxes(boxes):
+    """Gabungkan kotak yang saling bertumpuk (kotak dalam format x0, y0, x1, y1)."""
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        while boxes:
+            x0, y0, x1, y1 = boxes.pop()
+            i = 0
+            while i < len(boxes):
+                a0, b0, a1, b1 = boxes[i]
+                if a0 <= x1 and x0 <= a1 and b0 <= y1 and y0 <= b1:
+                    x0, y0, x1, y1 = min(x0, a0), min(y0, b0), max(x1, a1), max(y1, b1)
+                    boxes.pop(i)
+                    merged = True
+                else:
+                    i += 1
+            result.append((x0, y0, x1, y1))
+        boxes = result
+    return boxes
+
+
+def propose_text_regions(image, max_regions=MAX_REGIONS, pad=4):
+    """
+    Return list kotak [x_min, x_max, y_min, y_max] yang kemungkinan berisi teks,
+    urut dari atas ke bawah lalu kiri ke kanan. List kosong berarti tidak ada teks.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height, width = gray.shape
+
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    # Kernel horizontal sebanding ukuran gambar supaya huruf dalam satu baris menyatu
+    kernel_w = max(9, width // 60)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_w, 3)))
+    contours, _ = cv2.findContours(connected, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_h = max(8, height // 100)
+    max_h = height * 0.5
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < min_h or h > max_h or w < min_h:
+            continue
+        if w / h < 1.2 and w < 3 * min_h:
+            continue  # noda kecil/kotak hampir persegi, bukan baris teks
+        fill = cv2.countNonZero(binary[y:y + h, x:x + w]) / float(w * h)
+        if fill < 0.06 or fill > 0.95:
+            continue  # terlalu jarang (garis tipis) atau terlalu penuh (blok warna)
+        boxes.append((max(0, x - pad), max(0, y - pad), min(width, x + w + pad), min(height, y + h + pad)))
+
+    boxes = _merge_boxes(boxes)
+    # Prioritaskan region terbesar jika melebihi batas, lalu urutkan seperti urutan baca
+    boxes = sorted(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)[:max_regions]
+    boxes.sort(key=lambda b: (b[1] // max(1, min_h * 2), b[0]))
+    return [[x0, x1, y0, y1] for x0, y0, x1, y1 in boxes]
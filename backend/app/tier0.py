@@ -0,0 +1,301 @@
+"""
+Tier-0: klasifier linear n-gram ber-hash di depan model RNN.
+
+Teks tanpa keyword (detect-text, detect-image) selalu jatuh ke RNN, padahal sebagian
+besar jelas bukan iklan judi. Tier-0 memberi skor dalam < 1 ms (RNN puluhan ms):
+
+    fitur  = hashing trick atas unigram + bigram kata dan trigram karakter per kata
+             (crc32 -> indeks mod N_FEATURES, bit tanda untuk meredam tabrakan hash)
+    skor   = sigmoid(bias + sum(w[indeks] * tanda) / sqrt(jumlah fitur))
+
+Probabilitas < TIER0_BENIGN_BELOW langsung dijawab "tidak judi", > TIER0_GAMBLING_ABOVE
+langsung "judi"; hanya pita di antaranya yang dieskalasi ke RNN. Tanpa file model
+(TIER0_MODEL_PATH) atau dengan TIER0=0 semua teks tetap ke RNN seperti semula.
+
+Model dilatih offline dari data berlabel yang sama dengan RNN (CSV/JSONL, kolom teks dan
+label 0/1), memakai matriks sparse SciPy (CSR) dan mini-batch Adagrad:
+    python tier0.py train data.csv --text-column text --label-column label -o tier0_model.npz
+    python tier0.py evaluate data_uji.csv      # akurasi & tingkat eskalasi per threshold
+
+Per endpoint dicatat di /metrics:
+    risetjudi_tier0_decisions_total{endpoint, decision=benign|gambling|escalated|uncertain}
+    risetjudi_tier0_saved_seconds_total{endpoint}   estimasi waktu RNN yang tidak dijalankan
+Tingkat eskalasi = escalated / semua keputusan. Waktu hemat dihitung dari rata-rata
+bergerak latensi RNN endpoint itu dikurangi latensi tier-0 (uncertain = pita tidak pasti
+tapi model RNN tidak ada, jadi skor tier-0 yang dipakai).
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from metrics import TIER0_DECISIONS, TIER0_SAVED_SECONDS, stage
+
+TIER0 = os.environ.get('TIER0', '1') != '0'
+TIER0_MODEL_PATH = os.environ.get('TIER0_MODEL_PATH', 'tier0_model.npz')
+TIER0_BENIGN_BELOW = float(os.environ.get('TIER0_BENIGN_BELOW', '0.05'))
+TIER0_GAMBLING_ABOVE = float(os.environ.get('TIER0_GAMBLING_ABOVE', '0.95'))
+
+N_FEATURES = 1 << 18
+MAX_TOKENS = 400
+# Bobot rata-rata bergerak latensi RNN (estimasi waktu yang dihemat)
+_EWMA_ALPHA = 0.1
+
+_WORD_RE = re.compile(r'\w+')
+
+_model = None
+_model_loaded = False
+_rnn_seconds = {}
+_rnn_lock = threading.Lock()
+
+
+# ====== Fitur Hashing ======
+def _grams(text, max_tokens):
+    tokens = _WORD_RE.findall(text.lower())[:max_tokens]
+    grams = {'w:' + token for token in tokens}
+    grams.update('b:' + a + ' ' + b for a, b in zip(tokens, tokens[1:]))
+    for token in set(tokens):
+        padded = '<' + token + '>'
+        grams.update('c:' + padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def hashed_features(text, n_features=N_FEATURES, max_tokens=MAX_TOKENS):
+    """(indeks int64, nilai float32) fitur ter-hash satu teks, nilai sudah dinormalisasi L2."""
+    hashes = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in _grams(text, max_tokens)), dtype=np.uint32)
+    if not len(hashes):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices = (hashes & np.uint32(n_features - 1)).astype(np.int64)
+    values = np.where(hashes >> np.uint32(31), -1.0, 1.0).astype(np.float32) / np.float32(math.sqrt(len(hashes)))
+    return indices, values
+
+
+def feature_matrix(texts, n_features=N_FEATURES, max_tokens=MAX_TOKENS):
+    """Matriks CSR (jumlah teks x n_features) untuk training/evaluasi batch."""
+    from scipy import sparse
+    indptr = [0]
+    indices = []
+    values = []
+    for text in texts:
+        idx, val = hashed_features(text, n_features, max_tokens)
+        indices.append(idx)
+        values.append(val)
+        indptr.append(indptr[-1] + len(idx))
+    matrix = sparse.csr_matrix(
+        (np.concatenate(values) if values else np.zeros(0, dtype=np.float32),
+         np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+         np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, n_features), dtype=np.float32)
+    # Indeks yang sama (tabrakan hash) dijumlahkan
+    matrix.sum_duplicates()
+    return matrix
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+# ====== Model Linear ======
+class LinearModel:
+    """Regresi logistik atas fitur ter-hash (bobot float32 padat, ~1 MB untuk 2^18 fitur)."""
+
+    def __init__(self, weights, bias, max_tokens=MAX_TOKENS):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.n_features = len(self.weights)
+        self.max_tokens = max_tokens
+
+    def predict_proba(self, text):
+        indices, values = hashed_features(text, self.n_features, self.max_tokens)
+        z = self.bias + float(np.dot(self.weights[indices], values))
+        return float(_sigmoid(z))
+
+    def predict_proba_batch(self, texts):
+        matrix = feature_matrix(texts, self.n_features, self.max_tokens)
+        return _sigmoid(matrix @ self.weights + self.bias)
+
+    def save(self, path):
+        np.savez_compressed(path, weights=self.weights, bias=np.float32(self.bias),
+                            max_tokens=np.int64(self.max_tokens))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['weights'], float(data['bias']), int(data['max_tokens']))
+
+
+def train(texts, labels, n_features=N_FEATURES, epochs=5, batch_size=256, learning_rate=0.5, l2=1e-6, seed=0):
+    """Latih LinearModel dengan mini-batch Adagrad (log loss + L2)."""
+    matrix = feature_matrix(texts, n_features)
+    y = np.asarray(labels, dtype=np.float32)
+    weights = np.zeros(n_features, dtype=np.float32)
+    squared = np.full(n_features, 1e-8, dtype=np.float32)
+    bias = 0.0
+    bias_squared = 1e-8
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        order = rng.permutation(len(y))
+        loss = 0.0
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            batch = matrix[rows]
+            p = _sigmoid(batch @ weights + bias)
+            error = (p - y[rows]).astype(np.float32)
+            loss += float(-np.sum(y[rows] * np.log(p + 1e-9) + (1 - y[rows]) * np.log(1 - p + 1e-9)))
+            # Gradien hanya menyentuh kolom yang muncul di batch ini
+            columns = np.unique(batch.indices)
+            gradient = np.asarray(batch.T @ error).ravel()[columns] / len(rows) + l2 * weights[columns]
+            squared[columns] += gradient * gradient
+            weights[columns] -= learning_rate * gradient / np.sqrt(squared[columns])
+            bias_gradient = float(error.mean())
+            bias_squared += bias_gradient * bias_gradient
+            bias -= learning_rate * bias_gradient / math.sqrt(bias_squared)
+        print(f"epoch {epoch + 1}/{epochs}: log loss {loss / max(len(y), 1):.4f}", file=sys.stderr)
+    return LinearModel(weights, bias)
+
+
+def evaluate(probabilities, labels, benign_below=TIER0_BENIGN_BELOW, gambling_above=TIER0_GAMBLING_ABOVE):
+    """Akurasi keputusan tier-0 dan tingkat eskalasi untuk satu pasang threshold."""
+    probabilities = np.asarray(probabilities)
+    y = np.asarray(labels, dtype=bool)
+    benign = probabilities < benign_below
+    gambling = probabilities > gambling_above
+    decided = benign | gambling
+    correct = (benign & ~y) | (gambling & y)
+    total = len(y)
+    return {
+        'benign_below': benign_below,
+        'gambling_above': gambling_above,
+        'samples': total,
+        'escalation_rate': round(float(1 - decided.mean()), 4) if total else 0.0,
+        'decided_accuracy': round(float(correct.sum() / decided.sum()), 4) if decided.any() else None,
+        'false_benign': int((benign & y).sum()),
+        'false_gambling': int((gambling & ~y).sum()),
+        'overall_accuracy': round(float(((probabilities > 0.5) == y).mean()), 4) if total else None,
+    }
+
+
+# ====== Runtime ======
+def get_model():
+    """Load model tier-0 sekali (None jika TIER0=0 atau file tidak ada)."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        if TIER0 and os.path.exists(TIER0_MODEL_PATH):
+            _model = LinearModel.load(TIER0_MODEL_PATH)
+            print(f"✅ Tier-0 classifier loaded ({_model.n_features} fitur).")
+        _model_loaded = True
+    return _model
+
+
+def status():
+    if not TIER0:
+        return 'disabled'
+    if not _model_loaded:
+        return 'not_loaded'
+    return 'loaded' if _model is not None else 'missing'
+
+
+def classify(text):
+    """
+    (probabilitas, keputusan) dengan keputusan 'benign', 'gambling' atau 'uncertain';
+    (None, None) jika tier-0 tidak aktif.
+    """
+    model = get_model()
+    if model is None:
+        return None, None
+    with stage('tier0'):
+        probability = model.predict_proba(text)
+    if probability < TIER0_BENIGN_BELOW:
+        return probability, 'benign'
+    if probability > TIER0_GAMBLING_ABOVE:
+        return probability, 'gambling'
+    return probability, 'uncertain'
+
+
+def record(endpoint, decision, tier0_seconds, rnn_seconds=None):
+    """Catat keputusan tier-0 dan estimasi waktu RNN yang dihemat untuk endpoint ini."""
+    TIER0_DECISIONS.inc(endpoint=endpoint, decision=decision)
+    with _rnn_lock:
+        if rnn_seconds is not None:
+            # '*' = rata-rata semua endpoint, dipakai sampai endpoint ini punya eskalasi sendiri
+            for key in (endpoint, '*'):
+                previous = _rnn_seconds.get(key)
+                _rnn_seconds[key] = rnn_seconds if previous is None else (
+                    previous + _EWMA_ALPHA * (rnn_seconds - previous))
+            return
+        average = _rnn_seconds.get(endpoint, _rnn_seconds.get('*'))
+    if decision in ('benign', 'gambling') and average is not None:
+        TIER0_SAVED_SECONDS.inc(max(average - tier0_seconds, 0.0), endpoint=endpoint)
+
+
+# ====== CLI ======
+LABEL_TRUE = {'1', 'true', 'yes', 'judi', 'gambling', 'positive'}
+
+
+def read_labeled(path, text_column, label_column):
+    """Iterasi (teks, label 0/1) dari CSV atau JSONL."""
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.jsonl'):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(f)
+        for row in rows:
+            text = row.get(text_column)
+            label = str(row.get(label_column, '')).strip().lower()
+            if not text or not label:
+                continue
+            try:
+                yield text, int(float(label) > 0)
+            except ValueError:
+                yield text, int(label in LABEL_TRUE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Latih / evaluasi klasifier tier-0 (n-gram ber-hash + linear).')
+    parser.add_argument('command', choices=('train', 'evaluate'))
+    parser.add_argument('data', help='CSV/JSONL berlabel')
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--label-column', default='label')
+    parser.add_argument('-o', '--model', default=TIER0_MODEL_PATH, help='file model .npz')
+    parser.add_argument('--features-log2', type=int, default=18, help='jumlah fitur = 2^n (hanya train)')
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--learning-rate', type=float, default=0.5)
+    parser.add_argument('--l2', type=float, default=1e-6)
+    parser.add_argument('--benign-below', type=float, default=TIER0_BENIGN_BELOW)
+    parser.add_argument('--gambling-above', type=float, default=TIER0_GAMBLING_ABOVE)
+    args = parser.parse_args(argv)
+
+    rows = list(read_labeled(args.data, args.text_column, args.label_column))
+    if not rows:
+        parser.error(f'tidak ada baris berlabel di {args.data}')
+    texts, labels = zip(*rows)
+
+    if args.command == 'train':
+        started = time.perf_counter()
+        model = train(texts, labels, n_features=1 << args.features_log2, epochs=args.epochs,
+                      learning_rate=args.learning_rate, l2=args.l2)
+        model.save(args.model)
+        print(f"Model disimpan ke {args.model} ({len(texts)} teks, {time.perf_counter() - started:.1f} detik)",
+              file=sys.stderr)
+    else:
+        model = LinearModel.load(args.model)
+
+    probabilities = model.predict_proba_batch(texts)
+    report = {'thresholds': evaluate(probabilities, labels, args.benign_below, args.gambling_above)}
+    # Perbandingan beberapa lebar pita supaya threshold bisa dipilih dari data
+    report['bands'] = [evaluate(probabilities, labels, low, 1 - low) for low in (0.01, 0.02, 0.05, 0.1, 0.2, 0.3)]
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
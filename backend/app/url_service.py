@@ -0,0 +1,324 @@
+"""
+Service async untuk endpoint yang mengambil URL: /api/detect-url, /api/detect-web, /api/fetch-webpage.
+
+Host judi sering lambat atau sengaja menahan koneksi (tarpit). Di app.py / app1.py satu
+fetch memegang satu thread gthread sampai 15-25 detik, jadi beberapa URL lambat saja
+sudah menghabiskan thread worker. Di service ini fetch berjalan di satu event loop
+asyncio (aiohttp): ribuan fetch lambat bisa menunggu bersamaan di satu thread, dan
+hanya bagian CPU (parse HTML, scan keyword, inferensi model) yang dikirim ke thread
+pool kecil (URL_CPU_WORKERS).
+
+    python url_service.py --port 5001                                      # jalankan service
+    python url_service.py --bench --target http://127.0.0.1:5001 --requests 500 --delay 5
+
+gunicorn.conf.py otomatis menjalankan service ini jika URL_SERVICE=1. Reverse proxy
+meneruskan path URL ke service, mis. nginx:
+
+    location ~ ^/api/(detect-url|detect-web|fetch-webpage) { proxy_pass http://127.0.0.1:5001; }
+
+Endpoint Flask yang lama tetap ada sebagai fallback (mis. `python app.py` saat development).
+Respons sama dengan versi Flask (pipeline.analyze_url_content dan viewsource.py), termasuk
+ruleset_version. detect-web memakai model yang sama dengan app1.py (viewsource.get_web_scorer:
+rnn_model.h5 + tokenizer.pkl, maxlen 100); jika file model tidak ada, detect-web menjawab 503
+alih-alih memberi skor 0. Body halaman dibatasi URL_MAX_BYTES dan jumlah koneksi keluar
+URL_MAX_CONNECTIONS. /healthz dan /metrics (format sama dengan app.py) juga tersedia.
+
+--bench menjalankan loadtest.MockSite dengan delay (pengganti host tarpit) lalu mengirim
+N request detect-url sekaligus ke --target; bisa diarahkan ke app.py untuk perbandingan.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp import web
+
+import ruleset
+from metrics import CONTENT_TYPE, IN_FLIGHT, REQUEST_SECONDS, render, stage
+from pipeline import URL_FETCH_HEADERS, analyze_url_content
+from viewsource import (
+    DETECT_WEB_TIMEOUT, FETCH_WEBPAGE_TIMEOUT, WEB_FETCH_HEADERS, analyze_webpage, get_web_scorer, normalize_web_url,
+    webpage_content,
+)
+
+URL_SERVICE_HOST = os.environ.get('URL_SERVICE_HOST', '127.0.0.1')
+URL_SERVICE_PORT = int(os.environ.get('URL_SERVICE_PORT', '5001'))
+URL_CPU_WORKERS = int(os.environ.get('URL_CPU_WORKERS', '0'))  # 0 = jumlah CPU
+URL_MAX_CONNECTIONS = int(os.environ.get('URL_MAX_CONNECTIONS', '2000'))
+URL_MAX_BYTES = int(os.environ.get('URL_MAX_BYTES', str(5 * 1024 * 1024)))
+DETECT_URL_TIMEOUT = 15
+
+_CPU_POOL = web.AppKey('cpu_pool', ThreadPoolExecutor)
+_SESSION = web.AppKey('session', aiohttp.ClientSession)
+_STATE = web.AppKey('state', dict)
+
+
+# ====== Fetch & CPU offload ======
+async def fetch(session, url, timeout, headers, raise_for_status=False):
+    """GET `url` tanpa memblokir event loop; return (status HTTP, HTML). Body dipotong di URL_MAX_BYTES."""
+    with stage('fetch'):
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout),
+                               allow_redirects=True, raise_for_status=raise_for_status) as response:
+            # content.read(n) hanya mengembalikan isi buffer saat itu, jadi baca per chunk sampai EOF
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                body += chunk[:URL_MAX_BYTES - len(body)]
+                if len(body) >= URL_MAX_BYTES:
+                    break
+            try:
+                encoding = response.get_encoding()
+            except RuntimeError:
+                encoding = 'utf-8'
+    try:
+        return response.status, body.decode(encoding, errors='replace')
+    except LookupError:
+        # charset di header tidak dikenal Python
+        return response.status, body.decode('utf-8', errors='replace')
+
+
+def _fetch_error(e):
+    # asyncio.TimeoutError tidak punya pesan
+    return str(e) or type(e).__name__
+
+
+async def run_cpu(request, func, *args):
+    """
+    Jalankan bagian CPU di thread pool dengan satu versi ruleset (di-pin seperti request
+    Flask); return (hasil, versi ruleset).
+    """
+    def pinned_call():
+        with ruleset.pinned() as active:
+            return func(*args), active.version
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[_CPU_POOL], contextvars.copy_context().run, pinned_call)
+
+
+def _json(data, status=200, version=None):
+    response = web.json_response(data, status=status)
+    if version is not None:
+        response.headers['X-Ruleset-Version'] = version
+    return response
+
+
+def _with_version(result, version):
+    if isinstance(result, dict):
+        result['ruleset_version'] = version
+    return result
+
+
+# ====== Endpoint ======
+async def detect_url(request):
+    try:
+        data = await request.json()
+        url = data.get('url', '').strip()
+        if not url:
+            return _json({'success': False, 'error': 'URL tidak boleh kosong'}, 400)
+
+        # Fetch halaman gagal / konten terlalu sedikit -> ValueError, sama seperti pipeline.analyze_url
+        try:
+            try:
+                status, html = await fetch(request.app[_SESSION], url, DETECT_URL_TIMEOUT, URL_FETCH_HEADERS)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise ValueError(f'Tidak dapat mengakses URL: {_fetch_error(e)}')
+            result, version = await run_cpu(request, analyze_url_content, url, status, html)
+            return _json(_with_version(result, version), version=version)
+        except ValueError as e:
+            return _json({'success': False, 'error': str(e)}, 500)
+
+    except Exception as e:
+        return _json({'success': False, 'error': f'Kesalahan Server: {str(e)}'}, 500)
+
+
+async def detect_web(request):
+    data = await request.json()
+    url = data.get('url', '')
+    if not url:
+        return _json({'error': 'URL tidak boleh kosong'}, 400)
+
+    # Load model pertama kali di thread pool (TensorFlow tidak boleh memblokir event loop)
+    score = await asyncio.get_running_loop().run_in_executor(request.app[_CPU_POOL], get_web_scorer)
+    if score is None:
+        return _json({'success': False, 'error': 'Model detect-web tidak tersedia di server'}, 503)
+
+    try:
+        url = normalize_web_url(url)
+        print(f"Memproses URL: {url}")
+        _, html = await fetch(request.app[_SESSION], url, DETECT_WEB_TIMEOUT, WEB_FETCH_HEADERS,
+                              raise_for_status=True)
+        (result, status), version = await run_cpu(request, analyze_webpage, url, html, score)
+        return _json(_with_version(result, version), status, version)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return _json({'success': False, 'error': f'Gagal mengambil halaman web: {_fetch_error(e)}'}, 400)
+    except Exception as e:
+        return _json({'success': False, 'error': f'Error: {str(e)}'}, 400)
+
+
+async def fetch_webpage(request):
+    url = request.query.get('url')
+    if not url:
+        return _json({'success': False, 'error': 'URL tidak boleh kosong'}, 400)
+
+    try:
+        url = normalize_web_url(url)
+        _, html = await fetch(request.app[_SESSION], url, FETCH_WEBPAGE_TIMEOUT, WEB_FETCH_HEADERS,
+                              raise_for_status=True)
+        (result, status), version = await run_cpu(request, webpage_content, html)
+        return _json(result, status, version)
+    except Exception as e:
+        return _json({'success': False, 'error': f'Gagal mengambil halaman: {_fetch_error(e)}'}, 400)
+
+
+async def healthz(request):
+    """Liveness + jumlah fetch yang sedang menunggu dan jumlah thread proses."""
+    return _json({'status': 'ok', 'in_flight': request.app[_STATE]['in_flight'], 'threads': threading.active_count()})
+
+
+async def metrics(request):
+    return web.Response(body=render(), headers={'Content-Type': CONTENT_TYPE})
+
+
+# ====== Aplikasi ======
+@web.middleware
+async def _middleware(request, handler):
+    """CORS (seperti flask_cors di app.py) + gauge in-flight dan histogram durasi request."""
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        route = request.match_info.route
+        endpoint = getattr(route, 'name', None) or 'unknown'
+        IN_FLIGHT.inc(endpoint=endpoint)
+        request.app[_STATE]['in_flight'] += 1
+        started = time.perf_counter()
+        try:
+            response = await handler(request)
+        finally:
+            request.app[_STATE]['in_flight'] -= 1
+            IN_FLIGHT.dec(endpoint=endpoint)
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-Admin-Token'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+async def _resources(app):
+    """Session HTTP bersama + thread pool CPU selama service hidup."""
+    workers = URL_CPU_WORKERS or os.cpu_count() or 1
+    app[_CPU_POOL] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='url-cpu')
+    connector = aiohttp.TCPConnector(limit=URL_MAX_CONNECTIONS, ssl=False)
+    app[_SESSION] = aiohttp.ClientSession(connector=connector)
+    ruleset.current()
+    ruleset.start_watcher()
+    yield
+    await app[_SESSION].close()
+    app[_CPU_POOL].shutdown(wait=False)
+
+
+def create_app():
+    app = web.Application(middlewares=[_middleware])
+    app[_STATE] = {'in_flight': 0}
+    app.cleanup_ctx.append(_resources)
+    app.router.add_post('/api/detect-url', detect_url, name='detect_url')
+    app.router.add_post('/api/detect-web', detect_web, name='detect_web')
+    app.router.add_get('/api/fetch-webpage', fetch_webpage, name='fetch_webpage')
+    app.router.add_get('/healthz', healthz, name='healthz')
+    app.router.add_get('/metrics', metrics, name='metrics')
+    return app
+
+
+def wait_until_ready(base_url, timeout=60):
+    """Tunggu sampai /healthz service menjawab."""
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return requests.get(base_url + '/healthz', timeout=1).json()
+        except (requests.exceptions.RequestException, ValueError):
+            time.sleep(0.3)
+    raise TimeoutError(f'URL service di {base_url} belum siap setelah {timeout} detik')
+
+
+# ====== Benchmark: banyak URL lambat sekaligus ======
+async def _bench(target, requests_count, delay, timeout):
+    from benchmark import make_corpus, make_html_pages
+    from loadtest import MockSite, percentile
+
+    site = MockSite(make_html_pages(make_corpus(50, 300, 0.5, 7)), delay=delay).start()
+    latencies, statuses = [], {}
+    bench_state = {'peak_threads': None}
+    try:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def one(i):
+                started = time.perf_counter()
+                try:
+                    async with session.post(f'{target}/api/detect-url', json={'url': f'{site.base_url}/page/{i}'},
+                                            timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        await response.read()
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+            async def peak_threads():
+                peak = 0
+                while True:
+                    try:
+                        async with session.get(f'{target}/healthz') as response:
+                            peak = max(peak, (await response.json()).get('threads', 0))
+                    except (aiohttp.ClientError, ValueError):
+                        pass
+                    bench_state['peak_threads'] = peak
+                    await asyncio.sleep(0.5)
+
+            watcher = asyncio.ensure_future(peak_threads())
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(requests_count)))
+            elapsed = time.perf_counter() - started
+            watcher.cancel()
+    finally:
+        site.stop()
+    latencies.sort()
+    return {
+        'target': target,
+        'requests': requests_count,
+        'site_delay_seconds': delay,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(requests_count / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'statuses': {str(k): v for k, v in statuses.items()},
+        'server_peak_threads': bench_state['peak_threads'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Service async untuk endpoint detect-url / detect-web / fetch-webpage')
+    parser.add_argument('--host', default=URL_SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=URL_SERVICE_PORT)
+    parser.add_argument('--bench', action='store_true', help='kirim banyak request URL lambat ke --target')
+    parser.add_argument('--target', default=f'http://127.0.0.1:{URL_SERVICE_PORT}')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=5.0, help='delay mock site per halaman (detik)')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print(json.dumps(asyncio.run(_bench(args.target.rstrip('/'), args.requests, args.delay, args.timeout)),
+                         indent=2))
+    else:
+        print(f"🌐 URL service di http://{args.host}:{args.port}")
+        web.run_app(create_app(), host=args.host, port=args.port, print=None, access_log=None)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Analisis view-source halaman web untuk /api/detect-web dan /api/fetch-webpage.
+
+Dipakai bersama oleh app1.py (requests, sinkron) dan url_service.py (aiohttp, async).
+Modul ini hanya berisi bagian CPU setelah HTML diambil; pengambilan halaman dan skor
+model (`score(text) -> float`) disediakan pemanggil, jadi modul ini tidak meng-import
+requests atau Flask. Model detect-web milik app1.py (rnn_model.h5 + tokenizer.pkl,
+maxlen 100) bisa di-load lazy lewat get_web_scorer() untuk pemanggil yang bukan app1.py.
+"""
+import os
+import re
+import threading
+from urllib.parse import urlparse
+
+import ruleset
+
+WEB_FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'id,en;q=0.9',
+}
+DETECT_WEB_TIMEOUT = 25
+FETCH_WEBPAGE_TIMEOUT = 20
+
+# Model & tokenizer detect-web, sama dengan app1.py
+WEB_MODEL_PATH = os.environ.get('WEB_MODEL_PATH', 'rnn_model.h5')
+WEB_TOKENIZER_PATH = os.environ.get('WEB_TOKENIZER_PATH', 'tokenizer.pkl')
+WEB_MAX_SEQUENCE_LENGTH = 100
+
+_web_scorer = None
+_web_scorer_loaded = False
+_web_scorer_lock = threading.Lock()
+
+BLOCKED_INDICATORS = (
+    'enable javascript', 'enable cookies', 'just a moment',
+    'cloudflare', 'access denied', 'captcha', 'security check',
+    'ddos protection', 'please enable javascript', 'checking your browser'
+)
+
+
+def normalize_web_url(url):
+    """Tambahkan https:// jika URL tanpa skema."""
+    if not urlparse(url).scheme:
+        return 'https://' + url
+    return url
+
+
+def get_web_scorer():
+    """
+    Load model + tokenizer detect-web app1.py sekali; return `score(text) -> float`, atau
+    None jika salah satu file tidak ada (pemanggil harus menolak request, bukan skor 0).
+    """
+    global _web_scorer, _web_scorer_loaded
+    with _web_scorer_lock:
+        if not _web_scorer_loaded:
+            from fast_tokenizer import load_tokenizer
+            tokenizer = load_tokenizer(WEB_TOKENIZER_PATH)
+            if tokenizer is not None and os.path.exists(WEB_MODEL_PATH):
+                import tensorflow as tf
+                model = tf.keras.models.load_model(WEB_MODEL_PATH)
+
+                def score(text):
+                    padded = tokenizer.texts_to_padded([text], maxlen=WEB_MAX_SEQUENCE_LENGTH,
+                                                       padding="post", truncating="post")
+                    return float(model.predict(padded, verbose=0)[0][0])
+
+                _web_scorer = score
+                print("✅ Model detect-web loaded successfully.")
+            else:
+                print(f"⚠️ Model detect-web ({WEB_MODEL_PATH} / {WEB_TOKENIZER_PATH}) tidak ditemukan.")
+            _web_scorer_loaded = True
+    return _web_scorer
+
+
+# ====== Fungsi untuk ekstrak SEMUA teks dari HTML (view-source) ======
+def extract_all_text_from_viewsource(html_content):
+    """Ekstrak SEMUA teks yang terlihat dari HTML view-source"""
+    from bs4 import BeautifulSoup
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        # Hapus hanya script dan style, tapi pertahankan SEMUA teks lainnya
+        for element in soup(["script", "style"]):
+            element.decompose()
+
+        # Dapatkan SEMUA teks dari HTML termasuk yang tersembunyi
+        all_text = soup.get_text()
+
+        # Bersihkan dan format teks
+        lines = (line.strip() for line in all_text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        clean_text = ' '.join(chunk for chunk in chunks if chunk)
+
+        # Hapus whitespace berlebihan
+        clean_text = re.sub(r'\s+', ' ', clean_text)
+
+        return clean_text.strip()
+
+    except Exception as e:
+        print(f"Error extracting all text: {e}")
+        return ""
+
+
+# ====== Fungsi untuk mencari kata kunci judi dalam teks ======
+def find_gambling_keywords_in_text(text):
+    """Cari kata kunci judi yang SANGAT SPESIFIK dalam teks"""
+    if not text or not isinstance(text, str):
+        return []
+
+    # Frasa judi online yang SANGAT SPESIFIK: 'strict_keywords' di rules/gambling.json
+    return list(ruleset.active().strict_matcher.scan(text))
+
+
+# ====== Fungsi untuk deteksi judi berdasarkan SEMUA konten view-source ======
+def detect_gambling_from_viewsource(full_text, url, score):
+    """Deteksi judi online berdasarkan analisis SEMUA teks dari view-source"""
+    if not full_text or len(full_text.strip()) < 50:
+        return False, 0.0, [], "insufficient_content"
+
+    try:
+        # 1. Pertama, cari kata kunci judi yang SANGAT SPESIFIK dalam seluruh teks
+        gambling_keywords = find_gambling_keywords_in_text(full_text)
+
+        print(f"Found {len(gambling_keywords)} gambling keywords: {gambling_keywords}")
+
+        # 2. Jika TIDAK ADA kata kunci judi, langsung return BUKAN JUDI
+        if len(gambling_keywords) == 0:
+            return False, 0.01, [], "no_gambling_keywords"
+
+        # 3. Jika ADA kata kunci judi, hitung confidence berdasarkan keyword density
+        total_words = len(full_text.split())
+        keyword_count = len(gambling_keywords)
+        keyword_density = (keyword_count / max(total_words, 1)) * 1000  # per 1000 words
+
+        # Confidence berdasarkan density keyword
+        if keyword_density > 10:  # Sangat tinggi
+            keyword_confidence = 0.95
+        elif keyword_density > 5:  # Tinggi
+            keyword_confidence = 0.85
+        elif keyword_density > 2:  # Sedang
+            keyword_confidence = 0.70
+        else:  # Rendah
+            keyword_confidence = 0.50
+
+        # 4. Juga gunakan model ML sebagai konfirmasi tambahan
+        ml_confidence = score(full_text)
+
+        # 5. Gabungkan confidence (prioritaskan keyword detection)
+        final_confidence = (keyword_confidence * 0.6) + (ml_confidence * 0.4)
+
+        # 6. Tentukan status akhir
+        is_gambling = final_confidence > 0.6 and len(gambling_keywords) > 0
+
+        return is_gambling, float(final_confidence), gambling_keywords, "view_source_analysis"
+
+    except Exception as e:
+        print(f"Error in viewsource detection: {e}")
+        return False, 0.0, [], "error"
+
+
+# ====== Respons endpoint (setelah halaman diambil) ======
+def analyze_webpage(url, html, score):
+    """Respons /api/detect-web untuk HTML yang sudah diambil; return (dict, status HTTP)."""
+    # Cek jika halaman memblokir akses
+    content_lower = html.lower()
+    if any(indicator in content_lower for indicator in BLOCKED_INDICATORS):
+        return {
+            'success': False,
+            'error': 'Halaman memblokir akses otomatis. Silakan coba URL lain.'
+        }, 403
+
+    # Ekstrak SEMUA teks dari view-source
+    full_text = extract_all_text_from_viewsource(html)
+
+    if len(full_text) < 100:
+        return {
+            'success': False,
+            'error': 'Konten halaman terlalu sedikit atau tidak dapat diakses'
+        }, 400
+
+    print(f"Berhasil mengekstrak {len(full_text)} karakter dari view-source")
+
+    # Analisis SEMUA teks dari view-source untuk deteksi judi
+    is_gambling, confidence, gambling_keywords, detection_method = detect_gambling_from_viewsource(
+        full_text, url, score)
+
+    # Tentukan status berdasarkan kata kunci yang ditemukan
+    if len(gambling_keywords) == 0:
+        status = 'Bukan Situs Judi'
+        # Force confidence to be low if no keywords found
+        confidence = max(0.01, confidence)  # Minimum 1% jika tidak ada keyword
+    else:
+        status = 'Terindikasi Iklan Judi' if is_gambling else 'Bukan Situs Judi'
+
+    return {
+        'success': True,
+        'status': status,
+        'confidence': f'{confidence * 100:.2f}%',
+        'raw_confidence': confidence,
+        'gambling_keywords': gambling_keywords,
+        'keyword_count': len(gambling_keywords),
+        'extracted_text': full_text[:3000] + ('...' if len(full_text) > 3000 else ''),
+        'full_text_length': len(full_text),
+        'source_url': url,
+        'detection_method': detection_method,
+        'analysis_note': 'Berdasarkan analisis seluruh konten view-source website'
+    }, 200
+
+
+def webpage_content(html):
+    """Respons /api/fetch-webpage untuk HTML yang sudah diambil; return (dict, status HTTP)."""
+    full_text = extract_all_text_from_viewsource(html)
+
+    if len(full_text) < 50:
+        return {'success': False, 'error': 'Konten halaman terlalu sedikit'}, 400
+
+    return {
+        'success': True,
+        'content': full_text,
+        'content_length': len(full_text)
+    }, 200
@@ -0,0 +1,393 @@
+"""
+Ingest YouTube untuk detect_youtube dengan SATU kali probe ke yt-dlp.
+
+probe_youtube(url) memanggil extract_info sekali (tanpa download). Hasilnya berisi
+metadata, daftar format, subtitle, thumbnail dan storyboard sekaligus, jadi tier
+selanjutnya tidak perlu bertanya lagi ke YouTube.
+
+download_video(info) memakai info hasil probe (process_ie_result, tanpa extract ulang)
+dan memilih format terkecil yang masih cukup untuk OCR: video-only <= YOUTUBE_MAX_HEIGHT
+(default 360p) + audio bitrate terendah, digabung ke mp4. Hanya rentang
+[0, YOUTUBE_ANALYSIS_SECONDS] yang diunduh, jadi ukuran unduhan mengikuti budget
+analisis, bukan panjang video. Pemotongan rentang dan penggabungan audio butuh ffmpeg;
+tanpa ffmpeg dipakai format progresif terkecil (<= 360p) secara utuh.
+
+fetch_captions(info) mengambil track caption (upload kreator dulu, lalu auto-generated)
+dari URL yang sudah ada di hasil probe, untuk fast path tanpa download video + ASR.
+
+fetch_storyboard_tiles(info) mengunduh thumbnail + sprite sheet storyboard (paralel,
+hanya beberapa ratus KB) dan memecah sprite menjadi tile di memori, untuk tier OCR
+sebelum download video penuh.
+
+Uji tanpa internet (server media lokal dari loadtest.MockMediaServer):
+    python youtube_ingest.py --mock
+    python youtube_ingest.py https://www.youtube.com/watch?v=XXXXXXXXXXX --seconds 30
+
+Env: YOUTUBE_MAX_HEIGHT, YOUTUBE_ANALYSIS_SECONDS, YOUTUBE_SOCKET_TIMEOUT, CAPTION_LANGUAGES,
+     STORYBOARD_MAX_SHEETS
+"""
+import argparse
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+YOUTUBE_MAX_HEIGHT = int(os.environ.get('YOUTUBE_MAX_HEIGHT', '360'))
+YOUTUBE_ANALYSIS_SECONDS = int(os.environ.get('YOUTUBE_ANALYSIS_SECONDS', '60'))
+YOUTUBE_SOCKET_TIMEOUT = float(os.environ.get('YOUTUBE_SOCKET_TIMEOUT', '20'))
+CAPTION_LANGUAGES = [lang.strip() for lang in os.environ.get('CAPTION_LANGUAGES', 'id,en').split(',') if lang.strip()]
+CAPTION_FORMATS = ('json3', 'vtt', 'srv1', 'srv3', 'ttml')
+STORYBOARD_MAX_SHEETS = int(os.environ.get('STORYBOARD_MAX_SHEETS', '8'))
+
+_BASE_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'noplaylist': True,
+    'noprogress': True,
+    'socket_timeout': YOUTUBE_SOCKET_TIMEOUT,
+}
+
+
+def _socket_timeout(remaining):
+    """socket_timeout yt-dlp, tidak lebih lama dari sisa budget request (`remaining` detik)."""
+    if remaining is None:
+        return YOUTUBE_SOCKET_TIMEOUT
+    return max(1.0, min(YOUTUBE_SOCKET_TIMEOUT, remaining))
+
+
+def probe_youtube(url, timeout=None):
+    """
+    Satu extract_info (tanpa download). Return dict info yt-dlp, atau None jika gagal.
+    `timeout` (detik) membatasi socket_timeout, mis. sisa budget request.
+    """
+    import yt_dlp
+    try:
+        with yt_dlp.YoutubeDL(dict(_BASE_OPTS, skip_download=True, socket_timeout=_socket_timeout(timeout))) as ydl:
+            return ydl.extract_info(url, download=False)
+    except Exception as e:
+        print(f"Error probing YouTube video: {e}")
+        return None
+
+
+def metadata_from_info(info):
+    """Metadata yang dipakai analisis, diambil dari hasil probe."""
+    info = info or {}
+    return {
+        'title': info.get('title') or '',
+        'description': info.get('description') or '',
+        'duration': info.get('duration') or 0,
+        'view_count': info.get('view_count') or 0,
+        'uploader': info.get('uploader') or '',
+        'upload_date': info.get('upload_date') or '',
+        'tags': info.get('tags') or [],
+        'categories': info.get('categories') or [],
+    }
+
+
+def format_selector(max_height=YOUTUBE_MAX_HEIGHT, can_merge=True):
+    """
+    Selector format yt-dlp: video-only terbaik yang <= max_height + audio terkecil.
+    `?` membuat format tanpa info tinggi (mis. file langsung) tetap lolos filter.
+    """
+    if can_merge:
+        return f'bv*[height<=?{max_height}]+wa/b[height<=?{max_height}]/w'
+    return f'b[height<=?{max_height}]/w'
+
+
+def download_video(info, seconds=None, max_height=None, cancel=None, deadline=None):
+    """
+    Unduh video dari hasil probe (tanpa extract_info ulang), dibatasi `seconds` detik pertama.
+    Return (path, keterangan) dengan path None jika gagal, dibatalkan lewat `cancel`
+    (threading.Event) atau melewati `deadline` (time.monotonic(), budget request); keduanya
+    dicek di setiap progress hook yt-dlp.
+    """
+    import yt_dlp
+    seconds = seconds or YOUTUBE_ANALYSIS_SECONDS
+    has_ffmpeg = shutil.which('ffmpeg') is not None
+    opts = dict(
+        _BASE_OPTS,
+        format=format_selector(max_height or YOUTUBE_MAX_HEIGHT, can_merge=has_ffmpeg),
+        outtmpl=os.path.join(tempfile.gettempdir(), f'yt_%(id)s_{uuid.uuid4().hex[:8]}.%(ext)s'),
+        merge_output_format='mp4',
+        socket_timeout=_socket_timeout(deadline - time.monotonic() if deadline is not None else None),
+    )
+    duration = info.get('duration') or 0
+    clipped = has_ffmpeg and (not duration or duration > seconds)
+    if clipped:
+        opts['download_ranges'] = yt_dlp.utils.download_range_func(None, [(0, seconds)])
+    if cancel is not None or deadline is not None:
+        def _abort_if_cancelled(progress):
+            if cancel is not None and cancel.is_set():
+                raise yt_dlp.utils.DownloadCancelled('dibatalkan klien')
+            if deadline is not None and time.monotonic() >= deadline:
+                raise yt_dlp.utils.DownloadCancelled('budget waktu request habis')
+        opts['progress_hooks'] = [_abort_if_cancelled]
+
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            result = ydl.process_ie_result(dict(info), download=True)
+    except Exception as e:
+        print(f"Error downloading YouTube video: {e}")
+        return None, {}
+
+    downloads = result.get('requested_downloads') or [result]
+    path = downloads[0].get('filepath') or downloads[0].get('_filename')
+    if not path or not os.path.exists(path):
+        return None, {}
+    return path, {
+        'format_id': result.get('format_id'),
+        'height': result.get('height'),
+        'range_seconds': seconds if clipped else None,
+        'bytes': os.path.getsize(path),
+    }
+
+
+# ====== Caption / Subtitle ======
+def _pick_track(tracks, languages):
+    """Track caption pertama sesuai urutan bahasa (termasuk varian seperti en-US / en-orig) dan format."""
+    for lang in languages:
+        candidates = tracks.get(lang)
+        if not candidates:
+            candidates = next((v for k, v in tracks.items() if k.split('-')[0] == lang and k != 'live_chat'), None)
+        if not candidates:
+            continue
+        for ext in CAPTION_FORMATS:
+            for track in candidates:
+                if track.get('ext') == ext and track.get('url'):
+                    return lang, track
+    return None, None
+
+
+def _vtt_to_text(data):
+    lines = []
+    for line in data.splitlines():
+        line = line.strip()
+        if not line or '-->' in line or line.isdigit() or line.startswith(('WEBVTT', 'NOTE', 'Kind:', 'Language:')):
+            continue
+        line = re.sub(r'<[^>]+>', '', line).strip()
+        # Caption otomatis mengulang baris sebelumnya di tiap cue
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return html.unescape(' '.join(lines))
+
+
+def caption_to_text(data, ext):
+    """Konversi isi file caption (json3 / vtt / xml) ke teks polos."""
+    if ext == 'json3':
+        events = json.loads(data).get('events') or []
+        text = ''.join(seg.get('utf8', '') for event in events for seg in event.get('segs') or [])
+    elif ext == 'vtt':
+        text = _vtt_to_text(data)
+    else:
+        text = html.unescape(re.sub(r'<[^>]+>', ' ', data))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def fetch_captions(info, languages=None):
+    """
+    Teks caption video dari hasil probe: subtitle kreator diutamakan, lalu caption otomatis.
+    Return (teks, keterangan); ('', {}) jika tidak ada caption yang bisa diambil.
+    """
+    import yt_dlp
+    languages = languages or CAPTION_LANGUAGES
+    for kind, tracks in (('manual', info.get('subtitles')), ('auto', info.get('automatic_captions'))):
+        lang, track = _pick_track(tracks or {}, languages)
+        if track is None:
+            continue
+        try:
+            with yt_dlp.YoutubeDL(_BASE_OPTS) as ydl:
+                data = ydl.urlopen(track['url']).read().decode('utf-8', 'replace')
+            text = caption_to_text(data, track.get('ext'))
+        except Exception as e:
+            print(f"Error fetching captions ({kind}/{lang}): {e}")
+            continue
+        if text:
+            return text, {'kind': kind, 'language': lang, 'format': track.get('ext'), 'words': len(text.split())}
+    return '', {}
+
+
+# ====== Thumbnail & Storyboard ======
+def storyboard_format(info):
+    """Format storyboard dengan tile terbesar dari hasil probe, atau None."""
+    candidates = [f for f in info.get('formats') or []
+                  if f.get('format_note') == 'storyboard' and f.get('fragments') and f.get('rows') and f.get('columns')]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda f: (f.get('width') or 0) * (f.get('height') or 0))
+
+
+def split_sprite(sheet, rows, columns):
+    """Pecah satu sprite sheet menjadi tile (view numpy, tanpa copy); tile polos (kosong) dibuang."""
+    tile_h, tile_w = sheet.shape[0] // rows, sheet.shape[1] // columns
+    tiles = []
+    for r in range(rows):
+        for c in range(columns):
+            tile = sheet[r * tile_h:(r + 1) * tile_h, c * tile_w:(c + 1) * tile_w]
+            if tile.size and tile.std() > 4:
+                tiles.append(tile)
+    return tiles
+
+
+def _fetch_image(url):
+    import cv2
+    import numpy as np
+    import requests
+    try:
+        response = requests.get(url, timeout=YOUTUBE_SOCKET_TIMEOUT)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Error fetching image {url[:80]}: {e}")
+        return None, 0
+    image = cv2.imdecode(np.frombuffer(response.content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return image, len(response.content)
+
+
+def fetch_storyboard_tiles(info, max_sheets=None):
+    """
+    Thumbnail + tile storyboard (array BGR) dari hasil probe. Sprite sheet dipilih merata
+    sepanjang video (maks `max_sheets`) dan diunduh paralel. Return (list gambar, keterangan).
+    """
+    max_sheets = max_sheets or STORYBOARD_MAX_SHEETS
+    urls = []
+    if info.get('thumbnail'):
+        urls.append(info['thumbnail'])
+    fmt = storyboard_format(info)
+    sheet_urls = []
+    if fmt:
+        fragments = fmt['fragments']
+        count = min(max_sheets, len(fragments))
+        picks = sorted({round(i * (len(fragments) - 1) / max(1, count - 1)) for i in range(count)})
+        sheet_urls = [fragments[i]['url'] for i in picks if fragments[i].get('url')]
+    urls.extend(sheet_urls)
+    if not urls:
+        return [], {}
+
+    with ThreadPoolExecutor(max_workers=min(8, len(urls))) as pool:
+        fetched = list(pool.map(_fetch_image, urls))
+
+    images = []
+    total_bytes = sum(size for _, size in fetched)
+    for url, (image, _) in zip(urls, fetched):
+        if image is None:
+            continue
+        if url in sheet_urls:
+            images.extend(split_sprite(image, fmt['rows'], fmt['columns']))
+        else:
+            images.append(image)
+    return images, {
+        'thumbnail': bool(info.get('thumbnail')),
+        'storyboard_format': fmt.get('format_id') if fmt else None,
+        'sheets': len(sheet_urls),
+        'tiles': len(images),
+        'bytes': total_bytes,
+    }
+
+
+# ====== CLI: uji ingest terhadap URL asli atau server media lokal ======
+MOCK_CAPTIONS = """WEBVTT
+
+00:00:00.000 --> 00:00:03.000
+daftar sekarang di situs <c>slot gacor</c> terpercaya
+
+00:00:03.000 --> 00:00:06.000
+bonus new member 100% deposit pulsa
+"""
+
+
+def _mock_video_url(seconds):
+    from benchmark import make_video
+    from loadtest import MockMediaServer
+
+    path = os.path.join(tempfile.gettempdir(), f'mock_media_{os.getpid()}.mp4')
+    make_video(path, seconds, fps=30, width=640, height=360)
+    with open(path, 'rb') as f:
+        body = f.read()
+    os.remove(path)
+    # Sprite storyboard 5x5 tile 160x90 dan thumbnail 640x360, seperti yang disajikan i.ytimg.com
+    import cv2
+    import numpy as np
+    from benchmark import make_frames
+    tiles = [cv2.resize(f, (160, 90), interpolation=cv2.INTER_AREA) for f in make_frames(25, 0, width=640, height=360)]
+    sheet = np.vstack([np.hstack(tiles[r * 5:(r + 1) * 5]) for r in range(5)])
+    thumbnail = make_frames(1, 1, width=640, height=360)[0]
+    server = MockMediaServer({
+        '/video.mp4': (body, 'video/mp4'),
+        '/captions.id.vtt': (MOCK_CAPTIONS.encode('utf-8'), 'text/vtt'),
+        '/sb/M0.jpg': (cv2.imencode('.jpg', sheet)[1].tobytes(), 'image/jpeg'),
+        '/thumbnail.jpg': (cv2.imencode('.jpg', thumbnail)[1].tobytes(), 'image/jpeg'),
+    }).start()
+    return server, server.base_url + '/video.mp4'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Uji probe + download parsial YouTube')
+    parser.add_argument('url', nargs='?', help='URL video (YouTube atau URL media langsung)')
+    parser.add_argument('--mock', action='store_true', help='pakai server media lokal berisi video sintetis')
+    parser.add_argument('--mock-seconds', type=int, default=20, help='durasi video sintetis untuk --mock')
+    parser.add_argument('--seconds', type=int, default=None, help='budget analisis (detik yang diunduh)')
+    parser.add_argument('--max-height', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if args.mock:
+        server, url = _mock_video_url(args.mock_seconds)
+    if not url:
+        parser.error('URL wajib diisi (atau pakai --mock)')
+
+    try:
+        start = time.perf_counter()
+        info = probe_youtube(url)
+        probe_s = time.perf_counter() - start
+        if info is None:
+            return 1
+        if server is not None:
+            # URL media langsung tidak punya caption/storyboard; tambahkan seperti yang dilaporkan YouTube
+            info['subtitles'] = {'id': [{'ext': 'vtt', 'url': server.base_url + '/captions.id.vtt'}]}
+            info['thumbnail'] = server.base_url + '/thumbnail.jpg'
+            info['formats'].append({
+                'format_id': 'sb0', 'format_note': 'storyboard', 'ext': 'mhtml', 'width': 160, 'height': 90,
+                'rows': 5, 'columns': 5, 'fragments': [{'url': server.base_url + '/sb/M0.jpg', 'duration': 25.0}],
+            })
+        start = time.perf_counter()
+        caption_text, caption_info = fetch_captions(info)
+        captions_s = time.perf_counter() - start
+        start = time.perf_counter()
+        tiles, storyboard_info = fetch_storyboard_tiles(info)
+        storyboard_s = time.perf_counter() - start
+        start = time.perf_counter()
+        path, details = download_video(info, args.seconds, args.max_height)
+        download_s = time.perf_counter() - start
+        report = {
+            'url': url,
+            'probe_ms': round(probe_s * 1000, 1),
+            'captions_ms': round(captions_s * 1000, 1),
+            'storyboard_ms': round(storyboard_s * 1000, 1),
+            'download_ms': round(download_s * 1000, 1),
+            'ffmpeg': shutil.which('ffmpeg') is not None,
+            'formats_available': len(info.get('formats') or []),
+            'subtitles': sorted((info.get('subtitles') or {}).keys()),
+            'captions': dict(caption_info, sample=caption_text[:200]),
+            'storyboard': storyboard_info,
+            'duration': info.get('duration'),
+            'download': details,
+        }
+        if server is not None:
+            report['server_bytes_sent'] = server.bytes_sent
+        print(json.dumps(report, indent=2))
+        if path:
+            os.remove(path)
+        return 0 if path else 1
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())